@@ -0,0 +1,54 @@
+"""
+Micro-benchmark of field access on :class:`json2py.models.NestedField` objects.
+
+Usage: python benchmarks/bench_access.py [iterations]
+"""
+from __future__ import print_function
+import os
+import sys
+import timeit
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+from json2py.models import NestedField, TextField, IntegerField, BooleanField
+
+__author__ = 'Victor'
+
+
+class User(NestedField):
+    login = TextField()
+    id = IntegerField()
+    user_type = TextField(name = 'type')
+    site_admin = BooleanField()
+
+
+class Repo(NestedField):
+    id = IntegerField()
+    full_name = TextField()
+    owner = User()
+    is_private = BooleanField(name = 'private')
+
+
+DATA = {
+    'id': 54333024, 'full_name': 'Wiston999/json2py', 'private': False,
+    'owner': {'login': 'Wiston999', 'id': 1099504, 'type': 'User', 'site_admin': False},
+}
+
+
+def main(iterations = 1000000):
+    repo = Repo(DATA)
+    cases = [
+        ('repo.id.value', lambda: repo.id.value),
+        ('repo.owner.login.value', lambda: repo.owner.login.value),
+        ('repo.json_encode (method lookup)', lambda: repo.json_encode),
+        ("repo.owner = ...", lambda: setattr(repo, 'owner', repo.owner)),
+        ('Repo(DATA)', lambda: Repo(DATA)),
+    ]
+    for label, func in cases:
+        number = iterations if not label.startswith('Repo(') else iterations // 20
+        elapsed = min(timeit.repeat(func, number = number, repeat = 3))
+        print('%-36s %8.1f ns/op' % (label, elapsed / number * 1e9))
+
+
+if __name__ == '__main__':
+    main(*[int(arg) for arg in sys.argv[1:]])
@@ -0,0 +1,66 @@
+"""
+Benchmark of :meth:`BaseField.from_json` on a repeated payload without cache, with a cache returning
+copies (the default) and with a cache sharing the cached object.
+
+Usage: python benchmarks/bench_cache.py [records]
+"""
+from __future__ import print_function
+import json
+import os
+import sys
+import timeit
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+from json2py.models import NestedField, ListField, TextField, IntegerField, BooleanField
+from json2py.cache import DecodeCache
+
+__author__ = 'Victor'
+
+
+class User(NestedField):
+    login = TextField()
+    id = IntegerField()
+    user_type = TextField(name = 'type')
+    site_admin = BooleanField()
+
+
+class Repo(NestedField):
+    id = IntegerField()
+    full_name = TextField()
+    owner = User()
+    is_private = BooleanField(name = 'private')
+
+
+class RepoList(ListField):
+    __model__ = Repo
+
+
+class CopiedRepoList(RepoList):
+    __cache__ = DecodeCache()
+
+
+class SharedRepoList(RepoList):
+    __cache__ = DecodeCache(copy = False)
+
+
+def main(records = 1000):
+    text = json.dumps([
+        {'id': i, 'full_name': 'user/repo%d' % i, 'private': False,
+         'owner': {'login': 'user', 'id': i, 'type': 'User', 'site_admin': False}}
+        for i in range(records)
+    ])
+
+    cases = [
+        ('RepoList.from_json(text)', lambda: RepoList.from_json(text)),
+        ('cached, copy = True', lambda: CopiedRepoList.from_json(text)),
+        ('cached, copy = False', lambda: SharedRepoList.from_json(text)),
+    ]
+    for label, func in cases:
+        func()
+        elapsed = min(timeit.repeat(func, number = 10, repeat = 5)) / 10
+        print('%-30s %8.2f us/record' % (label, elapsed / records * 1e6))
+
+
+if __name__ == '__main__':
+    main(*[int(arg) for arg in sys.argv[1:]])
@@ -0,0 +1,43 @@
+"""
+Benchmark of building lists of epoch timestamps, one :class:`DateField` at a time and through the bulk
+conversion of :class:`ListField`, which uses numpy when it is installed.
+
+Usage: python benchmarks/bench_dates.py [values]
+"""
+from __future__ import print_function
+import os
+import sys
+import timeit
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+from json2py.models import DateField, ListField, _numpy
+
+__author__ = 'Victor'
+
+
+class Millis(DateField):
+    __formatting__ = 'timestamp_ms'
+
+
+class MillisList(ListField):
+    __model__ = Millis
+
+
+def main(size = 100000):
+    values = [1458854751123 + i * 1000 for i in range(size)]
+    dates = MillisList(values)
+    print('numpy: %s' % ('yes' if _numpy() is not None else 'no'))
+
+    cases = [
+        ('[Millis(v) for v in values]', lambda: [Millis(v) for v in values]),
+        ('MillisList(values)', lambda: MillisList(values)),
+        ('dates.json_encode()', lambda: dates.json_encode()),
+    ]
+    for label, func in cases:
+        elapsed = min(timeit.repeat(func, number = 1, repeat = 5))
+        print('%-30s %8.1f ns/value' % (label, elapsed / size * 1e9))
+
+
+if __name__ == '__main__':
+    main(*[int(arg) for arg in sys.argv[1:]])
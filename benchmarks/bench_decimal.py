@@ -0,0 +1,73 @@
+"""
+Benchmark of decoding and encoding float-heavy models next to the same models using :class:`DecimalField`.
+
+Float models must keep the speed of plain ``json.loads`` + build and of the C encoder: decimals are only
+parsed and encoded exactly for models holding them.
+
+Usage: python benchmarks/bench_decimal.py [records]
+"""
+from __future__ import print_function
+import json
+import os
+import sys
+import timeit
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+from json2py.models import NestedField, ListField, IntegerField, FloatField, DecimalField, BigIntField
+from json2py.encoder import BaseEncoder
+
+__author__ = 'Victor'
+
+
+class Quote(NestedField):
+    id = IntegerField()
+    bid = FloatField()
+    ask = FloatField()
+    last = FloatField()
+    volume = FloatField()
+    change = FloatField()
+
+
+class QuoteList(ListField):
+    __model__ = Quote
+
+
+class ExactQuote(NestedField):
+    id = BigIntField()
+    bid = DecimalField()
+    ask = DecimalField()
+    last = DecimalField()
+    volume = FloatField()
+    change = FloatField()
+
+
+class ExactQuoteList(ListField):
+    __model__ = ExactQuote
+
+
+def main(records = 20000):
+    data = [
+        {'id': i, 'bid': i + 0.25, 'ask': i + 0.75, 'last': i + 0.5, 'volume': i * 1.5, 'change': -0.125}
+        for i in range(records)
+    ]
+    text = json.dumps(data)
+    quotes = QuoteList(data)
+    exact = ExactQuoteList.from_json(text)
+    assert json.loads(exact.json_encode()) == json.loads(quotes.json_encode())
+
+    cases = [
+        ('QuoteList(json.loads(text))', lambda: QuoteList(json.loads(text))),
+        ('QuoteList.from_json(text)', lambda: QuoteList.from_json(text)),
+        ('ExactQuoteList.from_json(text)', lambda: ExactQuoteList.from_json(text)),
+        ('json.dumps(encoded dicts)', lambda: json.dumps(BaseEncoder().default(quotes), separators = (',', ':'))),
+        ('quotes.json_encode()', lambda: quotes.json_encode()),
+        ('exact.json_encode()', lambda: exact.json_encode()),
+    ]
+    for label, func in cases:
+        elapsed = min(timeit.repeat(func, number = 1, repeat = 5))
+        print('%-34s %8.1f us/record' % (label, elapsed / records * 1e6))
+
+
+if __name__ == '__main__':
+    main(*[int(arg) for arg in sys.argv[1:]])
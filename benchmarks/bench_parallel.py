@@ -0,0 +1,64 @@
+"""
+Benchmark of :class:`json2py.models.ListField` decoding with an increasing number of threads.
+
+On free-threaded (no-GIL) builds chunks are built in parallel so time should drop as threads
+are added, on regular builds the pool should cost about the same as serial decoding.
+
+Usage: python benchmarks/bench_parallel.py [elements]
+"""
+from __future__ import print_function
+import multiprocessing
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+from json2py.models import NestedField, ListField, TextField, IntegerField, BooleanField
+
+__author__ = 'Victor'
+
+
+class User(NestedField):
+    login = TextField()
+    id = IntegerField()
+    user_type = TextField(name = 'type')
+    site_admin = BooleanField()
+
+
+class Repo(NestedField):
+    id = IntegerField()
+    full_name = TextField()
+    owner = User()
+    is_private = BooleanField(name = 'private')
+    size = IntegerField()
+
+
+class RepoList(ListField):
+    __model__ = Repo
+    __chunk_size__ = 2048
+
+
+def main(elements = 200000):
+    data = [{
+        'id': i, 'full_name': 'user/repo%d' % i, 'private': False, 'size': i * 10,
+        'owner': {'login': 'user%d' % (i % 100), 'id': i % 100, 'type': 'User', 'site_admin': False},
+    } for i in range(elements)]
+
+    gil = getattr(sys, '_is_gil_enabled', lambda: True)()
+    print('Python %s, GIL %s, %d CPUs' % (sys.version.split()[0], 'enabled' if gil else 'disabled', multiprocessing.cpu_count()))
+
+    baseline = None
+    for workers in [None, 1, 2, 4, 8]:
+        if workers is not None and workers > multiprocessing.cpu_count() * 2:
+            break
+        RepoList.__workers__ = workers
+        start = time.time()
+        RepoList(data)
+        elapsed = time.time() - start
+        baseline = baseline or elapsed
+        print('%-8s %7.3f s  x%.2f' % ('serial' if workers is None else '%d thr' % workers, elapsed, baseline / elapsed))
+
+
+if __name__ == '__main__':
+    main(*[int(arg) for arg in sys.argv[1:]])
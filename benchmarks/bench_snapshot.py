@@ -0,0 +1,50 @@
+"""
+Benchmark of startup time: decoding a JSON list versus mapping a snapshot of it.
+
+Usage: python benchmarks/bench_snapshot.py [elements]
+"""
+from __future__ import print_function
+import json
+import os
+import shutil
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+from bench_parallel import RepoList
+
+__author__ = 'Victor'
+
+
+def main(elements = 200000):
+    data = [{
+        'id': i, 'full_name': 'user/repo%d' % i, 'private': False, 'size': i * 10,
+        'owner': {'login': 'user%d' % (i % 100), 'id': i % 100, 'type': 'User', 'site_admin': False},
+    } for i in range(elements)]
+    workdir = tempfile.mkdtemp()
+    try:
+        source = os.path.join(workdir, 'repos.json')
+        snapshot = os.path.join(workdir, 'repos.snap')
+        with open(source, 'w') as f:
+            json.dump(data, f)
+        RepoList(data).snapshot(snapshot)
+
+        start = time.time()
+        with open(source) as f:
+            repos = RepoList(json.load(f))
+        print('json.load + RepoList   %8.3f s' % (time.time() - start))
+
+        start = time.time()
+        view = RepoList.open_snapshot(snapshot)
+        opened = time.time() - start
+        view[elements // 2].owner.login.value
+        print('open_snapshot          %8.3f s (first access %.6f s)' % (opened, time.time() - start - opened))
+        view.close()
+    finally:
+        shutil.rmtree(workdir)
+
+
+if __name__ == '__main__':
+    main(*[int(arg) for arg in sys.argv[1:]])
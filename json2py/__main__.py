@@ -0,0 +1,8 @@
+import sys
+
+from .cli import main
+
+__author__ = 'Victor'
+
+if __name__ == '__main__':
+    sys.exit(main())
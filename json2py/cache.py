@@ -0,0 +1,138 @@
+import hashlib
+import threading
+import time
+from collections import OrderedDict
+
+__author__ = 'Victor'
+
+
+class DecodeCache(object):
+    """
+    Least recently used cache of decoded models, keyed by a digest of the raw JSON input.
+
+    A cache is enabled on a model by assigning it to the ``__cache__`` class variable,
+    after that :meth:`.BaseField.from_json` returns the cached object whenever the
+    very same payload is decoded again, skipping both :py:func:`json.loads` and model construction.
+
+    :arg max_entries: Maximum number of cached objects, None means unbounded.
+    :arg max_bytes: Maximum total size of the cached payloads (measured in bytes of the raw
+        input, text is counted as UTF-8), None means unbounded.
+    :arg ttl: Seconds an entry is kept before being considered stale, None means forever.
+    :arg timer: Function returning current time in seconds, defaults to :py:func:`time.time`.
+    :arg copy: Whether callers get a deep copy (see :meth:`.BaseField.copy`) of the cached object,
+        so they can modify it freely. False returns the cached object itself.
+
+    :note: Copies skip parsing and validation but still build every field again, they cost about
+        70% of decoding the payload (see ``benchmarks/bench_cache.py``). With ``copy = False`` hits cost
+        nothing, but cached objects are shared between every caller, and thread, hitting the same
+        entry: modifying one (e.g. assigning a field) changes what every later hit returns, so they
+        must be treated as read-only.
+    :note: Instances are thread-safe.
+    """
+    def __init__(self, max_entries = 1024, max_bytes = None, ttl = None, timer = time.time, copy = True):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.ttl = ttl
+        self.timer = timer
+        self.copy = copy
+
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.size = 0
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def make_key(cls, data):
+        """
+        Builds the cache key for ``data`` decoded as ``cls``.
+
+        :param cls: Model class the data is decoded into.
+        :param data: Raw JSON input, either text or bytes.
+        :return: Hashable key.
+        """
+        if not isinstance(data, bytes):
+            data = data.encode('utf-8')
+        return cls, hashlib.sha1(data).digest()
+
+    def get(self, key):
+        """
+        Looks up ``key`` in cache, refreshing its position on the LRU order.
+
+        :param key: Key built by :meth:`make_key`.
+        :return: The cached object or None if key is missing or expired.
+        """
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+
+            obj, size, expires = entry
+            if expires is not None and expires <= self.timer():
+                self._discard(key)
+                self.misses += 1
+                return None
+
+            # Re-insert to mark it as the most recently used one
+            del self._entries[key]
+            self._entries[key] = entry
+            self.hits += 1
+            return obj
+
+    def put(self, key, obj, size = 0):
+        """
+        Stores ``obj`` under ``key``, evicting least recently used entries if limits are exceeded.
+
+        :param key: Key built by :meth:`make_key`.
+        :param obj: Decoded object.
+        :param size: Size in bytes accounted for this entry.
+        """
+        if self.max_bytes is not None and size > self.max_bytes:
+            return
+
+        with self._lock:
+            if key in self._entries:
+                self._discard(key)
+
+            expires = None if self.ttl is None else self.timer() + self.ttl
+            self._entries[key] = (obj, size, expires)
+            self.size += size
+
+            while (self.max_entries is not None and len(self._entries) > self.max_entries) or \
+                    (self.max_bytes is not None and self.size > self.max_bytes):
+                oldest = next(iter(self._entries))
+                self._discard(oldest)
+                self.evictions += 1
+
+    def clear(self):
+        """
+        Drops every entry. Statistics are kept.
+        """
+        with self._lock:
+            self._entries.clear()
+            self.size = 0
+
+    def stats(self):
+        """
+        :return: dict with ``hits``, ``misses``, ``evictions``, ``entries`` and ``size`` counters.
+        """
+        with self._lock:
+            return {
+                'hits': self.hits,
+                'misses': self.misses,
+                'evictions': self.evictions,
+                'entries': len(self._entries),
+                'size': self.size,
+            }
+
+    def _discard(self, key):
+        obj, size, expires = self._entries.pop(key)
+        self.size -= size
+
+    def __len__(self):
+        return len(self._entries)
+
+    def __contains__(self, key):
+        return key in self._entries
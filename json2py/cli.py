@@ -0,0 +1,321 @@
+"""
+Command line tool converting or validating JSON files with a model, run it as ``python -m json2py``.
+"""
+from __future__ import print_function, division
+import argparse
+import importlib
+import json
+import multiprocessing
+import os
+import sys
+import time
+from collections import deque
+from json.decoder import WHITESPACE
+
+from .models import BaseField, ListField, ParseException, _holds_exact
+
+__author__ = 'Victor'
+
+NDJSON_EXTENSIONS = ('.ndjson', '.jsonl')
+JSON_EXTENSIONS = ('.json', ) + NDJSON_EXTENSIONS
+
+# Record class and encoding options of the current process, set by _init_worker
+_state = {}
+
+
+def load_model(spec):
+    """
+    Imports a model class given as ``module:Class`` or ``module.Class``, e.g. ``example:RepoList``.
+
+    :raise ValueError: If the class cannot be imported or it is not a :class:`.BaseField` subclass.
+    """
+    moduleName, sep, className = spec.partition(':')
+    if not sep:
+        moduleName, _, className = spec.rpartition('.')
+    try:
+        cls = importlib.import_module(moduleName)
+        for attr in className.split('.'):
+            cls = getattr(cls, attr)
+    except (ImportError, AttributeError, ValueError) as e:
+        raise ValueError("Cannot import model '%s': %s" % (spec, e))
+    if not isinstance(cls, type) or not issubclass(cls, BaseField):
+        raise ValueError("'%s' is not a json2py model" % spec)
+    return cls
+
+
+def _record_class(cls):
+    # Lists are converted element by element, so they can be split across workers
+    return cls._element_class() if issubclass(cls, ListField) else cls
+
+
+def _init_worker(spec, options):
+    _state['build'] = _record_class(load_model(spec))
+    _state['options'] = options
+
+
+def _convert(task):
+    """
+    Builds (and encodes, unless only validating) a chunk of records.
+
+    :param task: ``(location, records, raw)`` tuple, where ``records`` is a list of ``(position, record)``
+        pairs, ``location`` a format string giving the position of a record in input and ``raw`` whether
+        records are JSON strings.
+    :return: ``(encoded records, number of records, errors)`` tuple.
+    """
+    location, records, raw = task
+    build, options = _state['build'], _state['options']
+    encoded, errors = [], []
+    for position, record in records:
+        try:
+            obj = build.from_json(record) if raw else build(record)
+            if options is not None:
+                encoded.append(obj.json_encode(**options))
+        except (ParseException, LookupError, ValueError, TypeError) as e:
+            errors.append('%s: %s: %s' % (location % position, type(e).__name__, e))
+    return encoded, len(records), errors
+
+
+def _expand(paths):
+    """
+    Yields input files, directories are walked looking for JSON files.
+    """
+    for path in paths:
+        if not os.path.isdir(path):
+            yield path
+            continue
+        for root, dirs, files in os.walk(path):
+            dirs.sort()
+            for name in sorted(files):
+                if name.endswith(JSON_EXTENSIONS):
+                    yield os.path.join(root, name)
+
+
+def _split_array(text):
+    """
+    Returns the JSON text of each element of the JSON array in ``text``, without building them.
+
+    :raise ValueError: If ``text`` is not a valid JSON array.
+    """
+    decoder = json.JSONDecoder()
+    idx = WHITESPACE.match(text).end()
+    if text[idx:idx + 1] != '[':
+        raise ValueError('Expecting a JSON array: char %d' % idx)
+    idx = WHITESPACE.match(text, idx + 1).end()
+
+    elements = []
+    if text[idx:idx + 1] == ']':
+        end = idx + 1
+    else:
+        while True:
+            end = decoder.raw_decode(text, idx)[1]
+            elements.append(text[idx:end])
+            idx = WHITESPACE.match(text, end).end()
+            char = text[idx:idx + 1]
+            if char == ']':
+                end = idx + 1
+                break
+            if char != ',':
+                raise ValueError("Expecting ',' delimiter: char %d" % idx)
+            idx = WHITESPACE.match(text, idx + 1).end()
+
+    if text[end:].strip():
+        raise ValueError('Extra data: char %d' % end)
+    return elements
+
+
+def _chunks(items, size):
+    chunk = []
+    for item in items:
+        chunk.append(item)
+        if len(chunk) >= size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+
+def _tasks(paths, inputFormat, chunkSize, stats, exact = False):
+    """
+    Yields the tasks for :func:`_convert` reading every input, input errors are added to ``stats``.
+
+    :param exact: Whether records hold exact fields (see :class:`.DecimalField`), they are then sent
+        as JSON text and parsed by the model, so their numbers never go through float.
+    """
+    for path in _expand(paths):
+        fmt = inputFormat
+        if fmt == 'auto' and path.endswith(NDJSON_EXTENSIONS):
+            fmt = 'ndjson'
+
+        try:
+            if path == '-':
+                text = sys.stdin.read()
+                stats['bytes'] += len(text.encode('utf-8'))
+            else:
+                stats['bytes'] += os.path.getsize(path)
+                if fmt == 'ndjson':
+                    # Lines are read lazily and parsed by workers
+                    with open(path) as f:
+                        lines = ((n, line) for n, line in enumerate(f, 1) if line.strip())
+                        for chunk in _chunks(lines, chunkSize):
+                            yield path + ':%d', chunk, True
+                    continue
+                with open(path) as f:
+                    text = f.read()
+
+            data = None
+            if fmt == 'auto':
+                stripped = text.lstrip()
+                if stripped.startswith('['):
+                    fmt = 'array'
+                else:
+                    try:
+                        data, fmt = json.loads(text), 'array'
+                        data = [data]
+                    except ValueError:
+                        fmt = 'ndjson'
+
+            if fmt == 'ndjson':
+                lines = ((n, line) for n, line in enumerate(text.splitlines(), 1) if line.strip())
+                for chunk in _chunks(lines, chunkSize):
+                    yield path + ':%d', chunk, True
+                continue
+
+            if exact:
+                records = _split_array(text) if text.lstrip().startswith('[') else [text]
+                for chunk in _chunks(enumerate(records), chunkSize):
+                    yield path + '[%d]', chunk, True
+                continue
+
+            if data is None:
+                data = json.loads(text)
+                if not isinstance(data, list):
+                    data = [data]
+            for chunk in _chunks(enumerate(data), chunkSize):
+                yield path + '[%d]', chunk, False
+        except (IOError, OSError, ValueError) as e:
+            stats['errors'].append('%s: %s' % (path, e))
+
+
+def _peak_memory():
+    """
+    Returns peak resident memory of this process and of its finished children, in bytes, or None if unknown.
+    """
+    try:
+        import resource
+    except ImportError:
+        return None, None
+    scale = 1 if sys.platform == 'darwin' else 1024
+    return (resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * scale,
+            resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss * scale)
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(
+        prog = 'python -m json2py',
+        description = 'Converts or validates JSON files with a json2py model. Input can be JSON arrays, '
+                      'single JSON documents, NDJSON or directories holding them. Elements of lists are '
+                      'built with __model__ when MODEL is a ListField.'
+    )
+    parser.add_argument('model', metavar = 'MODEL', help = 'model class, as module:Class')
+    parser.add_argument('inputs', metavar = 'INPUT', nargs = '+', help = 'input file, directory or - for stdin')
+    parser.add_argument('-o', '--output', default = '-', help = 'output file, stdout by default')
+    parser.add_argument('--input-format', choices = ['auto', 'array', 'ndjson'], default = 'auto')
+    parser.add_argument('--output-format', choices = ['ndjson', 'array'], default = 'ndjson')
+    parser.add_argument('--validate', action = 'store_true', help = 'only check input, write no output')
+    parser.add_argument('--include', action = 'append', metavar = 'PATH', help = 'field path to write')
+    parser.add_argument('--exclude', action = 'append', metavar = 'PATH', help = 'field path to leave out')
+    parser.add_argument('--exclude-none', action = 'store_true', help = 'leave out optional fields holding null')
+    parser.add_argument('--exclude-defaults', action = 'store_true', help = 'leave out optional empty fields')
+    parser.add_argument('-w', '--workers', type = int, default = multiprocessing.cpu_count(),
+                        help = 'worker processes, 1 converts in this process (default: %(default)s)')
+    parser.add_argument('--chunk-size', type = int, default = 1000, help = 'records sent to a worker at once')
+    parser.add_argument('--show-errors', type = int, default = 10, metavar = 'N', help = 'errors to print')
+    parser.add_argument('-q', '--quiet', action = 'store_true', help = 'do not print the report')
+    return parser
+
+
+def main(argv = None):
+    """
+    Runs the command line tool.
+
+    :param argv: Arguments, ``sys.argv[1:]`` when not given.
+    :return: Exit status: 0 on success, 1 if any record or input failed.
+    """
+    parser = build_parser()
+    args = parser.parse_args(argv)
+    try:
+        cls = load_model(args.model)
+    except ValueError as e:
+        parser.error(str(e))
+
+    options = None
+    if not args.validate:
+        options = {
+            'exclude_none': args.exclude_none, 'exclude_defaults': args.exclude_defaults,
+            'include': args.include, 'exclude': args.exclude,
+        }
+
+    stats = {'bytes': 0, 'records': 0, 'errors': []}
+    output = None
+    if not args.validate:
+        output = sys.stdout if args.output == '-' else open(args.output, 'w')
+    first = [True]
+
+    def consume(result):
+        encoded, count, errors = result
+        stats['records'] += count
+        stats['errors'].extend(errors)
+        if output is None or not encoded:
+            return
+        if args.output_format == 'ndjson':
+            output.write('\n'.join(encoded) + '\n')
+        else:
+            output.write(('[' if first[0] else ',') + ','.join(encoded))
+            first[0] = False
+
+    start = time.time()
+    tasks = _tasks(args.inputs, args.input_format, max(args.chunk_size, 1), stats, _holds_exact(_record_class(cls)))
+    try:
+        if args.workers > 1:
+            pool = multiprocessing.Pool(args.workers, _init_worker, (args.model, options))
+            try:
+                # Few chunks in flight, so memory stays bounded whatever the input size
+                pending = deque()
+                for task in tasks:
+                    pending.append(pool.apply_async(_convert, (task, )))
+                    if len(pending) >= 2 * args.workers:
+                        consume(pending.popleft().get())
+                while pending:
+                    consume(pending.popleft().get())
+            finally:
+                pool.close()
+                pool.join()
+        else:
+            _init_worker(args.model, options)
+            for task in tasks:
+                consume(_convert(task))
+
+        if output is not None and args.output_format == 'array':
+            output.write('[]\n' if first[0] else ']\n')
+    finally:
+        if output is not None and output is not sys.stdout:
+            output.close()
+    elapsed = max(time.time() - start, 1e-9)
+
+    errors = stats['errors']
+    for error in errors[:args.show_errors]:
+        print(error, file = sys.stderr)
+    if len(errors) > args.show_errors:
+        print('... %d more errors' % (len(errors) - args.show_errors), file = sys.stderr)
+
+    if not args.quiet:
+        print('records: %d, errors: %d, elapsed: %.2f s' % (stats['records'], len(errors), elapsed), file = sys.stderr)
+        print('throughput: %.0f records/s, %.1f MB/s' % (stats['records'] / elapsed, stats['bytes'] / elapsed / 2 ** 20),
+              file = sys.stderr)
+        main_peak, workers_peak = _peak_memory()
+        if main_peak is not None:
+            line = 'peak memory: %.1f MB' % (main_peak / 2 ** 20)
+            if args.workers > 1:
+                line += ', %.1f MB per worker' % (workers_peak / 2 ** 20)
+            print(line, file = sys.stderr)
+    return 1 if errors else 0
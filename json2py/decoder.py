@@ -1,11 +1,325 @@
+from decimal import Decimal
 from json import JSONDecoder
+from json.decoder import WHITESPACE, scanstring
+
+from .models import NestedField, ListField, RefField, ParseException, _populate, _holds_exact, _RecursionError
+
+try:
+    from json import JSONDecodeError
+except ImportError:
+    JSONDecodeError = None
 
 __author__ = 'Victor'
 
+_WHITESPACE_CHARS = ' \t\n\r'
+# Nesting handled by recursive parsing calls, deeper containers are parsed and built without recursion
+_RECURSION_DEPTH = 64
+
+
+def _error(msg, s, pos):
+    if JSONDecodeError is not None:
+        return JSONDecodeError(msg, s, pos)
+    return ValueError('%s: char %d' % (msg, pos))
+
+
+class ModelDecoder(JSONDecoder):
+    """
+    JSONDecoder building objects of ``model`` while parsing, instead of parsing a whole tree of dicts
+    and lists and building the objects from it afterwards.
+
+    .. code-block:: python
+
+        repos = json.loads(text, cls = ModelDecoder, model = RepoList)
+
+        decoder = ModelDecoder(model = Repo)
+        repo, end = decoder.raw_decode(text, end)
+
+    The model schema drives parsing: lists of documents are parsed element by element and documents
+    holding such lists, or exact numeric fields, key by key, so keys not declared on the model are skipped
+    and every element is built as soon as it is parsed. Any other value, e.g. each element of a list, is
+    parsed at once by the :mod:`json` scanner and built from it, so the whole input never lives as dicts
+    and lists at once. Values nested deeper than the scanner can recurse, and any value below the first
+    64 levels, are parsed without recursion instead, so text is read up to ``__max_depth__`` of the model
+    whatever the interpreter recursion limit. Built objects are equal to the ones built by the model constructor from
+    :py:func:`json.loads` output, except for :class:`.DecimalField` and :class:`.BigIntField` values,
+    which are parsed as :class:`decimal.Decimal` so they keep every digit. Other numbers are still floats.
+
+    :arg model: :class:`.BaseField` subclass of the decoded objects, when None this is a plain JSONDecoder.
+    :arg args: Parameters of :class:`json.JSONDecoder`
+    :arg kwargs: Parameters of :class:`json.JSONDecoder`. ``object_hook`` and ``object_pairs_hook`` apply
+        to every JSON object parsed at once by the :mod:`json` scanner, e.g. values of keys skipped, elements
+        of lists and any document not parsed key by key, and objects are built from what they return.
+    :raise ValueError: When decoding, if input is not valid JSON.
+    :raise ParseException: When decoding, if data does not match the model or it is deeper than
+        ``__max_depth__`` of the model.
+    :raise LookupError: When decoding, if a required field is missing.
+
+    :note: :meth:`raw_decode` returns the position where the document ends, so it can decode several
+        documents from a single string, e.g. concatenated or NDJSON documents.
+    """
+    def __init__(self, model = None, *args, **kwargs):
+        super(ModelDecoder, self).__init__(*args, **kwargs)
+        self.model = model
+        self._root = None if model is None else model(None)
+        self._keyed = {}
+        # Scanner for values of exact fields, the json scanner takes parse_float once for every number
+        kwargs['parse_float'] = Decimal
+        self._exact_scan = JSONDecoder(*args, **kwargs).scan_once
+
+    def raw_decode(self, s, idx = 0):
+        """
+        Decodes a JSON document starting at ``s[idx]``, trailing data is allowed.
+
+        :return: ``(object, index)`` tuple, where ``index`` is the position of ``s`` where the document ended.
+        """
+        if self._root is None:
+            return super(ModelDecoder, self).raw_decode(s, idx)
+        return self._value(self._root, s, idx, 1)
+
+    def _scan(self, s, idx, scan):
+        try:
+            return scan(s, idx)
+        except StopIteration as e:
+            raise _error('Expecting value', s, e.args[0] if e.args else idx)
+
+    def _value(self, proto, s, idx, depth):
+        """
+        Parses the value at ``s[idx]`` into a field like ``proto``.
+
+        :return: ``(field, index after the value)`` tuple.
+        """
+        if proto._container:
+            if isinstance(proto, RefField):
+                proto = proto._target()
+            if depth <= _RECURSION_DEPTH:
+                char = s[idx:idx + 1]
+                if char == '{' and isinstance(proto, NestedField) and self._is_keyed(type(proto)):
+                    return self._document(proto, s, idx + 1, depth)
+                if char == '[' and self._is_list(proto):
+                    return self._list(proto, s, idx + 1, depth)
+
+            # Other values are cheaper to scan at once by the json scanner and build from data
+            scan = self.scan_once
+            if isinstance(proto, ListField) and type(proto)._element()._exact:
+                scan = self._exact_scan
+            if depth > _RECURSION_DEPTH:
+                value, end = self._parse(s, idx, scan, depth)
+            else:
+                try:
+                    value, end = self._scan(s, idx, scan)
+                except _RecursionError:
+                    # Nested deeper than the json scanner can recurse
+                    value, end = self._parse(s, idx, scan, depth)
+            shell = proto._shell(value)
+            if shell is not None:
+                _populate(shell, value, depth, self._root)
+                return shell, end
+            return proto._spawn(value), end
+
+        value, end = self._scan(s, idx, self._exact_scan if proto._exact else self.scan_once)
+        return proto._spawn(value), end
+
+    def _parse(self, s, idx, scan, depth):
+        """
+        Parses the value at ``s[idx]``, being at ``depth``, into dicts and lists as the json scanner does,
+        but using an explicit stack of open containers instead of recursion. Other values are scanned
+        by ``scan``.
+
+        :return: ``(value, index after the value)`` tuple.
+        :raise ParseException: If the value is deeper than ``__max_depth__`` of the model.
+        """
+        strict = self.strict
+        # Open containers as [items, key of the member being parsed or None for arrays]
+        stack = []
+        while True:
+            char = s[idx:idx + 1]
+            if char != '{' and char != '[':
+                value, idx = self._scan(s, idx, scan)
+            else:
+                self._check_depth(depth + len(stack))
+                idx += 1
+                if s[idx:idx + 1] in _WHITESPACE_CHARS:
+                    idx = WHITESPACE.match(s, idx).end()
+                if s[idx:idx + 1] != ('}' if char == '{' else ']'):
+                    if char == '{':
+                        key, idx = self._key(s, idx, strict)
+                        stack.append([[], key])
+                    else:
+                        stack.append([[], None])
+                    continue
+                idx += 1
+                value = self._object([]) if char == '{' else []
+
+            # Place the value on its container, closing the containers it ends
+            while stack:
+                top = stack[-1]
+                items, key = top
+                items.append(value if key is None else (key, value))
+                if s[idx:idx + 1] in _WHITESPACE_CHARS:
+                    idx = WHITESPACE.match(s, idx).end()
+                char = s[idx:idx + 1]
+                idx += 1
+                if char == ',':
+                    if s[idx:idx + 1] in _WHITESPACE_CHARS:
+                        idx = WHITESPACE.match(s, idx).end()
+                    if key is not None:
+                        top[1], idx = self._key(s, idx, strict)
+                    break
+                if char != (']' if key is None else '}'):
+                    raise _error("Expecting ',' delimiter", s, idx - 1)
+                stack.pop()
+                value = items if key is None else self._object(items)
+            else:
+                return value, idx
+
+    def _key(self, s, idx, strict):
+        """
+        Parses an object key and its ``:`` delimiter.
+
+        :return: ``(key, index of the value)`` tuple.
+        """
+        if s[idx:idx + 1] != '"':
+            raise _error('Expecting property name enclosed in double quotes', s, idx)
+        key, idx = scanstring(s, idx + 1, strict)
+        if s[idx:idx + 1] != ':':
+            idx = WHITESPACE.match(s, idx).end()
+            if s[idx:idx + 1] != ':':
+                raise _error("Expecting ':' delimiter", s, idx)
+        idx += 1
+        if s[idx:idx + 1] in _WHITESPACE_CHARS:
+            idx = WHITESPACE.match(s, idx).end()
+        return key, idx
+
+    def _object(self, pairs):
+        """
+        Builds a parsed JSON object from its ``(key, value)`` pairs, through the hooks as the json scanner does.
+        """
+        if self.object_pairs_hook is not None:
+            return self.object_pairs_hook(pairs)
+        obj = dict(pairs)
+        if self.object_hook is not None:
+            return self.object_hook(obj)
+        return obj
+
+    def _is_list(self, proto):
+        """
+        Whether ``proto`` is a list of documents, parsed element by element.
+        """
+        return isinstance(proto, ListField) and not proto.__workers__ and type(proto)._element()._container
+
+    def _is_keyed(self, cls):
+        """
+        Whether documents of ``cls`` are parsed key by key: when they have fields holding lists of documents
+        or they hold exact fields at any depth.
+        """
+        keyed = self._keyed.get(cls)
+        if keyed is None:
+            keyed = _holds_exact(cls)
+            for fieldName, key, field in cls._schema().fields:
+                if isinstance(field, RefField):
+                    field = field._target()
+                if self._is_list(field):
+                    keyed = True
+            self._keyed[cls] = keyed
+        return keyed
+
+    def _check_depth(self, depth):
+        maxDepth = self._root.__max_depth__
+        if maxDepth is not None and depth > maxDepth:
+            raise ParseException('%s data exceeds the maximum depth of %d' % (type(self._root).__name__, maxDepth))
+
+    def _document(self, proto, s, idx, depth):
+        """
+        Parses the members of a JSON object, ``s[idx - 1]`` being its ``{``, into a document like ``proto``.
+        """
+        self._check_depth(depth)
+        cls = type(proto)
+        schema = cls._schema()
+        byKey = schema.by_key
+        scan = self.scan_once
+        exact = self._exact_scan
+        strict = self.strict
+        found = {}
+
+        if s[idx:idx + 1] in _WHITESPACE_CHARS:
+            idx = WHITESPACE.match(s, idx).end()
+        if s[idx:idx + 1] == '}':
+            idx += 1
+        else:
+            while True:
+                key, idx = self._key(s, idx, strict)
+                entry = byKey.get(key)
+                try:
+                    if entry is None:
+                        # Not declared on the model, parsed only to find where it ends
+                        idx = scan(s, idx)[1]
+                    elif entry[1]._container:
+                        found[entry[0]], idx = self._value(entry[1], s, idx, depth + 1)
+                    else:
+                        value, idx = (exact if entry[1]._exact else scan)(s, idx)
+                        found[entry[0]] = entry[1]._spawn(value)
+                except StopIteration as e:
+                    raise _error('Expecting value', s, e.args[0] if e.args else idx)
+
+                if s[idx:idx + 1] in _WHITESPACE_CHARS:
+                    idx = WHITESPACE.match(s, idx).end()
+                char = s[idx:idx + 1]
+                idx += 1
+                if char == '}':
+                    break
+                if char != ',':
+                    raise _error("Expecting ',' delimiter", s, idx - 1)
+                if s[idx:idx + 1] in _WHITESPACE_CHARS:
+                    idx = WHITESPACE.match(s, idx).end()
+
+        # Fields are laid out in schema order, as the constructor does
+        obj = cls._blank(proto.name, proto.required)
+        fields = obj.__dict__
+        for fieldName, key, field in schema.fields:
+            if fieldName in found:
+                fields[fieldName] = found[fieldName]
+            elif field.required:
+                raise LookupError('%s was not found on data dict' % key)
+            else:
+                fields[fieldName] = field._spawn(None)
+        return obj, idx
+
+    def _list(self, proto, s, idx, depth):
+        """
+        Parses the elements of a JSON array, ``s[idx - 1]`` being its ``[``, into a list like ``proto``.
+        """
+        self._check_depth(depth)
+        obj = proto._shell([])
+        elements = obj.value
+        element = type(proto)._element()
+
+        if s[idx:idx + 1] in _WHITESPACE_CHARS:
+            idx = WHITESPACE.match(s, idx).end()
+        if s[idx:idx + 1] == ']':
+            return obj, idx + 1
+        while True:
+            value, idx = self._value(element, s, idx, depth + 1)
+            elements.append(value)
+
+            if s[idx:idx + 1] in _WHITESPACE_CHARS:
+                idx = WHITESPACE.match(s, idx).end()
+            char = s[idx:idx + 1]
+            idx += 1
+            if char == ']':
+                return obj, idx
+            if char != ',':
+                raise _error("Expecting ',' delimiter", s, idx - 1)
+            if s[idx:idx + 1] in _WHITESPACE_CHARS:
+                idx = WHITESPACE.match(s, idx).end()
+
 
 class BaseDecoder(JSONDecoder):
+    """
+    JSONDecoder passing every decoded JSON object to :meth:`dictToObj`, which must be reimplemented.
+    See :class:`.ModelDecoder` to build objects of a model while parsing.
+    """
     def __init__(self, *args, **kwargs):
         super(BaseDecoder, self).__init__(object_hook = self.dictToObj, *args, **kwargs)
 
     def dictToObj(self, d):
-        raise NotImplementedError("This method must be reimplemented")
\ No newline at end of file
+        raise NotImplementedError("This method must be reimplemented")
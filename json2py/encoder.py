@@ -1,18 +1,308 @@
+from decimal import Decimal
 from json import JSONEncoder
-from .models import NestedField, ListField, DateField, BaseField
+from json.encoder import _make_iterencode, encode_basestring, encode_basestring_ascii
+from .models import NestedField, ListField, DateField, DecimalField, BaseField, string_types, integer_types, _model_classes
 
 __author__ = 'Victor'
 
+# Encode plans by (class, options, include, exclude), built once and shared by every encoder
+_plans = {}
+
+# Marks the end of the items of a container, see BaseEncoder._write
+_END = object()
+
+
+def _paths(paths):
+    """
+    Turns an iterable of dotted field paths into a frozenset of tuples of attribute names.
+    """
+    if paths is None:
+        return None
+    if isinstance(paths, string_types):
+        paths = (paths, )
+    return frozenset(tuple(path.split('.')) for path in paths)
+
+
+def _is_null(field):
+    """
+    Whether ``field`` encodes as null or is an empty document, as built from null.
+    """
+    if isinstance(field, NestedField):
+        return not field.__dict__
+    return not isinstance(field, ListField) and field.value is None
+
+
+def _build_plan(cls, options, include, exclude):
+    """
+    Resolves encoding options over the fields declared on a :class:`.NestedField` subclass.
+
+    :return: tuple of ``(attribute name, key, omit null, omit empty list, include, exclude)`` tuples, one for
+        each emitted field, where ``include`` and ``exclude`` are the paths applying to the field contents.
+    """
+    excludeNone, excludeDefaults = options
+    plan = []
+    for fieldName, key, field in cls._schema().fields:
+        if exclude is not None and (fieldName, ) in exclude:
+            continue
+
+        childInclude = None
+        if include is not None and (fieldName, ) not in include:
+            childInclude = frozenset(path[1:] for path in include if path[0] == fieldName)
+            if not childInclude:
+                continue
+
+        childExclude = None
+        if exclude is not None:
+            childExclude = frozenset(path[1:] for path in exclude if path[0] == fieldName) or None
+
+        # Required fields are always emitted, so encoded documents can be decoded back.
+        # Missing optional fields are built holding null, empty documents or empty lists
+        optional = not field.required
+        plan.append((fieldName, key, optional and (excludeNone or excludeDefaults), optional and excludeDefaults,
+                     childInclude, childExclude))
+    return tuple(plan)
+
+
+def _plan(cls, options, include, exclude):
+    key = (cls, options, include, exclude)
+    plan = _plans.get(key)
+    if plan is None:
+        plan = _plans[key] = _build_plan(cls, options, include, exclude)
+    return plan
+
+
+class _Number(float):
+    """
+    float standing for a finite :class:`decimal.Decimal` value while it is written, see
+    :meth:`BaseEncoder.default`, which writes the exact digits of the decimal.
+    """
+    __slots__ = ('text', )
+
+    def __new__(cls, value):
+        obj = super(_Number, cls).__new__(cls, value)
+        obj.text = str(value)
+        return obj
+
+
+# Deepest tree handed to the recursive writers of json, beyond it trees are written by BaseEncoder._write
+_NESTING_LIMIT = 200
+
+
+def _holds_decimals(obj):
+    """
+    Whether :class:`decimal.Decimal` values can appear when writing ``obj``. Objects other than fields,
+    e.g. dicts holding models, can hold anything.
+    """
+    if not isinstance(obj, BaseField):
+        return True
+    return any(issubclass(cls, DecimalField) for cls in _model_classes(type(obj)))
+
 
 class BaseEncoder(JSONEncoder):
+    """
+    JSONEncoder serializing :class:`.BaseField` objects, used by :meth:`.BaseField.json_encode`.
+
+    :arg exclude_none: Whether omit optional fields holding None, including empty documents.
+    :arg exclude_defaults: Whether omit optional fields holding the value they get when missing
+        from source data: None, empty documents and empty lists.
+    :arg include: Field paths to emit, the rest are omitted. Paths are dotted attribute names, e.g.
+        ``'owner.login'``, fields of list elements are reached through the name of the list.
+    :arg exclude: Field paths to omit.
+    :arg kwargs: Parameters of :class:`json.JSONEncoder`, separators are compact unless ``indent``
+        or ``separators`` are given.
+
+    :note: Options are resolved once per model into an encode plan, which is shared between encoders.
+    :note: Documents and lists are traversed without recursion, up to ``__max_depth__`` of the encoded
+        object class, beyond it ValueError is raised. Deep objects are also written without recursion.
+    :note: :meth:`default` keeps :class:`.DecimalField` values as :class:`decimal.Decimal`, so converted
+        data compares and copies exactly. Objects whose model holds :class:`.DecimalField` and objects
+        other than fields (e.g. dicts holding models) are written by the pure Python encoder of :mod:`json`,
+        which can write the exact digits of decimals. Any other object is written by the C encoder.
+    """
+    def __init__(self, exclude_none = False, exclude_defaults = False, include = None, exclude = None, **kwargs):
+        if kwargs.get('indent') is None and kwargs.get('separators') is None:
+            kwargs['separators'] = (',', ':')
+        super(BaseEncoder, self).__init__(**kwargs)
+
+        self.options = (bool(exclude_none), bool(exclude_defaults))
+        self.include = _paths(include)
+        self.exclude = _paths(exclude) or None
+        self.planned = bool(exclude_none or exclude_defaults or self.include is not None or self.exclude)
+
+    def iterencode(self, o, _one_shot = False):
+        exact = _holds_decimals(o)
+        if isinstance(o, (NestedField, ListField)):
+            o, depth = self._build(o)
+            if depth > _NESTING_LIMIT:
+                # json writers recurse once per container and would hit the interpreter recursion limit
+                return self._write(o)
+
+        if not exact:
+            return super(BaseEncoder, self).iterencode(o, _one_shot)
+
+        floatstr = self._floatstr
+        _encoder = encode_basestring_ascii if self.ensure_ascii else encode_basestring
+        return _make_iterencode(
+            {} if self.check_circular else None, self.default, _encoder, self.indent, floatstr,
+            self.key_separator, self.item_separator, self.sort_keys, self.skipkeys, _one_shot
+        )(o, 0)
+
+    def _floatstr(self, o):
+        if isinstance(o, _Number):
+            return o.text
+        if o != o:
+            text = 'NaN'
+        elif o == float('inf'):
+            text = 'Infinity'
+        elif o == float('-inf'):
+            text = '-Infinity'
+        else:
+            return float.__repr__(o)
+        if not self.allow_nan:
+            raise ValueError('Out of range float values are not JSON compliant: ' + repr(o))
+        return text
+
     def default(self, obj):
-        if isinstance(obj, NestedField):
-            return dict([(k if v.name is None else v.name, self.default(v)) for k, v in obj.items()])
-        elif isinstance(obj, ListField):
-            return [self.default(v) for v in obj.value]
+        if isinstance(obj, (NestedField, ListField)):
+            return self._encode(obj)
         elif isinstance(obj, DateField):
-            return obj.json_encode()
+            return obj._encoded_value()
         elif isinstance(obj, BaseField):
             return obj.value
+        elif isinstance(obj, Decimal):
+            # Only reached while writing, the pure Python writers take it as a float with exact digits
+            return _Number(obj) if obj.is_finite() else float(obj)
         else:
-            return JSONEncoder.default(self, obj) # super(MyEncoder, self).default(obj)
\ No newline at end of file
+            return JSONEncoder.default(self, obj) # super(MyEncoder, self).default(obj)
+
+    def _encode(self, root):
+        return self._build(root)[0]
+
+    def _build(self, root):
+        """
+        Converts a document or list into dicts and lists, using an explicit stack of pending containers.
+        Each container is placed on its parent when found and filled when popped from the stack.
+
+        :return: tuple of ``(converted object, depth of the deepest container)``.
+        :raise ValueError: If ``root`` is deeper than ``__max_depth__`` of its class or, when there is
+            no limit, it holds itself.
+        """
+        planned, options, leaf = self.planned, self.options, self.default
+        maxDepth = root.__max_depth__
+        # Without limit, containers on the current path are tracked to stop on cycles
+        active = set() if maxDepth is None else None
+        deepest = 1
+        result = {} if isinstance(root, NestedField) else []
+        stack = [(root, result, self.include, self.exclude, 1)]
+
+        def visit(field, include, exclude):
+            if isinstance(field, NestedField):
+                container = {}
+            elif isinstance(field, ListField):
+                container = []
+            else:
+                return leaf(field)
+            stack.append((field, container, include, exclude, depth + 1))
+            return container
+
+        while stack:
+            obj, out, include, exclude, depth = stack.pop()
+            if obj is None:
+                active.discard(out)
+                continue
+            if maxDepth is not None and depth > maxDepth:
+                raise ValueError('%s exceeds the maximum depth of %d' % (type(root).__name__, maxDepth))
+            if active is not None:
+                if id(obj) in active:
+                    raise ValueError('Circular reference detected')
+                active.add(id(obj))
+                stack.append((None, id(obj), None, None, depth))
+            if depth > deepest:
+                deepest = depth
+
+            if isinstance(obj, ListField):
+                for field in obj.value:
+                    out.append(visit(field, include, exclude))
+            elif not planned:
+                for k, field in obj.items():
+                    out[k if field.name is None else field.name] = visit(field, None, None)
+            else:
+                fields = obj.__dict__
+                for fieldName, key, omitNull, omitEmpty, childInclude, childExclude in _plan(type(obj), options, include, exclude):
+                    field = fields.get(fieldName)
+                    if field is None:
+                        continue
+                    if omitNull and _is_null(field):
+                        continue
+                    if omitEmpty and isinstance(field, ListField) and not field.value:
+                        continue
+                    out[key] = visit(field, childInclude, childExclude)
+        return result, deepest
+
+    def _write(self, o):
+        """
+        Writes ``o``, made of dicts, lists and JSON values, as the writers of :mod:`json` do but using
+        an explicit stack of open containers, so any depth can be written.
+
+        :return: list of chunks of JSON text.
+        """
+        encodeString = encode_basestring_ascii if self.ensure_ascii else encode_basestring
+        indent = self.indent
+        if indent is not None and not isinstance(indent, string_types):
+            indent = ' ' * indent
+        itemSeparator, keySeparator = self.item_separator, self.key_separator
+
+        chunks = []
+        # Open containers as [iterator of items, whether they are dict items, separator, closing text, count]
+        stack = []
+        while True:
+            if isinstance(o, (dict, list)):
+                if not o:
+                    chunks.append('{}' if isinstance(o, dict) else '[]')
+                else:
+                    if indent is None:
+                        newline = closing = ''
+                    else:
+                        newline = '\n' + indent * (len(stack) + 1)
+                        closing = '\n' + indent * len(stack)
+                    if isinstance(o, dict):
+                        items = sorted(o.items()) if self.sort_keys else o.items()
+                        chunks.append('{' + newline)
+                        stack.append([iter(items), True, itemSeparator + newline, closing + '}', 0])
+                    else:
+                        chunks.append('[' + newline)
+                        stack.append([iter(o), False, itemSeparator + newline, closing + ']', 0])
+            elif isinstance(o, string_types):
+                chunks.append(encodeString(o))
+            elif o is None:
+                chunks.append('null')
+            elif o is True:
+                chunks.append('true')
+            elif o is False:
+                chunks.append('false')
+            elif isinstance(o, float):
+                chunks.append(self._floatstr(o))
+            elif isinstance(o, integer_types):
+                chunks.append('%d' % o)
+            else:
+                o = self.default(o)
+                continue
+
+            # Move to the next value, closing the containers left without items
+            while stack:
+                top = stack[-1]
+                o = next(top[0], _END)
+                if o is _END:
+                    chunks.append(top[3])
+                    stack.pop()
+                    continue
+                if top[4]:
+                    chunks.append(top[2])
+                top[4] += 1
+                if top[1]:
+                    chunks.append(encodeString(o[0]) + keySeparator)
+                    o = o[1]
+                break
+            else:
+                return chunks
+
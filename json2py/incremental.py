@@ -0,0 +1,183 @@
+import json
+import re
+
+from .models import ListField, ParseException, _holds_exact
+
+__author__ = 'Victor'
+
+_WHITESPACE = re.compile(br'[ \t\n\r]*')
+_STRUCTURE = re.compile(br'["{}\[\]]')
+_STRING = re.compile(br'["\\]')
+_SCALAR_END = re.compile(br'[ \t\n\r,\]}]')
+
+
+class IncrementalDecoder(object):
+    """
+    Push parser building objects from JSON received in arbitrary chunks, see :meth:`.BaseField.incremental`.
+
+    For :class:`.ListField` subclasses the input must be a single JSON list and each element is built
+    with :attr:`__model__` as soon as it is complete. For any other class the input is a stream of
+    JSON documents (concatenated or separated by whitespace, like NDJSON) and each one is built with the class.
+
+    Parsing state is kept between :meth:`feed` calls, so each byte is scanned once and only the
+    incomplete trailing value is kept in memory.
+
+    :arg cls: Class of the objects to build.
+    """
+    def __init__(self, cls):
+        self.cls = cls
+        self.is_list = issubclass(cls, ListField)
+        self.build = cls._element_class() if self.is_list else cls
+        # Models holding exact fields are built while parsing, so their numbers never go through float
+        self._decoder = None
+        if _holds_exact(self.build):
+            from .decoder import ModelDecoder
+            self._decoder = ModelDecoder(model = self.build)
+
+        self.consumed = 0
+        self.done = False
+        self._buffer = bytearray()
+        self._state = 'start' if self.is_list else 'value'
+        # Scanning state of the value being read
+        self._scanning = False
+        self._pos = 0
+        self._depth = 0
+        self._in_string = False
+
+    @property
+    def pending(self):
+        """
+        Bytes received but not consumed yet: an incomplete value or, once the list is done, trailing data.
+        """
+        return bytes(self._buffer)
+
+    def feed(self, chunk):
+        """
+        Parses a new chunk of input.
+
+        :param chunk: bytes or text (which is encoded as UTF-8) continuing previous chunks.
+        :return: list of objects completed by this chunk.
+        :raise ParseException: If input is not valid JSON or an object cannot be built.
+        """
+        if not isinstance(chunk, (bytes, bytearray)):
+            chunk = chunk.encode('utf-8')
+        self._buffer.extend(chunk)
+        return self._parse(False)
+
+    def close(self):
+        """
+        Signals the end of input.
+
+        :return: list of objects completed by the end of input, e.g. a trailing number.
+        :raise ParseException: If input ends inside a value or, for lists, before the list is closed.
+        """
+        result = self._parse(True)
+        if self._buffer.strip() and not self.done:
+            raise ParseException('Unexpected end of input')
+        if self.is_list and not self.done:
+            raise ParseException('Unexpected end of input, list is not closed')
+        return result
+
+    def _consume(self, size):
+        del self._buffer[:size]
+        self.consumed += size
+
+    def _parse(self, final):
+        result = []
+        buf = self._buffer
+        while not self.done:
+            if self._scanning:
+                end = self._scan(final)
+                if end is None:
+                    break
+                text = bytes(buf[:end]).decode('utf-8')
+                try:
+                    data = json.loads(text) if self._decoder is None else self._decoder.decode(text)
+                except ValueError as e:
+                    raise ParseException('Invalid JSON value: %s' % e)
+                result.append(self.build(data) if self._decoder is None else data)
+                self._consume(end)
+                self._scanning = False
+                if self.is_list:
+                    self._state = 'after'
+                continue
+
+            self._consume(_WHITESPACE.match(buf).end())
+            if not buf:
+                break
+
+            char = buf[0:1]
+            if self._state == 'start':
+                if char != b'[':
+                    raise ParseException("Expected '[' but found %r" % char)
+                self._consume(1)
+                self._state = 'first'
+            elif self._state == 'after':
+                if char == b',':
+                    self._consume(1)
+                    self._state = 'value'
+                elif char == b']':
+                    self._consume(1)
+                    self.done = True
+                else:
+                    raise ParseException("Expected ',' or ']' but found %r" % char)
+            elif self._state == 'first' and char == b']':
+                self._consume(1)
+                self.done = True
+            elif char in (b',', b']', b'}', b':'):
+                raise ParseException('Unexpected %r' % char)
+            else:
+                self._scanning = True
+                self._pos = 0
+                self._depth = 0
+                self._in_string = False
+        return result
+
+    def _scan(self, final):
+        """
+        Looks for the end of the value at the start of the buffer, resuming from last call.
+
+        :return: Index just after the value or None if more input is needed.
+        """
+        buf = self._buffer
+        if self._pos == 0 and not self._in_string and buf[0:1] not in (b'{', b'[', b'"'):
+            match = _SCALAR_END.search(buf)
+            if match is not None:
+                return match.start()
+            return len(buf) if final else None
+
+        pos = self._pos
+        while True:
+            if self._in_string:
+                match = _STRING.search(buf, pos)
+                if match is None:
+                    pos = len(buf)
+                    break
+                if match.group() == b'\\':
+                    if match.end() >= len(buf):
+                        pos = match.start()
+                        break
+                    pos = match.end() + 1
+                    continue
+                pos = match.end()
+                self._in_string = False
+                if self._depth == 0:
+                    return pos
+                continue
+
+            match = _STRUCTURE.search(buf, pos)
+            if match is None:
+                pos = len(buf)
+                break
+            pos = match.end()
+            char = match.group()
+            if char == b'"':
+                self._in_string = True
+            elif char in (b'{', b'['):
+                self._depth += 1
+            else:
+                self._depth -= 1
+                if self._depth == 0:
+                    return pos
+        self._pos = pos
+        return None
@@ -0,0 +1,197 @@
+from bisect import bisect_left, bisect_right
+from .models import _path_getter
+
+__author__ = 'Victor'
+
+
+class HashIndex(object):
+    """
+    Index of :class:`.ListField` elements by the value of the field at ``path``, answering
+    equality (``eq``) and membership (``in``) lookups in constant time.
+
+    :arg path: Dotted field path, made of attribute names, e.g. ``'owner.login'``.
+    :note: Indexed values must be hashable.
+    """
+    def __init__(self, path):
+        self.path = path
+        self.getter = _path_getter(path)
+        self.buckets = {}
+
+    def add(self, elements):
+        getter, buckets = self.getter, self.buckets
+        for element in elements:
+            key = getter(element)
+            bucket = buckets.get(key)
+            if bucket is None:
+                buckets[key] = [element]
+            else:
+                bucket.append(element)
+
+    def remove(self, elements):
+        getter, buckets = self.getter, self.buckets
+        for element in elements:
+            key = getter(element)
+            bucket = buckets.get(key, ())
+            for i, indexed in enumerate(bucket):
+                if indexed is element:
+                    del bucket[i]
+                    break
+            if not bucket:
+                buckets.pop(key, None)
+
+    def lookup(self, op, operand):
+        """
+        :return: list of elements matching the condition or None if the operation is not supported.
+        """
+        if op == 'eq':
+            return self.buckets.get(operand, [])
+        elif op == 'in':
+            result = []
+            for key in operand:
+                result.extend(self.buckets.get(key, ()))
+            return result
+        return None
+
+
+class SortedIndex(object):
+    """
+    Index of :class:`.ListField` elements sorted by the value of the field at ``path``, answering
+    equality and range (``gt``, ``gte``, ``lt``, ``lte``) lookups in logarithmic time.
+
+    :arg path: Dotted field path, made of attribute names, e.g. ``'size'``.
+    :note: Indexed values must be comparable between them, empty values are not indexed.
+    """
+    def __init__(self, path):
+        self.path = path
+        self.getter = _path_getter(path)
+        self.keys = []
+        self.elements = []
+
+    def add(self, elements):
+        getter = self.getter
+        pairs = [(getter(e), e) for e in elements]
+        pairs = [p for p in pairs if p[0] is not None]
+        if len(pairs) > 8 or not self.keys:
+            # Bulk insertion: sort everything at once instead of shifting the lists per element
+            pairs = list(zip(self.keys, self.elements)) + pairs
+            pairs.sort(key = lambda p: p[0])
+            self.keys = [k for k, e in pairs]
+            self.elements = [e for k, e in pairs]
+            return
+
+        for key, element in pairs:
+            i = bisect_right(self.keys, key)
+            self.keys.insert(i, key)
+            self.elements.insert(i, element)
+
+    def remove(self, elements):
+        getter, keys, indexed = self.getter, self.keys, self.elements
+        for element in elements:
+            key = getter(element)
+            if key is None:
+                continue
+            for i in range(bisect_left(keys, key), bisect_right(keys, key)):
+                if indexed[i] is element:
+                    del keys[i]
+                    del indexed[i]
+                    break
+
+    def lookup(self, op, operand):
+        """
+        :return: list of elements matching the condition or None if the operation is not supported.
+        """
+        if operand is None or op not in ('eq', 'gt', 'gte', 'lt', 'lte'):
+            return None
+
+        keys = self.keys
+        lo, hi = 0, len(keys)
+        if op == 'eq':
+            lo, hi = bisect_left(keys, operand), bisect_right(keys, operand)
+        elif op == 'gt':
+            lo = bisect_right(keys, operand)
+        elif op == 'gte':
+            lo = bisect_left(keys, operand)
+        elif op == 'lt':
+            hi = bisect_left(keys, operand)
+        else:
+            hi = bisect_right(keys, operand)
+        return self.elements[lo:hi]
+
+
+INDEX_TYPES = {
+    'hash': HashIndex,
+    'sorted': SortedIndex,
+}
+
+OPERATIONS = {
+    'eq': lambda value, operand: value == operand,
+    'gt': lambda value, operand: value is not None and value > operand,
+    'gte': lambda value, operand: value is not None and value >= operand,
+    'lt': lambda value, operand: value is not None and value < operand,
+    'lte': lambda value, operand: value is not None and value <= operand,
+    'in': lambda value, operand: value in operand,
+}
+
+
+def build_indexes(declaration, elements):
+    """
+    Builds the indexes declared on :attr:`.ListField.__indexes__` over ``elements``.
+
+    :param declaration: dict mapping field paths to index types, ``'hash'``, ``'sorted'`` or a class.
+    :param elements: Elements to index.
+    :return: dict mapping field paths to index objects.
+    """
+    indexes = {}
+    for path, kind in declaration.items():
+        index = INDEX_TYPES[kind](path) if kind in INDEX_TYPES else kind(path)
+        index.add(elements)
+        indexes[path] = index
+    return indexes
+
+
+def parse_criteria(criteria):
+    """
+    Translates ``find``/``filter`` keyword arguments into ``(path, operation, operand)`` tuples.
+    ``owner__login = 'x'`` means equality on path ``owner.login`` and ``size__gt = 10`` means
+    ``size`` greater than 10.
+    """
+    conditions = []
+    for key, operand in criteria.items():
+        parts = key.split('__')
+        op = 'eq'
+        if len(parts) > 1 and parts[-1] in OPERATIONS:
+            op = parts.pop()
+        conditions.append(('.'.join(parts), op, operand))
+    return conditions
+
+
+def query(elements, indexes, criteria, first = False):
+    """
+    Returns the elements matching every criteria, using the most selective available index
+    to get candidates and checking the remaining conditions on them.
+
+    :param first: Whether stop on the first match.
+    """
+    conditions = parse_criteria(criteria)
+
+    candidates, used = None, None
+    for i, (path, op, operand) in enumerate(conditions):
+        index = indexes.get(path)
+        if index is None:
+            continue
+        result = index.lookup(op, operand)
+        if result is not None and (candidates is None or len(result) < len(candidates)):
+            candidates, used = result, i
+
+    if candidates is None:
+        candidates = elements
+
+    checks = [(_path_getter(path), OPERATIONS[op], operand)
+              for i, (path, op, operand) in enumerate(conditions) if i != used]
+    matches = []
+    for element in candidates:
+        if all(check(getter(element), operand) for getter, check, operand in checks):
+            if first:
+                return [element]
+            matches.append(element)
+    return matches
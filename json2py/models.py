@@ -1,12 +1,57 @@
-from past.builtins import basestring
-from builtins import int
+import functools
+import importlib
 import json
-from dateutil.parser import parse
-from datetime import datetime
-import calendar
+import sys
+import threading
+from datetime import datetime, timedelta, tzinfo
+from decimal import Decimal
 
 __author__ = 'Victor'
 
+if sys.version_info[0] < 3:
+    string_types = (basestring, )
+    integer_types = (int, long)
+else:
+    string_types = (str, )
+    integer_types = (int, )
+number_types = (float, ) + integer_types
+
+try:
+    _RecursionError = RecursionError
+except NameError:
+    # Python 2 raises RuntimeError when the recursion limit is reached
+    _RecursionError = RuntimeError
+
+try:
+    from datetime import timezone
+    _UTC = timezone.utc
+except ImportError:
+    class _UTCZone(tzinfo):
+        def utcoffset(self, dt):
+            return timedelta(0)
+
+        def tzname(self, dt):
+            return 'UTC'
+
+        def dst(self, dt):
+            return timedelta(0)
+    _UTC = _UTCZone()
+
+_EPOCH = datetime(1970, 1, 1)
+_EPOCH_UTC = _EPOCH.replace(tzinfo = _UTC)
+# Microseconds in the unit of each timestamp formatting of DateField
+_TIMESTAMP_UNITS = {'timestamp': 10 ** 6, 'timestamp_ms': 10 ** 3, 'timestamp_us': 1}
+_TIMESTAMP_DELTAS = {'timestamp': timedelta(seconds = 1), 'timestamp_ms': timedelta(milliseconds = 1),
+                     'timestamp_us': timedelta(microseconds = 1)}
+_INTEGER_TYPES = frozenset(integer_types)
+# numpy module once imported, False if it is not installed, see _numpy
+_numpy_module = None
+# Lists shorter than this are not worth a numpy array
+_BULK_SIZE = 64
+_DATETIME64_UNITS = {10 ** 6: 's', 10 ** 3: 'ms', 1: 'us'}
+# Most digits of integers built from decimals where the interpreter does not limit int() of strings
+_INT_MAX_DIGITS = 4300
+
 
 class ParseException(Exception):
     """
@@ -23,6 +68,376 @@ class InvalidAttribute(Exception):
     pass
 
 
+class PatchException(Exception):
+    """
+    Exception raised when a JSON Patch cannot be built or applied, see :meth:`.BaseField.apply_patch`
+    """
+    pass
+
+
+class SchemaException(Exception):
+    """
+    Exception raised when a JSON Schema cannot be compiled into models, see :func:`json2py.schema.compile_schema`
+    """
+    pass
+
+
+def _path_getter(path):
+    """
+    Returns a function fetching the value of the field at ``path`` of an object.
+
+    :param path: Dotted field path, made of attribute names, e.g. ``'owner.login'``.
+    :note: The function returns None if any document along the path is empty.
+    """
+    fieldNames = path.split('.')
+
+    def getter(obj):
+        for fieldName in fieldNames:
+            obj = obj.value.get(fieldName)
+            if obj is None:
+                return None
+        return obj.value
+    return getter
+
+
+_worker_state = threading.local()
+
+
+def _build_all(elementClass, values, workers = None, chunk_size = None):
+    """
+    Builds one ``elementClass`` object for each item on ``values``, keeping order.
+
+    When ``workers`` is given and there is more than one chunk of ``chunk_size`` items, chunks are
+    built concurrently on a :class:`concurrent.futures.ThreadPoolExecutor`. Lists decoded inside
+    a worker are built serially, so pools are never nested.
+    """
+    if not workers or getattr(_worker_state, 'active', False):
+        return [elementClass(d) for d in values]
+
+    chunk_size = chunk_size or 1024
+    if len(values) <= chunk_size:
+        return [elementClass(d) for d in values]
+
+    from concurrent.futures import ThreadPoolExecutor
+
+    def build(chunk):
+        _worker_state.active = True
+        try:
+            return [elementClass(d) for d in chunk]
+        finally:
+            _worker_state.active = False
+
+    result = []
+    with ThreadPoolExecutor(workers) as executor:
+        chunks = (values[i:i + chunk_size] for i in range(0, len(values), chunk_size))
+        for built in executor.map(build, chunks):
+            result.extend(built)
+    return result
+
+
+def _to_bool(value):
+    if isinstance(value, string_types):
+        lowered = value.strip().lower()
+        if lowered in ('true', '1', 'yes', 'on'):
+            return True
+        if lowered in ('false', '0', 'no', 'off'):
+            return False
+    elif isinstance(value, integer_types) and value in (0, 1):
+        return bool(value)
+    raise ValueError('not a boolean value')
+
+
+def _to_text(value):
+    if isinstance(value, bool):
+        return 'true' if value else 'false'
+    if isinstance(value, number_types):
+        return str(value)
+    raise ValueError('not a scalar value')
+
+
+def _to_int(value):
+    if isinstance(value, string_types):
+        try:
+            return int(value)
+        except ValueError:
+            # Parsed as a decimal, so long numbers written with a fraction stay exact. Digits are
+            # bounded as int() does, huge exponents like 1e1000000 would take ages to convert
+            return _to_bigint(value)
+    if isinstance(value, float) and value.is_integer():
+        return int(value)
+    raise ValueError('not an integral value')
+
+
+def _to_float(value):
+    if isinstance(value, string_types):
+        return float(value)
+    raise ValueError('not a numeric value')
+
+
+def _to_decimal(value):
+    if isinstance(value, string_types):
+        try:
+            value = Decimal(value.strip())
+        except ArithmeticError:
+            raise ValueError('not a decimal number')
+        if value.is_finite():
+            return value
+    raise ValueError('not a decimal number')
+
+
+def _decimal_to_int(value):
+    """
+    Converts an integral :class:`decimal.Decimal` into int, up to the digits :py:func:`int` accepts from
+    strings (see :py:func:`sys.get_int_max_str_digits`), as converting huge exponents takes ages.
+
+    :raise ValueError: If ``value`` is not a finite integral value or it has too many digits.
+    """
+    if not value.is_finite() or value != value.to_integral_value():
+        raise ValueError('not an integral value')
+    limit = getattr(sys, 'get_int_max_str_digits', lambda: _INT_MAX_DIGITS)()
+    if limit and value.adjusted() >= limit:
+        raise ValueError('integer exceeds the limit of %d digits' % limit)
+    return int(value)
+
+
+def _to_bigint(value):
+    if isinstance(value, string_types):
+        try:
+            return int(value)
+        except ValueError:
+            try:
+                value = Decimal(value.strip())
+            except ArithmeticError:
+                raise ValueError('not an integral value')
+    if isinstance(value, Decimal):
+        return _decimal_to_int(value)
+    raise ValueError('not an integral value')
+
+
+def _to_datetime(value, unit = 10 ** 6):
+    if isinstance(value, string_types):
+        value = float(value)
+    if isinstance(value, number_types) and not isinstance(value, bool):
+        return _EPOCH + timedelta(microseconds = value * unit)
+    raise ValueError('not a UNIX timestamp')
+
+
+def _microseconds(delta):
+    return (delta.days * 86400 + delta.seconds) * 10 ** 6 + delta.microseconds
+
+
+# Range of datetime, in microseconds since the epoch
+_MIN_TIMESTAMP = _microseconds(datetime.min - _EPOCH)
+_MAX_TIMESTAMP = _microseconds(datetime.max - _EPOCH)
+
+
+def _localize(value, tz):
+    """
+    Converts ``value`` to ``tz``, values without timezone are taken as UTC.
+    """
+    if value.tzinfo is None:
+        value = value.replace(tzinfo = _UTC)
+        if tz is _UTC:
+            return value
+    return value.astimezone(tz)
+
+
+def _numpy():
+    """
+    Returns :mod:`numpy`, imported on first use, or None if it is not installed.
+    """
+    global _numpy_module
+    if _numpy_module is None:
+        try:
+            import numpy
+            _numpy_module = numpy
+        except ImportError:
+            _numpy_module = False
+    return _numpy_module or None
+
+
+def _from_timestamps(values, unit):
+    """
+    Converts a list of integer timestamps, in units of ``unit`` microseconds, into naive UTC datetimes.
+    The whole list is converted at once with numpy ``datetime64`` when it is installed.
+    """
+    numpy = _numpy()
+    if numpy is not None and len(values) >= _BULK_SIZE:
+        try:
+            array = numpy.array(values, dtype = numpy.int64)
+        except OverflowError:
+            array = None
+        # Out of range values are left to timedelta, which raises OverflowError as for single values
+        if array is not None and -(-_MIN_TIMESTAMP // unit) <= array.min() and array.max() <= _MAX_TIMESTAMP // unit:
+            return array.astype('datetime64[%s]' % _DATETIME64_UNITS[unit]).astype('datetime64[us]').tolist()
+
+    epoch = _EPOCH
+    delta = timedelta(microseconds = unit)
+    return [epoch + delta * value for value in values]
+
+
+def _populate(root, data, depth = 1, top = None):
+    """
+    Fills ``root``, an object returned by :meth:`.BaseField._shell`, with ``data``.
+
+    Documents and lists are traversed with an explicit stack instead of recursive constructor calls,
+    so deep trees do not hit the interpreter recursion limit. Depth is checked against ``__max_depth__``
+    of ``top`` class, ``root`` itself by default.
+
+    :param depth: Depth of ``root``, when it is nested on ``top``.
+    :raise ParseException: If data is deeper than allowed or cannot be parsed.
+    """
+    if top is None:
+        top = root
+    maxDepth = top.__max_depth__
+    stack = [(root, data, depth)]
+    while stack:
+        obj, data, depth = stack.pop()
+        if maxDepth is not None and depth > maxDepth:
+            raise ParseException('%s data exceeds the maximum depth of %d' % (type(top).__name__, maxDepth))
+        for shell, value in obj._fill(data):
+            stack.append((shell, value, depth + 1))
+
+
+def _copy_tree(root):
+    """
+    Returns a deep copy of ``root``, a document or list. Sub-fields are copied with an explicit stack
+    instead of recursive :meth:`.BaseField.copy` calls, as :func:`._populate` builds them.
+
+    :raise ValueError: If ``root`` is deeper than ``__max_depth__`` of its class or, when there is
+        no limit, it holds itself.
+    """
+    maxDepth = root.__max_depth__
+    # Without limit, sources on the current path are tracked to stop on cycles
+    active = set() if maxDepth is None else None
+    result = root.copy(False)
+    stack = [(result, root, 1)]
+    while stack:
+        obj, source, depth = stack.pop()
+        if obj is None:
+            active.discard(id(source))
+            continue
+        if maxDepth is not None and depth > maxDepth:
+            raise ValueError('%s exceeds the maximum depth of %d' % (type(root).__name__, maxDepth))
+        if active is not None:
+            if id(source) in active:
+                raise ValueError('Circular reference detected')
+            active.add(id(source))
+            stack.append((None, source, depth))
+
+        fields = obj.value if isinstance(obj, ListField) else obj.__dict__
+        for k in range(len(fields)) if isinstance(fields, list) else list(fields):
+            field = fields[k]
+            if field._container:
+                fields[k] = copied = field.copy(False)
+                stack.append((copied, field, depth + 1))
+            else:
+                fields[k] = field.copy()
+    return result
+
+
+def _merge_data(target, patch):
+    """
+    Returns a copy of the dict ``target`` updated with the dict ``patch`` as :meth:`.NestedField.merge`
+    does: keys of ``patch`` replace the ones of ``target``, dicts on both are merged. Null values are kept,
+    so fields are cleared instead of removed.
+    """
+    result = dict(target)
+    stack = [(result, patch)]
+    while stack:
+        out, update = stack.pop()
+        for key, value in update.items():
+            current = out.get(key)
+            if isinstance(value, dict) and isinstance(current, dict):
+                out[key] = dict(current)
+                stack.append((out[key], value))
+            else:
+                out[key] = value
+    return result
+
+
+def _resolve_model(ref, module):
+    """
+    Returns the class referenced by ``ref``: a class, its name looked up in ``module`` or its dotted path.
+
+    :raise ValueError: If the class cannot be found.
+    """
+    if not isinstance(ref, string_types):
+        return ref
+    moduleName, _, className = ref.rpartition('.')
+    try:
+        return getattr(importlib.import_module(moduleName or module), className)
+    except (ImportError, AttributeError, TypeError, ValueError):
+        raise ValueError("Cannot resolve model '%s' from module %s" % (ref, module))
+
+
+# Field classes reachable from each model, see _model_classes
+_reachable = {}
+
+
+def _model_classes(cls):
+    """
+    Returns the field classes objects of ``cls`` can hold at any depth, ``cls`` included, following
+    documents, list elements, union models and references. Unresolvable references are left out.
+
+    :return: frozenset of :class:`.BaseField` subclasses.
+    """
+    classes = _reachable.get(cls)
+    if classes is not None:
+        return classes
+
+    classes = set()
+    pending = [cls]
+    while pending:
+        klass = pending.pop()
+        if klass in classes:
+            continue
+        classes.add(klass)
+        try:
+            if issubclass(klass, NestedField):
+                fields = [field for fieldName, key, field in klass._schema().fields]
+            elif issubclass(klass, ListField):
+                fields = [klass._element()]
+            elif issubclass(klass, UnionField):
+                pending.extend((klass.__models__ or {}).values())
+                if isinstance(klass.__fallback__, (list, tuple)):
+                    pending.extend(klass.__fallback__)
+                continue
+            else:
+                continue
+            for field in fields:
+                if isinstance(field, RefField):
+                    field = field._target()
+                pending.append(type(field))
+        except ValueError:
+            pass
+
+    classes = _reachable[cls] = frozenset(classes)
+    return classes
+
+
+def _holds_exact(cls):
+    """
+    Whether objects of ``cls`` can hold fields whose values must be parsed without going through float,
+    like :class:`.DecimalField` and :class:`.BigIntField`.
+    """
+    return any(klass._exact for klass in _model_classes(cls))
+
+
+class _Schema(object):
+    """
+    Precomputed description of the fields declared on a :class:`.NestedField` subclass.
+
+    :arg fields: List of ``(attribute name, key in source data, prototype field)`` tuples.
+    """
+    def __init__(self, fields):
+        self.fields = tuple(fields)
+        # Same tuples plus whether the prototype holds documents, so leaves skip _shell when building
+        self.entries = tuple((fieldName, key, field, field._container) for fieldName, key, field in self.fields)
+        self.by_key = dict((key, (fieldName, field)) for fieldName, key, field in self.fields)
+        self.by_attr = dict((fieldName, (key, field)) for fieldName, key, field in self.fields)
+
+
 class BaseField(object):
     """
     Base Class holding and defining common features for all the other subclasses.
@@ -31,7 +446,18 @@ class BaseField(object):
     :arg name: Name of the field in source data.
     :arg required: Whether raise LookupError when key is missing or not.
     :note: This class must be treated as abstract class and should not be reimplemented.
+    :note: Set ``__cache__`` class variable to a :class:`json2py.cache.DecodeCache` to
+     reuse decoded objects on :meth:`from_json` calls with identical input.
+    :note: ``__max_depth__`` class variable limits how deep documents and lists can be nested when
+     building, copying, diffing or encoding objects of this class, None disables the limit. Without
+     limit, objects holding themselves raise ValueError when copied, diffed or encoded.
     """
+    __cache__ = None
+    __max_depth__ = 1000
+    _container = False
+    # Whether values must be parsed without going through float, see DecimalField
+    _exact = False
+
     def __init__(self, value = None, name = None, required = True):
         """
         :class:`.BaseField` constructor
@@ -45,7 +471,13 @@ class BaseField(object):
         Converts an object of class :class:`.BaseField` into JSON representation (string)
         using :class:`.BaseEncoder` JSONEncoder.
 
-        :param kwargs: Parameters passed to :py:func:`json.dumps`
+        .. code-block:: python
+
+            user.json_encode(exclude_none = True, exclude = ['owner.since'])
+
+        :param kwargs: Parameters passed to :py:func:`json.dumps`, including :class:`.BaseEncoder` options:
+            ``exclude_none``, ``exclude_defaults``, ``include`` and ``exclude``. Output is compact unless
+            ``indent`` or ``separators`` are given.
         :return: JSON-string representation of this object.
         """
         kwargs.pop('cls', None)
@@ -66,6 +498,184 @@ class BaseField(object):
     def _dict_to_obj(self, d):
         self.__init__(d)
 
+    @classmethod
+    def from_json(cls, data, **kwargs):
+        """
+        Builds a new object of this class from a JSON-string.
+
+        If ``__cache__`` is set, the object is looked up by the digest of ``data`` first,
+        so repeated payloads skip parsing. Callers get copies of the cached object, unless
+        the cache is set to share it (see :class:`json2py.cache.DecodeCache`).
+
+        :param data: JSON-string or bytes passed to :py:func:`json.loads`
+        :param kwargs: Parameters passed to :py:func:`json.loads`, cache is bypassed when given.
+        :return: Object of this class representing ``data``.
+        """
+        cache = cls.__cache__
+        if cache is None or kwargs:
+            return cls._loads(data, **kwargs)
+
+        # Sizes are accounted in bytes, so text is encoded once for both the key and the size
+        raw = data if isinstance(data, bytes) else data.encode('utf-8')
+        key = cache.make_key(cls, raw)
+        obj = cache.get(key)
+        if obj is None:
+            obj = cls._loads(data)
+            cache.put(key, obj, len(raw))
+        # The cached object itself is never handed out when copying, so callers cannot change it
+        return obj.copy() if cache.copy else obj
+
+    @classmethod
+    def _loads(cls, data, **kwargs):
+        """
+        Parses and builds ``data``, models holding :class:`.DecimalField` or :class:`.BigIntField` are
+        parsed by :class:`json2py.decoder.ModelDecoder`, so their numbers never go through float.
+        Text nested deeper than :py:func:`json.loads` can recurse is also parsed by it.
+        """
+        if not _holds_exact(cls):
+            try:
+                data = json.loads(data, **kwargs)
+            except _RecursionError:
+                pass
+            else:
+                return cls(data)
+        from .decoder import ModelDecoder
+        kwargs.pop('cls', None)
+        return json.loads(data, cls = ModelDecoder, model = cls, **kwargs)
+
+    def __get__(self, instance, owner):
+        # Fields declared on a class are prototypes, each document holds its own fields on its __dict__,
+        # so reaching this means the document lacks the field (e.g. it was built from None). It reads
+        # as an empty field, a new one so the prototype cannot be modified through the document.
+        # Fields held by any other class are plain attributes
+        if not isinstance(instance, NestedField):
+            return self
+        return self._spawn(None)
+
+    def diff(self, other, key = None):
+        """
+        Builds the JSON Patch (RFC 6902) that transforms this object into ``other``.
+        See :func:`json2py.patch.make_patch` for details.
+
+        :param other: Object of the same class as this one.
+        :param key: How to align list elements, e.g. ``'id'``, None aligns them by position.
+        :return: List of JSON Patch operations.
+        """
+        from .patch import make_patch
+        return make_patch(self, other, key)
+
+    def apply_patch(self, patch):
+        """
+        Applies a JSON Patch (RFC 6902) over this object, in place.
+        See :func:`json2py.patch.apply_patch` for details.
+
+        :param patch: List of JSON Patch operations.
+        :return: This object.
+        """
+        from .patch import apply_patch
+        return apply_patch(self, patch)
+
+    @classmethod
+    def json_schema(cls):
+        """
+        Returns the JSON Schema describing data accepted by this class.
+        See :func:`json2py.schema.json_schema` for details.
+
+        :return: dict holding the schema.
+        """
+        from .schema import json_schema
+        return json_schema(cls)
+
+    @classmethod
+    def incremental(cls):
+        """
+        Returns a push parser building objects of this class from JSON received in chunks.
+        For :class:`.ListField` subclasses every element of the list is returned as soon as it is complete.
+
+        .. code-block:: python
+
+            decoder = RepoList.incremental()
+            for chunk in chunks:
+                for repo in decoder.feed(chunk):
+                    handle(repo)
+            decoder.close()
+
+        :return: :class:`json2py.incremental.IncrementalDecoder` for this class.
+        """
+        from .incremental import IncrementalDecoder
+        return IncrementalDecoder(cls)
+
+    @classmethod
+    def decode_batch(cls, values, workers = None, chunk_size = 64, raw = False):
+        """
+        Builds one object of this class for each item on ``values``, splitting the work in chunks
+        across a thread pool. Useful on free-threaded Python builds, where chunks run in parallel.
+
+        :param values: List of data in the format accepted by the constructor.
+        :param workers: Number of threads, None uses one per CPU and 0 or 1 disables the pool.
+        :param chunk_size: Number of items built by a thread at once.
+        :param raw: Whether items are JSON-strings to be decoded with :meth:`from_json`.
+        :return: list of objects of this class, in the same order as ``values``.
+        """
+        if workers is None:
+            import multiprocessing
+            workers = multiprocessing.cpu_count()
+        build = cls.from_json if raw else cls
+        return _build_all(build, list(values), workers if workers > 1 else None, chunk_size)
+
+    def _spawn(self, value):
+        """
+        Builds a new field of the same class and options as this one holding ``value``.
+        Used to instantiate the fields declared on :class:`.NestedField` subclasses.
+        """
+        return self.__class__(value = value, name = self.name, required = self.required)
+
+    def _spawn_all(self, values):
+        """
+        Builds the elements of a list holding objects of this class, which is the list :attr:`__model__`,
+        from a list of values.
+        """
+        cls = self.__class__
+        return [cls(value) for value in values]
+
+    def _shell(self, value):
+        """
+        Returns an empty object of the same class and options as this one, to be filled with ``value``
+        by :func:`._populate` without recursion, or None when it must be built at once with :meth:`_spawn`.
+        """
+        return None
+
+    def _coerce(self, value, coerce):
+        """
+        Converts ``value``, whose type is not the expected one, with the converter of this class
+        (``coerce = True``) or with ``coerce`` itself when it is a function.
+
+        :raise ParseException: If ``value`` cannot be converted.
+        """
+        converter = self._coercer if coerce is True else coerce
+        try:
+            return converter(value)
+        except (TypeError, ValueError, ArithmeticError) as e:
+            raise ParseException('%s cannot coerce %r: %s' % (self.__class__.__name__, value, e))
+
+    def copy(self, deep = True):
+        """
+        Returns a copy of this object without parsing nor validating data again.
+        Leaf values (strings, numbers, dates...) are immutable so they are always shared.
+
+        :param deep: Whether copy sub-fields too or share them with the original object.
+        :return: Object of the same class as this one.
+        """
+        obj = self.__class__.__new__(self.__class__)
+        obj.__dict__.update(self.__dict__)
+        return obj
+
+    def __copy__(self):
+        return self.copy(deep = False)
+
+    def __deepcopy__(self, memo):
+        return self.copy(deep = True)
+
 
 class BooleanField(BaseField):
     """
@@ -74,14 +684,25 @@ class BooleanField(BaseField):
     :arg value: It is the raw data that is this object will represent once parsed.
     :arg name: It has the same meaning as in :class:`.BaseField`
     :arg required: It has the same meaning as in :class:`.BaseField`
+    :arg coerce: Whether convert values of other types (``'true'``, ``'no'``, ``1``...) instead of raising
+        :class:`.ParseException`, it can also be a function doing the conversion. None takes
+        :attr:`__coerce__` of the :class:`.NestedField` holding it, if any.
     :raise `ParseException`: If ``value`` is not boolean nor None
     """
-    def __init__(self, value = None, name = None, required = True):
+    _coercer = staticmethod(_to_bool)
+
+    def __init__(self, value = None, name = None, required = True, coerce = None):
         super(BooleanField, self).__init__(value, name, required)
+        self.coerce = coerce
+
+        if not isinstance(value, bool) and value is not None:
+            if not coerce:
+                raise ParseException('BooleanField cannot parse non bool')
+            value = self._coerce(value, coerce)
         self.value = value
 
-        if not isinstance(self.value, bool) and self.value is not None:
-            raise ParseException('BooleanField cannot parse non bool')
+    def _spawn(self, value):
+        return self.__class__(value = value, name = self.name, required = self.required, coerce = self.coerce)
 
     def __str__(self):
         return str(self.value)
@@ -97,14 +718,25 @@ class TextField(BaseField):
     :arg value: It is the raw data that is this object will represent once parsed.
     :arg name: It has the same meaning as in :class:`.BaseField`
     :arg required: It has the same meaning as in :class:`.BaseField`
+    :arg coerce: Whether convert values of other types (numbers and booleans) instead of raising
+        :class:`.ParseException`, it can also be a function doing the conversion. None takes
+        :attr:`__coerce__` of the :class:`.NestedField` holding it, if any.
     :raise ParseException: If ``value`` is not a string nor None
     """
-    def __init__(self, value = None, name = None, required = True):
+    _coercer = staticmethod(_to_text)
+
+    def __init__(self, value = None, name = None, required = True, coerce = None):
         super(TextField, self).__init__(value, name, required)
+        self.coerce = coerce
+
+        if not isinstance(value, string_types) and value is not None:
+            if not coerce:
+                raise ParseException('TextField cannot parse non string')
+            value = self._coerce(value, coerce)
         self.value = value
 
-        if not isinstance(self.value, basestring) and self.value is not None:
-            raise ParseException('TextField cannot parse non string')
+    def _spawn(self, value):
+        return self.__class__(value = value, name = self.name, required = self.required, coerce = self.coerce)
 
     def __str__(self):
         return str(self.value)  ## Use str() to avoid None's
@@ -118,8 +750,12 @@ class NumberField(BaseField):
     Abstract class for representing JSON numbers.
     It really does nothing
     """
-    def __init__(self, value = None, name = None, required = True):
+    def __init__(self, value = None, name = None, required = True, coerce = None):
         super(NumberField, self).__init__(value, name, required)
+        self.coerce = coerce
+
+    def _spawn(self, value):
+        return self.__class__(value = value, name = self.name, required = self.required, coerce = self.coerce)
 
     def __str__(self):
         return str(self.value)
@@ -135,14 +771,22 @@ class IntegerField(NumberField):
     :arg value: It is the raw data that is this object will represent once parsed.
     :arg name: It has the same meaning as in :class:`.BaseField`
     :arg required: It has the same meaning as in :class:`.BaseField`
+    :arg coerce: Whether convert values of other types (numeric strings and integral floats) instead of raising
+        :class:`.ParseException`, it can also be a function doing the conversion. None takes
+        :attr:`__coerce__` of the :class:`.NestedField` holding it, if any.
     :raise ParseException: If ``value`` is not a integer nor None
     """
-    def __init__(self, value = None, name = None, required = True):
+    _coercer = staticmethod(_to_int)
+
+    def __init__(self, value = None, name = None, required = True, coerce = None):
         super(NumberField, self).__init__(value, name, required)
-        self.value = value
+        self.coerce = coerce
 
-        if not isinstance(self.value, int) and self.value is not None:
-            raise ParseException('IntegerField cannot parse non integer')
+        if not isinstance(value, integer_types) and value is not None:
+            if not coerce:
+                raise ParseException('IntegerField cannot parse non integer')
+            value = self._coerce(value, coerce)
+        self.value = value
 
 
 class FloatField(NumberField):
@@ -152,14 +796,104 @@ class FloatField(NumberField):
     :arg value: It is the raw data that is this object will represent once parsed.
     :arg name: It has the same meaning as in :class:`.BaseField`
     :arg required: It has the same meaning as in :class:`.BaseField`
+    :arg coerce: Whether convert values of other types (numeric strings) instead of raising
+        :class:`.ParseException`, it can also be a function doing the conversion. None takes
+        :attr:`__coerce__` of the :class:`.NestedField` holding it, if any.
     :raise ParseException: If ``value`` is not a float nor None
     """
-    def __init__(self, value = None, name = None, required = True):
+    _coercer = staticmethod(_to_float)
+
+    def __init__(self, value = None, name = None, required = True, coerce = None):
         super(NumberField, self).__init__(value, name, required)
+        self.coerce = coerce
+
+        if not isinstance(value, number_types) and value is not None:
+            if not coerce:
+                raise ParseException('FloatField cannot parse non float')
+            value = self._coerce(value, coerce)
         self.value = value
 
-        if not isinstance(self.value, (float, int)) and self.value is not None:
-            raise ParseException('FloatField cannot parse non float')
+
+class DecimalField(NumberField):
+    """
+    Class representing a number field in JSON holding a :class:`decimal.Decimal`, for amounts that
+    cannot lose precision.
+
+    :arg value: It is the raw data that is this object will represent once parsed.
+    :arg name: It has the same meaning as in :class:`.BaseField`
+    :arg required: It has the same meaning as in :class:`.BaseField`
+    :arg coerce: Whether convert values of other types (numeric strings) instead of raising
+        :class:`.ParseException`, it can also be a function doing the conversion. None takes
+        :attr:`__coerce__` of the :class:`.NestedField` holding it, if any.
+    :raise ParseException: If ``value`` is not a finite number nor None
+
+    :note: Integers are converted exactly and floats through their shortest representation, e.g. ``0.1``
+        becomes ``Decimal('0.1')``. Digits lost by :py:func:`json.loads` cannot be recovered, use
+        :meth:`~.BaseField.from_json` or :class:`json2py.decoder.ModelDecoder`, which parse these
+        fields straight into :class:`decimal.Decimal`, as incremental decoders, snapshots and the
+        command line tool do.
+    :note: Values are encoded with their exact digits.
+    """
+    _coercer = staticmethod(_to_decimal)
+    _exact = True
+
+    def __init__(self, value = None, name = None, required = True, coerce = None):
+        super(NumberField, self).__init__(value, name, required)
+        self.coerce = coerce
+
+        if isinstance(value, Decimal) or value is None:
+            pass
+        elif isinstance(value, float):
+            value = Decimal(repr(value))
+        elif isinstance(value, integer_types) and not isinstance(value, bool):
+            value = Decimal(value)
+        elif not coerce:
+            raise ParseException('DecimalField cannot parse non number')
+        else:
+            value = self._coerce(value, coerce)
+
+        if value is not None and not value.is_finite():
+            raise ParseException('DecimalField cannot parse non finite number %s' % value)
+        self.value = value
+
+
+class BigIntField(IntegerField):
+    """
+    Class representing an integer field in JSON that never loses digits, e.g. 64 bits identifiers.
+
+    :arg value: It is the raw data that is this object will represent once parsed.
+    :arg name: It has the same meaning as in :class:`.BaseField`
+    :arg required: It has the same meaning as in :class:`.BaseField`
+    :arg coerce: Whether convert values of other types (numeric strings) instead of raising
+        :class:`.ParseException`, it can also be a function doing the conversion. None takes
+        :attr:`__coerce__` of the :class:`.NestedField` holding it, if any.
+    :raise ParseException: If ``value`` is not an integer nor None, or it is a float too large to be exact.
+
+    :note: Integral :class:`decimal.Decimal` values, like ``1e20`` parsed by :meth:`~.BaseField.from_json`
+        or :class:`json2py.decoder.ModelDecoder`, are accepted, and so are integral floats up to 2 ** 53.
+        Decimals with more digits than :py:func:`int` accepts from strings (see
+        :py:func:`sys.get_int_max_str_digits`, 4300 by default) are rejected.
+    """
+    _coercer = staticmethod(_to_bigint)
+    _exact = True
+
+    def __init__(self, value = None, name = None, required = True, coerce = None):
+        super(NumberField, self).__init__(value, name, required)
+        self.coerce = coerce
+
+        if not isinstance(value, integer_types) and value is not None:
+            if isinstance(value, Decimal):
+                try:
+                    value = _decimal_to_int(value)
+                except ValueError as e:
+                    raise ParseException('BigIntField cannot parse %s: %s' % (value, e))
+            elif isinstance(value, float) and value.is_integer() and abs(value) <= 2 ** 53:
+                value = int(value)
+            elif not coerce:
+                raise ParseException('BigIntField cannot parse non integer or inexact value')
+            else:
+                value = self._coerce(value, coerce)
+        self.value = value
 
 
 class NestedField(BaseField):
@@ -170,73 +904,141 @@ class NestedField(BaseField):
     :arg name: It has the same meaning as in :class:`.BaseField`
     :arg required: It has the same meaning as in :class:`.BaseField`
     :raise `ParseException`: If ``value`` is not a dict nor None
-    :raise `InvalidAttribute`: If a reserved keyword is used as attribute
+    :raise `InvalidAttribute`: If a reserved keyword or a method name is used as attribute
 
-    :note: Reserved keywords are: ``name``, ``value`` and ``required``
+    :note: Reserved keywords are: ``name``, ``value`` and ``required``. Fields cannot be declared either
+     with the names of document methods: ``copy``, ``merge``, ``diff``, ``apply_patch``, ``from_json``,
+     ``decode_batch``, ``incremental`` and ``json_schema``. Use ``name`` keyword to read such keys.
     :note: For use cases and examples refer to :doc:`examples`
+    :note: Fields are stored on the instance ``__dict__``, which is also exposed as ``value``,
+     so reading or assigning them runs at plain attribute speed.
+    :note: Fields referencing models declared later, or this same model, are declared with :class:`.RefField`.
+    :note: Set :attr:`__coerce__` class variable to True (or a function) to make the leaf fields
+     declared on this class convert values of other types, e.g. ``"42"`` on an :class:`.IntegerField`.
+     Fields declaring their own ``coerce`` keep it, nested documents follow their own :attr:`__coerce__`.
     """
+    __slots__ = ('name', 'required')
     __forbiddenAttrs = ['name', 'value', 'required']
+    # Methods of documents, fields declared with these names would be hidden by them
+    __methodAttrs = ['copy', 'merge', 'diff', 'apply_patch', 'from_json', 'decode_batch', 'incremental', 'json_schema']
+    __coerce__ = None
+    _container = True
 
     def __new__(cls, *args, **kwargs):
-        forbidden_intersection = set(dir(cls)).intersection(NestedField.__forbiddenAttrs)
-        if len(forbidden_intersection) > 0:
-            raise InvalidAttribute('%s cannot be used as attribute names, use name keyword for bypassing this limitation' %(', '.join(forbidden_intersection)))
+        cls._schema()
         return super(NestedField, cls).__new__(cls)
 
+    @classmethod
+    def _schema(cls):
+        """
+        Returns the :class:`._Schema` describing the fields declared on this class.
+        It is computed on first use and stored on the class itself.
+
+        :raise `InvalidAttribute`: If a reserved keyword is used as attribute
+        """
+        schema = cls.__dict__.get('_json2py_schema')
+        if schema is None:
+            declaring = cls.__mro__[:cls.__mro__.index(NestedField)]
+            forbidden_intersection = set(
+                attr for klass in declaring
+                for attr in NestedField.__forbiddenAttrs if attr in klass.__dict__
+            )
+            forbidden_intersection.update(
+                attr for klass in declaring
+                for attr in NestedField.__methodAttrs if isinstance(klass.__dict__.get(attr), BaseField)
+            )
+            if len(forbidden_intersection) > 0:
+                raise InvalidAttribute('%s cannot be used as attribute names, use name keyword for bypassing this limitation' %(', '.join(forbidden_intersection)))
+
+            fields = []
+            coerce = cls.__coerce__
+            for fieldName in sorted(set(dir(cls)) - set(dir(NestedField))):
+                field = getattr(cls, fieldName)
+                if isinstance(field, BaseField):
+                    if coerce is not None and getattr(field, 'coerce', False) is None:
+                        # Resolve the policy once, on a private prototype, so building documents pays nothing
+                        field = field.copy()
+                        field.coerce = coerce
+                    if isinstance(field, RefField) and field.module is None:
+                        declaring = next(k for k in cls.__mro__ if fieldName in k.__dict__)
+                        field = field.copy()
+                        field.module = declaring.__module__
+                    fields.append((fieldName, fieldName if field.name is None else field.name, field))
+
+            # Threads racing here build equal schemas, so last one winning is harmless
+            schema = _Schema(fields)
+            setattr(cls, '_json2py_schema', schema)
+        return schema
+
     def __init__(self, value = None, name = None, required = True):
-        super(NestedField, self).__setattr__('value', {})
-        super(NestedField, self).__setattr__('name', name)
-        super(NestedField, self).__setattr__('required', required)
         super(NestedField, self).__init__(value, name, required)
+        fields = self.__dict__
+        fields.clear()
 
         data = value
         if not isinstance(data, dict) and data is not None:
             raise ParseException('NestedField cannot parse non dict')
 
         if data is not None:
-            specificFields = set(dir(self.__class__)) - set(dir(NestedField))
-            lookUpKeys = {}
-            reverseLookUp = {}
-            for fieldName in specificFields:
-                field = getattr(self.__class__, fieldName)
-                if field.name is not None:
-                    lookUpKeys[field.name] = field
-                    reverseLookUp[field.name] = fieldName
-                else:
-                    lookUpKeys[fieldName] = field
-                    reverseLookUp[fieldName] = fieldName
-
-            for key, field in lookUpKeys.items():
-                if key not in data and field.required:
-                    raise LookupError('%s was not found on data dict' % key)
-                elif key in data:
-                    field = field.__class__(value = data[key], name = field.name, required = field.required)
-                else:
-                    field = field.__class__(value = None, name = field.name, required = field.required)
+            _populate(self, data)
 
-                super(NestedField, self).__getattribute__('value')[reverseLookUp[key]] = field
-                # setattr(self, reverseLookUp[key], field)
+    @classmethod
+    def _blank(cls, name = None, required = True):
+        """
+        Returns an object of this class without fields, skipping the constructor.
+        """
+        obj = object.__new__(cls)
+        obj.name = name
+        obj.required = required
+        return obj
 
-    def __setattr__(self, key, value):
-        if key in self.__dict__ and key != 'value':
-            super(NestedField, self).__setattr__(key, value)
-        else:
-            self.value[key] = value
+    def _shell(self, value):
+        if not isinstance(value, dict):
+            return None
+        return type(self)._blank(self.name, self.required)
 
-    def __getattr__(self, key):
-        try:
-            return super(NestedField, self).__getattribute__('value')[key]
-        except KeyError:
-            raise AttributeError(key)
+    def _fill(self, data):
+        """
+        Builds the fields of this document from ``data``, except the ones holding documents,
+        which are left empty and returned to be filled by :func:`._populate`.
 
-    def __getattribute__(self, item):
-        if item not in super(NestedField, self).__getattribute__('value'):
-            return super(NestedField, self).__getattribute__(item)
-        else:
-            raise AttributeError(item)
+        :return: list of ``(empty field, data)`` pairs.
+        """
+        fields = self.__dict__
+        pending = []
+        for fieldName, key, field, container in type(self)._schema().entries:
+            if key in data:
+                value = data[key]
+                if container:
+                    shell = field._shell(value)
+                    if shell is not None:
+                        fields[fieldName] = shell
+                        pending.append((shell, value))
+                        continue
+                fields[fieldName] = field._spawn(value)
+            elif field.required:
+                raise LookupError('%s was not found on data dict' % key)
+            else:
+                fields[fieldName] = field._spawn(None)
+        return pending
+
+    @property
+    def value(self):
+        """
+        dict mapping attribute names to fields of this document.
+        """
+        return self.__dict__
+
+    @value.setter
+    def value(self, fields):
+        self.__dict__ = dict(fields)
+
+    def __getattr__(self, key):
+        # Only reached when key is not a field of this document
+        raise AttributeError(key)
 
     def __getitem__(self, item):
-        return self.__getattribute__(item)
+        return getattr(self, item)
 
     def __setitem__(self, key, value):
         self.__setattr__(key, value)
@@ -247,7 +1049,76 @@ class NestedField(BaseField):
         return obj
 
     def items(self):
-        return super(NestedField, self).__getattribute__('value').items()
+        return self.__dict__.items()
+
+    def copy(self, deep = True):
+        """
+        Returns a copy of this object without parsing nor validating data again.
+
+        With ``deep = False`` sub-fields are shared with the original object, making a cheap
+        copy-on-write clone when combined with :meth:`merge`, which replaces touched fields
+        instead of modifying them.
+
+        :param deep: Whether copy sub-fields too or share them with the original object.
+        :return: Object of the same class as this one.
+        :raise ValueError: On deep copies, see ``__max_depth__`` on :class:`.BaseField`.
+        """
+        if deep:
+            return _copy_tree(self)
+        obj = type(self)._blank(self.name, self.required)
+        obj.__dict__ = dict(self.__dict__)
+        return obj
+
+    def merge(self, other):
+        """
+        Applies a partial update over this object following JSON Merge Patch (RFC 7396) semantics:
+        keys present in ``other`` replace current fields, ``null`` clears them and nested documents
+        are merged recursively. Only the keys present in ``other`` are visited.
+
+        Touched fields are replaced by new ones, never modified, so sub-fields shared
+        with a ``copy(deep = False)`` clone are left untouched. Fields declared with a :class:`.UnionField`
+        are built again from the merged data, so updates can switch them to another model.
+
+        :param other: dict in source data format or object of this same class.
+        :return: This object, so calls can be chained.
+        :raise `ParseException`: If ``other`` is not a dict nor a :class:`.NestedField` or
+            any merged value cannot be parsed.
+        """
+        fields = self.__dict__
+        schema = type(self)._schema()
+
+        if isinstance(other, NestedField):
+            for fieldName, field in other.items():
+                if fieldName not in schema.by_attr:
+                    continue
+                current = fields.get(fieldName)
+                # Documents of other class, e.g. another model of a union, replace the current one
+                if isinstance(field, NestedField) and type(current) is type(field) and current.value and field.value:
+                    fields[fieldName] = current.copy(deep = False).merge(field)
+                else:
+                    fields[fieldName] = field.copy()
+            return self
+
+        if not isinstance(other, dict):
+            raise ParseException('NestedField cannot merge non dict')
+
+        for key, data in other.items():
+            entry = schema.by_key.get(key)
+            if entry is None:
+                continue
+            fieldName, field = entry
+            current = fields.get(fieldName)
+            if isinstance(data, dict) and isinstance(current, NestedField) and current.value:
+                if isinstance(field, RefField):
+                    field = field._target()
+                if isinstance(field, UnionField):
+                    # The update may pick another model, so it is built again from the merged data
+                    fields[fieldName] = field._spawn(_merge_data(BaseEncoder().default(current), data))
+                else:
+                    fields[fieldName] = current.copy(deep = False).merge(data)
+            else:
+                fields[fieldName] = field._spawn(data)
+        return self
 
 
 class ListField(BaseField):
@@ -261,51 +1132,267 @@ class ListField(BaseField):
     :raise ParseException: If ``value`` is not a list nor None
 
     :note: Hinting the structure of values of the list should be done using the meta variable :attr:`__model__`
-     inside class reimplementation.
+     inside class reimplementation. It can also be the name of a class declared later in the same module
+     (or its dotted path), e.g. to hold documents that contain lists of themselves.
 
     :note: JSON lists' values can be of any type even in the same list, but
      in real world apps, every JSON lists' values should be of the same type, this
      behaviour also simplifies this module, so this class expects that all values in
      lists must have the same structure.
 
+    :note: Set :attr:`__workers__` class variable to build elements of long lists on that many
+     threads, in chunks of :attr:`__chunk_size__` elements.
+
+    :note: :attr:`__indexes__` class variable declares indexes used by :meth:`find` and :meth:`filter`,
+     as a dict mapping field paths to ``'hash'`` (equality lookups) or ``'sorted'`` (range lookups).
+     Indexes are built on first query and kept up to date by this class' methods, call
+     :meth:`reindex` after changing indexed fields of elements or the :attr:`value` list directly.
+
     """
+    __workers__ = None
+    __chunk_size__ = 1024
+    __indexes__ = None
+    _indexes = None
+    _container = True
+
     def __init__(self, value = None, name = None, required = True):
         super(ListField, self).__init__(value, name, required)
 
+        # Names are resolved on first use, as prototypes are built before the named class exists
+        if value is not None or not isinstance(getattr(self, '__model__', None), string_types):
+            elementClass = self._element_class()
+
+        if not isinstance(value, list) and value is not None:
+            raise ParseException('ListField cannot parse non list')
+
+        self._indexes = None
+        self.value = []
+        if value is not None:
+            if self._parallel(value):
+                self.value = _build_all(elementClass, value, self.__workers__, self.__chunk_size__)
+            else:
+                _populate(self, value)
+
+    @classmethod
+    def _element_class(cls):
+        """
+        Returns the class in :attr:`__model__`, resolving it first if given by name.
+
+        :raise ValueError: If :attr:`__model__` is not defined or it is not a :class:`.BaseField` subclass.
+        """
         try:
-            elementClass = self.__model__
+            elementClass = cls.__model__
         except Exception as e:
             raise ValueError('__model__ class variable must be defined')
 
         if elementClass is None:
             raise ValueError('__model__ cannot be None')
 
-        if not issubclass(elementClass, BaseField):
+        if isinstance(elementClass, string_types):
+            declaring = next(k for k in cls.__mro__ if '__model__' in k.__dict__)
+            elementClass = _resolve_model(elementClass, declaring.__module__)
+            if isinstance(elementClass, type) and issubclass(elementClass, BaseField):
+                declaring.__model__ = elementClass
+
+        if not isinstance(elementClass, type) or not issubclass(elementClass, BaseField):
             raise ValueError('__model__ must be a BaseField subclass')
+        return elementClass
 
-        if not isinstance(value, list) and value is not None:
-            raise ParseException('ListField cannot parse non list')
+    @classmethod
+    def _element(cls):
+        """
+        Returns an empty object of :attr:`__model__` class, used as prototype of the elements.
+        """
+        elementClass = cls._element_class()
+        element = cls.__dict__.get('_json2py_element')
+        if type(element) is not elementClass:
+            element = elementClass(None)
+            cls._json2py_element = element
+        return element
+
+    def _parallel(self, value):
+        return bool(self.__workers__) and len(value) > (self.__chunk_size__ or 1024)
+
+    def _shell(self, value):
+        if not isinstance(value, list) or self._parallel(value):
+            return None
+        obj = self.__class__.__new__(self.__class__)
+        obj.name = self.name
+        obj.required = self.required
+        obj._indexes = None
+        obj.value = []
+        return obj
 
-        self.value = [elementClass(d) for d in value] if value is not None else []
+    def _fill(self, data):
+        """
+        Builds the elements of this list from ``data``, except the ones holding documents,
+        which are left empty and returned to be filled by :func:`._populate`.
+
+        :return: list of ``(empty element, data)`` pairs.
+        """
+        element = type(self)._element()
+        elementClass = type(element)
+        if not element._container:
+            self.value = element._spawn_all(data)
+            return ()
+
+        elements = self.value = []
+        pending = []
+        shell = element._shell
+        for d in data:
+            obj = shell(d)
+            if obj is None:
+                elements.append(elementClass(d))
+            else:
+                elements.append(obj)
+                pending.append((obj, d))
+        return pending
 
     def _dict_to_obj(self, d):
-        self.value.append(self.__model__(d))
+        self.append(self._element_class()(d))
         return self.value[-1]
 
+    def copy(self, deep = True):
+        """
+        Returns a copy of this object without parsing nor validating data again.
+
+        :param deep: Whether copy list elements too or share them with the original list.
+        :return: Object of the same class as this one.
+        :raise ValueError: On deep copies, see ``__max_depth__`` on :class:`.BaseField`.
+        """
+        return _copy_tree(self) if deep else self._derive(list(self.value))
+
+    def merge(self, other):
+        """
+        Applies ``other`` following JSON Merge Patch (RFC 7396) semantics, which replaces lists as a whole.
+
+        :param other: list in source data format or object of this same class.
+        :return: This object, so calls can be chained.
+        :raise `ParseException`: If ``other`` is not a list nor a :class:`.ListField`
+        """
+        if isinstance(other, ListField):
+            self.value = [v.copy() for v in other.value]
+            self._indexes = None
+        else:
+            self.__init__(other, self.name, self.required)
+        return self
+
+    def _derive(self, elements):
+        """
+        Returns a new object of this same class holding ``elements``, without building them again.
+        """
+        obj = self.__class__.__new__(self.__class__)
+        obj.__dict__.update(self.__dict__)
+        obj.value = elements
+        obj._indexes = None
+        return obj
+
+    def _indexed(self):
+        """
+        Returns indexes declared in :attr:`__indexes__`, building them if needed.
+        """
+        if self._indexes is None:
+            from .index import build_indexes
+            self._indexes = build_indexes(self.__indexes__, self.value) if self.__indexes__ else {}
+        return self._indexes
+
+    def _index_add(self, elements):
+        for index in self._indexes.values():
+            index.add(elements)
+
+    def _index_remove(self, elements):
+        for index in self._indexes.values():
+            index.remove(elements)
+
+    def snapshot(self, path):
+        """
+        Writes the elements of this list into a compact file that can be mapped back with
+        :meth:`open_snapshot`, see :func:`json2py.snapshot.write_snapshot`.
+
+        :param path: Path of the file to write.
+        :return: Number of elements written.
+        """
+        from .snapshot import write_snapshot
+        return write_snapshot(self, path)
+
+    @classmethod
+    def open_snapshot(cls, path):
+        """
+        Maps a file written by :meth:`snapshot` into memory, elements are built only when accessed,
+        so opening is almost instant and memory pages are shared between processes.
+
+        :param path: Path of the snapshot file.
+        :return: :class:`json2py.snapshot.SnapshotView` over the file, which must be closed when done.
+        """
+        from .snapshot import open_snapshot
+        return open_snapshot(cls, path)
+
+    def reindex(self):
+        """
+        Drops current indexes, they will be built again on next query.
+        """
+        self._indexes = None
+
+    def find(self, **criteria):
+        """
+        Returns the first element matching every criteria, see :meth:`filter`.
+
+        :return: The element found or None.
+        """
+        from .index import query
+        result = query(self.value, self._indexed(), criteria, first = True)
+        return result[0] if result else None
+
+    def filter(self, **criteria):
+        """
+        Returns the elements matching every criteria. Criteria are given as keyword arguments
+        where field paths are separated by ``__`` and may end with an operation: ``eq`` (default),
+        ``gt``, ``gte``, ``lt``, ``lte`` or ``in``, e.g. ``filter(language = 'Python', size__gt = 100)``
+        or ``filter(owner__login__in = ['a', 'b'])``.
+
+        Declared indexes (see :attr:`__indexes__`) are used when possible. Elements come in list
+        order when no index is used, in index order otherwise.
+
+        :return: Object of this same class sharing the matching elements.
+        """
+        from .index import query
+        return self._derive(query(self.value, self._indexed(), criteria))
+
     def append(self, x):
-        return self.value.append(x)
+        self.value.append(x)
+        if self._indexes:
+            self._index_add((x, ))
 
     def extend(self, L):
-        return self.value.extend(L)
+        L = list(L)
+        self.value.extend(L)
+        if self._indexes:
+            self._index_add(L)
 
-    def insert(self, x):
-        return self.value.insert(x)
+    def extend_raw(self, L):
+        """
+        Appends one element built from each item on ``L``, as done by the constructor.
+
+        :param L: Iterable of data in source format, e.g. dicts for :class:`.NestedField` elements.
+        :raise ParseException: If an item cannot be parsed, the list is left untouched.
+        """
+        self.extend(_build_all(self._element_class(), list(L), self.__workers__, self.__chunk_size__))
+
+    def insert(self, i, x):
+        self.value.insert(i, x)
+        if self._indexes:
+            self._index_add((x, ))
 
     def remove(self, x):
-        return self.value.remove(x)
+        self.value.remove(x)
+        if self._indexes:
+            self._index_remove((x, ))
 
-    def pop(self, i = None):
-        return self.value.pop(i)
+    def pop(self, i = -1):
+        x = self.value.pop(i)
+        if self._indexes:
+            self._index_remove((x, ))
+        return x
 
     def index(self, x):
         return self.value.index(x)
@@ -314,7 +1401,39 @@ class ListField(BaseField):
         return self.value.count(x)
 
     def sort(self, cmp = None, key = None, reverse = False):
-        return self.value.sort(cmp, key, reverse)
+        if cmp is not None:
+            if key is not None:
+                cmpFunc, keyFunc = cmp, key
+                cmp = lambda a, b: cmpFunc(keyFunc(a), keyFunc(b))
+            key = functools.cmp_to_key(cmp)
+        return self.value.sort(key = key, reverse = reverse)
+
+    def sort_by(self, *paths, **kwargs):
+        """
+        Sorts the list in place by the value of the fields at the given paths.
+        Keys are computed once per element before sorting. Empty values are placed last.
+
+        :param paths: Dotted field paths, made of attribute names, e.g. ``'owner.login'``.
+        :param reverse: Whether sort in descending order.
+        :raise TypeError: If no path is given.
+        """
+        reverse = kwargs.pop('reverse', False)
+        if kwargs:
+            raise TypeError('Unexpected arguments %s' % ', '.join(kwargs))
+        if not paths:
+            raise TypeError('sort_by needs at least one field path')
+
+        columns = []
+        for path in paths:
+            getter = _path_getter(path)
+            column = [getter(e) for e in self.value]
+            if None in column:
+                column = [((k is None) != reverse, k) for k in column]
+            columns.append(column)
+
+        keys = columns[0] if len(columns) == 1 else list(zip(*columns))
+        order = sorted(range(len(keys)), key = keys.__getitem__, reverse = reverse)
+        self.value = [self.value[i] for i in order]
 
     def reverse(self):
         return self.value.reverse()
@@ -324,12 +1443,29 @@ class ListField(BaseField):
 
     def __getitem__(self, key):
         # if key is of invalid type or value, the list values will raise the error
+        if isinstance(key, slice):
+            return self._derive(self.value[key])
         return self.value[key]
 
     def __setitem__(self, key, value):
-        self.value[key] = value
+        if not self._indexes:
+            self.value[key] = value
+            return
+
+        if isinstance(key, slice):
+            old, value = self.value[key], list(value)
+            self.value[key] = value
+        else:
+            old = (self.value[key], )
+            self.value[key] = value
+            value = (value, )
+        self._index_remove(old)
+        self._index_add(value)
 
     def __delitem__(self, key):
+        if self._indexes:
+            old = self.value[key]
+            self._index_remove(old if isinstance(key, slice) else (old, ))
         del self.value[key]
 
     def __iter__(self):
@@ -338,6 +1474,142 @@ class ListField(BaseField):
     def __reversed__(self):
         return reversed(self.value)
 
+    def __getstate__(self):
+        # Indexes hold functions, which cannot be pickled, they are built again on next query
+        state = self.__dict__.copy()
+        state['_indexes'] = None
+        return state
+
+class UnionField(BaseField):
+    """
+    Class representing a document that can follow one of several models, picked by the value of a
+    discriminator key. Building it returns an object of the picked model, so it can be used as a field
+    or as :attr:`__model__` of a :class:`.ListField` holding mixed documents.
+
+    :arg value: It is the raw data that is this object will represent once parsed.
+    :arg name: It has the same meaning as in :class:`.BaseField`
+    :arg required: It has the same meaning as in :class:`.BaseField`
+    :raise ParseException: If ``value`` is not a dict nor None or no model matches it.
+
+    :note: Subclasses must define :attr:`__models__`, a dict mapping discriminator values to
+     :class:`.NestedField` subclasses, and may change :attr:`__discriminator__`, the key holding
+     the discriminator on source data (``'type'`` by default).
+
+    :note: When :attr:`__fallback__` is True, documents with missing or unknown discriminators are
+     tried against every model in :attr:`__models__` order, it can also be a list of models to try.
+
+    :note: Only ``None`` builds an object of this class, holding ``None`` as value.
+    """
+    __discriminator__ = 'type'
+    __models__ = None
+    __fallback__ = False
+    _container = True
+
+    def __new__(cls, value = None, name = None, required = True):
+        if value is None:
+            return super(UnionField, cls).__new__(cls)
+
+        if not isinstance(value, dict):
+            raise ParseException('UnionField cannot parse non dict')
+
+        models = cls.__models__
+        if not models:
+            raise ValueError('__models__ class variable must be defined')
+
+        discriminator = value.get(cls.__discriminator__)
+        try:
+            model = models.get(discriminator)
+        except TypeError:
+            model = None
+
+        if model is not None:
+            return model(value, name, required)
+
+        fallback = cls.__fallback__
+        if fallback:
+            for model in (models.values() if fallback is True else fallback):
+                try:
+                    return model(value, name, required)
+                except (ParseException, LookupError):
+                    pass
+
+        raise ParseException("%s cannot find a model for %s '%s'" % (cls.__name__, cls.__discriminator__, discriminator))
+
+    def __init__(self, value = None, name = None, required = True):
+        super(UnionField, self).__init__(value, name, required)
+        self.value = value
+
+    def _shell(self, value):
+        # Only documents with a known discriminator, others need trying models or raising
+        if not isinstance(value, dict) or not self.__models__:
+            return None
+        try:
+            model = self.__models__.get(value.get(self.__discriminator__))
+        except TypeError:
+            return None
+        if model is None or not issubclass(model, NestedField):
+            return None
+        return model._blank(self.name, self.required)
+
+    def __str__(self):
+        return str(self.value)
+
+    def __repr__(self):
+        return self.__str__()
+
+
+class RefField(BaseField):
+    """
+    Class declaring a field whose model is referenced by name, so models can hold documents of
+    themselves or of models declared after them. Building it returns an object of the referenced model.
+
+    :arg model: :class:`.BaseField` subclass or its name: a class name is looked up in the module
+        declaring the field on first use, a dotted path (``'package.module.Class'``) is imported.
+    :arg name: It has the same meaning as in :class:`.BaseField`
+    :arg required: It has the same meaning as in :class:`.BaseField`
+    :raise ValueError: When building documents, if the referenced model cannot be found.
+
+    .. code-block:: python
+
+        class Comment(NestedField):
+            text = TextField()
+            parent = RefField('Comment', required = False)
+
+    :note: Documents and lists are built and encoded without recursion, see ``__max_depth__`` on :class:`.BaseField`.
+    """
+    _container = True
+
+    def __init__(self, model, name = None, required = True):
+        super(RefField, self).__init__(None, name, required)
+        self.model = model
+        self.module = None
+        self.value = None
+        self._prototype = None
+
+    def _target(self):
+        """
+        Returns an empty object of the referenced model, used as prototype of the fields built.
+        """
+        if self._prototype is None:
+            model = _resolve_model(self.model, self.module)
+            if not isinstance(model, type) or not issubclass(model, BaseField):
+                raise ValueError('RefField model must be a BaseField subclass')
+            self._prototype = model(None, self.name, self.required)
+        return self._prototype
+
+    def _spawn(self, value):
+        return self._target()._spawn(value)
+
+    def _shell(self, value):
+        return self._target()._shell(value)
+
+    def __str__(self):
+        return str(self.value)
+
+    def __repr__(self):
+        return self.__str__()
+
+
 class DateField(BaseField):
     """
     Class used to parse and represent dates. It makes use of :mod:`datetime` and :mod:`dateutil`.
@@ -345,50 +1617,110 @@ class DateField(BaseField):
     :arg name: It has the same meaning as in :class:`.BaseField`
     :arg value: It is the raw data that is this object will represent once parsed.
     :arg required: It has the same meaning as in :class:`.BaseField`
-    :arg formatting: Format used to represent date.
+    :arg formatting: Format used to represent date, None takes :attr:`__formatting__` of the class
+        (``"%Y-%m-%dT%H:%M:%SZ"`` unless overridden).
+    :arg coerce: Whether read values of other types (floats or numeric strings) as UNIX timestamps
+        instead of raising :class:`.ParseException`, it can also be a function returning a
+        :class:`datetime.datetime`. None takes :attr:`__coerce__` of the :class:`.NestedField` holding it, if any.
+    :arg tz: :class:`datetime.tzinfo` of the values, e.g. :attr:`datetime.timezone.utc`, None takes
+        :attr:`__tz__` of the class. When set, values are timezone aware datetimes converted to ``tz``,
+        otherwise they are naive datetimes as parsed.
     :raise ParseException: If ``value`` is not valid nor None
 
     :note: Several format's can be in ``formatting``: **auto**: use :meth:`dateutil.parser.parse`,
-        **timestamp**: provide UNIX timestamp and use :meth:`datetime.datetime.utcfromtimestamp` and
-        **custom string**: use any format in compliance with :meth:`datetime.datetime.strptime` valid
-        formats.
-
+        **timestamp**, **timestamp_ms** and **timestamp_us**: provide UNIX timestamp in seconds, milliseconds
+        or microseconds, read as UTC, and **custom string**: use any format in compliance with
+        :meth:`datetime.datetime.strptime` valid formats.
+    :note: Values without timezone are taken as UTC when converted to ``tz`` or encoded as timestamps. Aware
+        values are written in UTC, unless ``formatting`` holds ``%z`` or ``%Z``.
+    :note: Lists whose :attr:`__model__` is a subclass with a timestamp :attr:`__formatting__` convert all
+        their elements at once, with numpy when it is installed.
     """
-    def __init__(self, value = None, name = None, required = True, formatting = "%Y-%m-%dT%H:%M:%SZ"):
+    _coercer = staticmethod(_to_datetime)
+    __formatting__ = "%Y-%m-%dT%H:%M:%SZ"
+    __tz__ = None
+
+    def __init__(self, value = None, name = None, required = True, formatting = None, coerce = None, tz = None):
         super(DateField, self).__init__(value, name, required)
         self.value = None
-        self.formatting = formatting
-
-        field_type = 'str'
-        if formatting == 'timestamp':
-            field_type = 'int'
+        self.formatting = formatting = self.__formatting__ if formatting is None else formatting
+        self.coerce = coerce
+        self.tz = tz = self.__tz__ if tz is None else tz
+
+        if value is None:
+            return
+
+        delta = _TIMESTAMP_DELTAS.get(formatting)
+        if delta is not None:
+            if isinstance(value, integer_types):
+                value = _EPOCH + delta * value
+            elif not coerce:
+                raise ParseException("DateField cannot parse non integer with formatting specified '%s'" % formatting)
+            elif coerce is True:
+                value = self._coerce(value, functools.partial(_to_datetime, unit = _TIMESTAMP_UNITS[formatting]))
+            else:
+                value = self._coerce(value, coerce)
+        elif isinstance(value, string_types):
+            if formatting == 'auto':
+                # dateutil is only needed here, it is imported on first use to keep module import fast
+                from dateutil.parser import parse
+                value = parse(value)
+            else:
+                value = datetime.strptime(value, formatting)
+        elif not coerce:
+            raise ParseException("DateField cannot parse non string with formatting specified '%s'" % formatting)
+        else:
+            value = self._coerce(value, coerce)
+
+        self.value = value if tz is None else _localize(value, tz)
+
+    def _spawn(self, value):
+        return self.__class__(value = value, name = self.name, required = self.required, formatting = self.formatting,
+                              coerce = self.coerce, tz = self.tz)
+
+    def _spawn_all(self, values):
+        unit = _TIMESTAMP_UNITS.get(self.formatting)
+        if unit is None or not values or not set(map(type, values)) <= _INTEGER_TYPES:
+            return super(DateField, self)._spawn_all(values)
+
+        dates = _from_timestamps(values, unit)
+        tz = self.tz
+        if tz is not None:
+            dates = [_localize(date, tz) for date in dates]
+
+        # Objects are copies of this one holding each date, skipping the constructor
+        cls = self.__class__
+        copy = self.__dict__.copy
+        new = object.__new__
+        fields = []
+        for date in dates:
+            obj = new(cls)
+            obj.__dict__ = state = copy()
+            state['value'] = date
+            fields.append(obj)
+        return fields
+
+    def _encoded_value(self):
+        """
+        Returns the value (string, integer or None) representing this date in JSON.
+        """
+        value = self.value
+        if value is None:
+            return None
 
-        if field_type == 'str':
-            if not isinstance(value, basestring) and value is not None:
-                raise ParseException("DateField cannot parse non string with formatting specified '%s'" % self.formatting)
-        elif field_type == 'int':
-            if not isinstance(value, int) and value is not None:
-                raise ParseException("DateField cannot parse non integer with formatting specified '%s'" % self.formatting)
+        unit = _TIMESTAMP_UNITS.get(self.formatting)
+        if unit is not None:
+            return _microseconds(value - (_EPOCH if value.tzinfo is None else _EPOCH_UTC)) // unit
 
-        if value is not None:
-            if self.formatting == 'timestamp':
-                self.value = datetime.utcfromtimestamp(value)
-            elif self.formatting == 'auto':
-                self.value = parse(value)
-            else:
-                self.value = datetime.strptime(value, self.formatting)
+        formatting = self.formatting
+        if formatting == 'auto':
+            formatting = "%Y-%m-%dT%H:%M:%SZ"
+        if value.tzinfo is not None and '%z' not in formatting and '%Z' not in formatting:
+            value = value.astimezone(_UTC)
+        return value.strftime(formatting)
 
     def json_encode(self, **kwargs):
-        if self.value is None:
-            return json.dumps(self.value, **kwargs)
-        else:
-            if self.formatting == 'timestamp':
-                return json.dumps(calendar.timegm(self.value.timetuple()), **kwargs)
-            else:
-                formatting = self.formatting
-                if self.formatting == 'auto':
-                    formatting = "%Y-%m-%dT%H:%M:%SZ"
-
-                return json.dumps(self.value.strftime(formatting), **kwargs)
+        kwargs.pop('cls', None)
+        return json.dumps(self._encoded_value(), cls = BaseEncoder, **kwargs)
 
 from .encoder import BaseEncoder
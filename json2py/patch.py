@@ -0,0 +1,328 @@
+from .models import BaseField, NestedField, ListField, PatchException, _path_getter
+from .encoder import BaseEncoder
+
+__author__ = 'Victor'
+
+_encoder = BaseEncoder()
+
+
+def make_patch(source, target, key = None):
+    """
+    Builds the JSON Patch (RFC 6902) transforming ``source`` into ``target``.
+
+    Fields are compared following the class schema and sub-documents shared by both objects
+    (like the ones left untouched on a ``copy(deep = False)`` clone) are skipped.
+
+    :param source: Original object.
+    :param target: Object ``source`` must become, of the same class.
+    :param key: How to align :class:`.ListField` elements, None compares them by position.
+        A field path (e.g. ``'id'`` or ``'owner.login'``) or a function aligns elements
+        holding the same key, emitting ``move`` operations for reordered ones. A dict maps
+        :class:`.ListField` subclasses to any of the former.
+    :return: List of JSON Patch operations.
+    :raise `PatchException`: If objects are not of the same class or list keys are not unique.
+    :raise ValueError: If objects are too deep or hold themselves, see ``__max_depth__`` on :class:`.BaseField`.
+    """
+    if type(source) is not type(target):
+        raise PatchException('Cannot diff %s against %s' % (type(source).__name__, type(target).__name__))
+
+    ops = []
+    _diff(source, target, ops, key)
+    return ops
+
+
+def apply_patch(obj, patch):
+    """
+    Applies a JSON Patch (RFC 6902) over ``obj``, in place.
+
+    Paths refer to keys in source data (so they honour ``name`` parameter of fields) and
+    values are parsed with the declared fields. Operations are applied in order, if one fails
+    the previous ones are kept.
+
+    :param obj: Object to modify.
+    :param patch: List of JSON Patch operations.
+    :return: ``obj``
+    :raise `PatchException`: If an operation is malformed, its path cannot be resolved or a ``test`` fails.
+    :raise `ParseException`: If a value cannot be parsed by its field.
+    """
+    for op in patch:
+        try:
+            name = op['op']
+            tokens = _parse_pointer(op['path'])
+        except (KeyError, TypeError):
+            raise PatchException('Malformed operation %r' % (op, ))
+
+        if name in ('add', 'replace', 'test'):
+            if 'value' not in op:
+                raise PatchException("'%s' operation requires a value" % name)
+
+        if not tokens:
+            if name == 'test':
+                _test(obj, op['value'])
+            elif name in ('add', 'replace'):
+                type(obj).__init__(obj, op['value'], obj.name, obj.required)
+            else:
+                raise PatchException("Cannot apply '%s' on document root" % name)
+            continue
+
+        parent = _resolve(obj, tokens[:-1], name != 'test')
+        token = tokens[-1]
+        if name == 'add':
+            _put(parent, token, op['value'], True)
+        elif name == 'replace':
+            _put(parent, token, op['value'], False)
+        elif name == 'remove':
+            _remove(parent, token)
+        elif name == 'test':
+            _test(_get(parent, token), op['value'])
+        elif name in ('move', 'copy'):
+            try:
+                origin = _parse_pointer(op['from'])
+            except (KeyError, TypeError):
+                raise PatchException("'%s' operation requires a valid from" % name)
+            if not origin:
+                raise PatchException("Cannot %s document root" % name)
+
+            originParent = _resolve(obj, origin[:-1], name == 'move')
+            field = _get(originParent, origin[-1])
+            if name == 'move':
+                if tokens[:len(origin)] == origin and len(tokens) > len(origin):
+                    raise PatchException('Cannot move a location into one of its children')
+                _remove(originParent, origin[-1])
+            else:
+                field = field.copy()
+            _put(parent, token, None, True, field)
+        else:
+            raise PatchException("Unknown operation '%s'" % name)
+
+    return obj
+
+
+def _escape(token):
+    return token.replace('~', '~0').replace('/', '~1')
+
+
+def _parse_pointer(path):
+    if path == '':
+        return []
+    if not path.startswith('/'):
+        raise PatchException("Invalid JSON pointer '%s'" % path)
+    return [t.replace('~1', '/').replace('~0', '~') for t in path[1:].split('/')]
+
+
+def _key_for(field, key):
+    if isinstance(key, dict):
+        key = key.get(type(field))
+    if key is None or callable(key):
+        return key
+    return _path_getter(key)
+
+
+def _diff(root, target, ops, key):
+    """
+    Appends to ``ops`` the operations turning ``root`` into ``target``.
+
+    Sub-fields are compared with an explicit stack instead of recursive calls, so deep trees do not hit
+    the interpreter recursion limit. The stack holds pairs of fields to compare and operations already
+    built, which are emitted in the same order as a depth-first walk.
+
+    :raise ValueError: If objects are deeper than ``__max_depth__`` of their class or, when there is
+        no limit, they hold themselves.
+    """
+    maxDepth = root.__max_depth__
+    # Without limit, pairs on the current path are tracked to stop on cycles
+    active = set() if maxDepth is None else None
+    stack = [(root, target, '', 1)]
+    while stack:
+        item = stack.pop()
+        if isinstance(item, dict):
+            ops.append(item)
+            continue
+
+        source, target, path, depth = item
+        if source is None:
+            active.discard(path)
+            continue
+        if source is target:
+            continue
+
+        if type(source) is not type(target):
+            ops.append({'op': 'replace', 'path': path, 'value': _encoder.default(target)})
+            continue
+        elif not isinstance(source, (NestedField, ListField)):
+            sourceValue, targetValue = _encoder.default(source), _encoder.default(target)
+            if sourceValue != targetValue or type(sourceValue) is not type(targetValue):
+                ops.append({'op': 'replace', 'path': path, 'value': targetValue})
+            continue
+
+        if maxDepth is not None and depth > maxDepth:
+            raise ValueError('%s exceeds the maximum depth of %d' % (type(root).__name__, maxDepth))
+        if active is not None:
+            pair = (id(source), id(target))
+            if pair in active:
+                raise ValueError('Circular reference detected')
+            active.add(pair)
+            stack.append((None, None, pair, depth))
+
+        if isinstance(source, NestedField):
+            items = _diff_nested(source, target, path, depth + 1)
+        else:
+            keyFunc = _key_for(source, key)
+            if keyFunc is None:
+                items = _diff_list(source.value, target.value, path, depth + 1)
+            else:
+                items = _diff_keyed_list(source.value, target.value, path, depth + 1, keyFunc)
+        stack.extend(reversed(items))
+
+
+def _diff_nested(source, target, path, depth):
+    sourceFields, targetFields = source.value, target.value
+    if not sourceFields or not targetFields:
+        if sourceFields or targetFields:
+            return [{'op': 'replace', 'path': path, 'value': _encoder.default(target)}]
+        return []
+
+    items = []
+    for fieldName, field in sourceFields.items():
+        fieldPath = path + '/' + _escape(fieldName if field.name is None else field.name)
+        if fieldName in targetFields:
+            items.append((field, targetFields[fieldName], fieldPath, depth))
+        else:
+            items.append({'op': 'remove', 'path': fieldPath})
+
+    for fieldName, field in targetFields.items():
+        if fieldName not in sourceFields:
+            fieldPath = path + '/' + _escape(fieldName if field.name is None else field.name)
+            items.append({'op': 'add', 'path': fieldPath, 'value': _encoder.default(field)})
+    return items
+
+
+def _diff_list(source, target, path, depth):
+    common = min(len(source), len(target))
+    items = [(source[i], target[i], '%s/%d' % (path, i), depth) for i in range(common)]
+    for i in range(common, len(target)):
+        items.append({'op': 'add', 'path': '%s/%d' % (path, i), 'value': _encoder.default(target[i])})
+    for i in reversed(range(common, len(source))):
+        items.append({'op': 'remove', 'path': '%s/%d' % (path, i)})
+    return items
+
+
+def _diff_keyed_list(source, target, path, depth, keyFunc):
+    sourceKeys = [keyFunc(e) for e in source]
+    targetKeys = [keyFunc(e) for e in target]
+    wanted = set(targetKeys)
+    if len(wanted) != len(targetKeys) or len(set(sourceKeys)) != len(sourceKeys):
+        raise PatchException('List keys must be unique to align elements')
+
+    # Simulate the list while operations are emitted, so indexes stay valid
+    items = []
+    current = []
+    for i in reversed(range(len(source))):
+        if sourceKeys[i] not in wanted:
+            items.append({'op': 'remove', 'path': '%s/%d' % (path, i)})
+        else:
+            current.append((sourceKeys[i], source[i]))
+    current.reverse()
+    currentKeys = [k for k, e in current]
+
+    for i, targetKey in enumerate(targetKeys):
+        if i < len(currentKeys) and currentKeys[i] == targetKey:
+            j = i
+        else:
+            try:
+                j = currentKeys.index(targetKey, i)
+            except ValueError:
+                j = None
+
+        elementPath = '%s/%d' % (path, i)
+        if j is None:
+            items.append({'op': 'add', 'path': elementPath, 'value': _encoder.default(target[i])})
+            currentKeys.insert(i, targetKey)
+            current.insert(i, (targetKey, target[i]))
+            continue
+
+        if j != i:
+            items.append({'op': 'move', 'from': '%s/%d' % (path, j), 'path': elementPath})
+            currentKeys.insert(i, currentKeys.pop(j))
+            current.insert(i, current.pop(j))
+        items.append((current[i][1], target[i], elementPath, depth))
+    return items
+
+
+def _list_index(field, token, insert):
+    if insert and token == '-':
+        return len(field.value)
+    if not token.isdigit() or (len(token) > 1 and token[0] == '0'):
+        raise PatchException("Invalid list index '%s'" % token)
+    index = int(token)
+    if index > len(field.value) or (index == len(field.value) and not insert):
+        raise PatchException("List index '%s' out of range" % token)
+    return index
+
+
+def _nested_entry(field, token):
+    try:
+        return type(field)._schema().by_key[token]
+    except KeyError:
+        raise PatchException("'%s' is not a field of %s" % (token, type(field).__name__))
+
+
+def _get(field, token):
+    if isinstance(field, NestedField):
+        fieldName, proto = _nested_entry(field, token)
+        try:
+            return field.value[fieldName]
+        except KeyError:
+            raise PatchException("'%s' not found" % token)
+    elif isinstance(field, ListField):
+        return field.value[_list_index(field, token, False)]
+    raise PatchException("Cannot resolve '%s' on %s" % (token, type(field).__name__))
+
+
+def _resolve(field, tokens, changed = False):
+    for token in tokens:
+        if changed and isinstance(field, ListField):
+            # Fields of the elements below are about to change, so indexes over them would go stale
+            field.reindex()
+        field = _get(field, token)
+    return field
+
+
+def _put(field, token, value, insert, built = None):
+    if isinstance(field, NestedField):
+        fieldName, proto = _nested_entry(field, token)
+        if not insert and fieldName not in field.value:
+            raise PatchException("'%s' not found" % token)
+        if built is not None:
+            value = _encoder.default(built)
+        field.value[fieldName] = proto._spawn(value)
+    elif isinstance(field, ListField):
+        index = _list_index(field, token, insert)
+        elementClass = field._element_class()
+        if built is None or not isinstance(built, elementClass):
+            built = elementClass(value if built is None else _encoder.default(built))
+        if insert:
+            field.insert(index, built)
+        else:
+            field[index] = built
+    else:
+        raise PatchException("Cannot resolve '%s' on %s" % (token, type(field).__name__))
+
+
+def _remove(field, token):
+    if isinstance(field, NestedField):
+        fieldName, proto = _nested_entry(field, token)
+        if fieldName not in field.value:
+            raise PatchException("'%s' not found" % token)
+        if proto.required:
+            raise PatchException("Required field '%s' cannot be removed" % token)
+        field.value[fieldName] = proto._spawn(None)
+    elif isinstance(field, ListField):
+        del field[_list_index(field, token, False)]
+    else:
+        raise PatchException("Cannot resolve '%s' on %s" % (token, type(field).__name__))
+
+
+def _test(field, value):
+    if not isinstance(field, BaseField) or _encoder.default(field) != value:
+        raise PatchException('Test operation failed')
@@ -0,0 +1,380 @@
+import keyword
+import re
+
+from .models import TextField, NumberField, IntegerField, FloatField, BooleanField, DateField, \
+    NestedField, ListField, UnionField, RefField, SchemaException, \
+    string_types, integer_types, number_types
+
+__author__ = 'Victor'
+
+DIALECT = 'https://json-schema.org/draft/2020-12/schema'
+ISO_FORMAT = '%Y-%m-%dT%H:%M:%SZ'
+# Non standard keyword keeping DateField formatting, so compiled models parse dates the same way
+FORMATTING = 'x-json2py-formatting'
+
+_NOT_IDENTIFIER = re.compile(r'\W')
+
+
+def json_schema(cls):
+    """
+    Generates the JSON Schema (draft 2020-12) describing data accepted by ``cls``.
+
+    Keys follow ``name`` parameter of fields, optional fields are left out of ``required``, every field
+    and list element accepts ``null`` (as json2py does) and :class:`.DateField` formats are described by
+    ``format`` (``date-time``, ``date`` or ``unix-time``) plus ``x-json2py-formatting``. Documents other
+    than ``cls`` are placed on ``$defs``, so models referencing themselves are supported.
+
+    :param cls: :class:`.BaseField` subclass.
+    :return: dict holding the schema.
+    """
+    exporter = _Exporter(cls)
+    schema = {'$schema': DIALECT, 'title': cls.__name__}
+    schema.update(exporter.field(cls(None), nullable = False))
+    if exporter.defs:
+        schema['$defs'] = exporter.defs
+    return schema
+
+
+def compile_schema(schema, name = None):
+    """
+    Builds json2py model classes from a JSON Schema, so data can be validated by decoding it with them.
+
+    Objects become :class:`.NestedField` subclasses (property names that are not valid attribute
+    names are kept through ``name`` parameter), arrays :class:`.ListField` subclasses, ``anyOf``/``oneOf``
+    of objects :class:`.UnionField` subclasses (discriminated by the ``discriminator`` mapping or by a
+    ``const`` property every alternative has) and ``$ref`` pointers inside the schema are followed,
+    recursively if needed.
+
+    .. code-block:: python
+
+        Order = compile_schema(json.load(open('order.schema.json')))
+        order = Order(payload)  # Raises ParseException or LookupError on invalid data
+
+    :param schema: dict holding the schema.
+    :param name: Name of the root class, ``title`` of the schema (or ``Model``) when not given.
+    :return: Class built for the root of the schema.
+    :raise `SchemaException`: If the schema has types without json2py counterpart.
+    :note: Only types and ``required`` are checked. Other keywords (``minimum``, ``pattern``, ``enum``...)
+     are ignored and ``null`` is accepted for every field, as json2py does.
+    """
+    compiler = _Compiler(schema)
+    className = _class_name(name or schema.get('title') or 'Model')
+    return compiler.element_class(compiler.field(schema, className, None, True, '#'), className)
+
+
+def _class_name(text):
+    name = ''.join(part[:1].upper() + part[1:] for part in _NOT_IDENTIFIER.split(text) if part)
+    if not name or name[0].isdigit():
+        name = 'Model' + name
+    return name
+
+
+def _alternatives(node):
+    """
+    Returns the alternatives of an ``anyOf``/``oneOf`` node other than ``null``, or None if it has none.
+    """
+    alternatives = node.get('anyOf', node.get('oneOf'))
+    if alternatives is None:
+        return None
+    return [a for a in alternatives if not isinstance(a, dict) or a.get('type') not in ('null', ['null'])]
+
+
+def _value_type(value):
+    if isinstance(value, bool):
+        return 'boolean'
+    elif isinstance(value, integer_types):
+        return 'integer'
+    elif isinstance(value, number_types):
+        return 'number'
+    elif isinstance(value, string_types):
+        return 'string'
+    return None
+
+
+def _escape(token):
+    return token.replace('~', '~0').replace('/', '~1')
+
+
+def _nullable(schema):
+    fieldType = schema.get('type')
+    if fieldType is not None:
+        schema = dict(schema)
+        schema['type'] = [fieldType, 'null']
+        return schema
+    if '$ref' in schema:
+        return {'anyOf': [schema, {'type': 'null'}]}
+    return schema
+
+
+def _date_schema(formatting):
+    if formatting == 'timestamp':
+        return {'type': 'integer', 'format': 'unix-time'}
+    if formatting in ('timestamp_ms', 'timestamp_us'):
+        return {'type': 'integer', 'format': 'unix-time', FORMATTING: formatting}
+    if formatting == 'auto':
+        return {'type': 'string', 'format': 'date-time'}
+    schema = {'type': 'string', FORMATTING: formatting}
+    if formatting == ISO_FORMAT:
+        schema['format'] = 'date-time'
+    elif formatting == '%Y-%m-%d':
+        schema['format'] = 'date'
+    return schema
+
+
+class _Exporter(object):
+    def __init__(self, root):
+        self.root = root
+        self.defs = {}
+        self.refs = {}
+
+    def field(self, field, nullable = True):
+        if isinstance(field, RefField):
+            field = field._target()
+
+        if isinstance(field, NestedField):
+            schema = self.document(type(field))
+        elif isinstance(field, ListField):
+            schema = {'type': 'array', 'items': self.field(type(field)._element())}
+        elif isinstance(field, UnionField):
+            models = type(field).__models__ or {}
+            alternatives = [self.document(model) for model in models.values()]
+            schema = {'anyOf': alternatives + [{'type': 'null'}] if nullable else alternatives}
+            if not type(field).__fallback__:
+                # OpenAPI keyword, compile_schema reads it back to build the union
+                mapping = dict((value, self.document(model)['$ref']) for value, model in models.items()
+                               if isinstance(value, string_types))
+                schema['discriminator'] = {'propertyName': type(field).__discriminator__, 'mapping': mapping}
+            return schema
+        elif isinstance(field, DateField):
+            schema = _date_schema(field.formatting)
+        elif isinstance(field, BooleanField):
+            schema = {'type': 'boolean'}
+        elif isinstance(field, IntegerField):
+            schema = {'type': 'integer'}
+        elif isinstance(field, NumberField):
+            schema = {'type': 'number'}
+        elif isinstance(field, TextField):
+            schema = {'type': 'string'}
+        else:
+            return {}
+        return _nullable(schema) if nullable else schema
+
+    def document(self, cls):
+        """
+        Returns the schema of a :class:`.NestedField` subclass: inline for the root, a reference otherwise.
+        """
+        ref = self.refs.get(cls)
+        if ref is not None:
+            return {'$ref': ref}
+        if cls is self.root:
+            self.refs[cls] = '#'
+            return self.properties(cls)
+
+        name = cls.__name__
+        while name in self.defs:
+            name += '_'
+        ref = self.refs[cls] = '#/$defs/' + name
+        self.defs[name] = None  # Reserved while its fields, which may reference it, are described
+        self.defs[name] = self.properties(cls)
+        return {'$ref': ref}
+
+    def properties(self, cls):
+        properties = {}
+        required = []
+        for fieldName, key, field in cls._schema().fields:
+            properties[key] = self.field(field)
+            if field.required:
+                required.append(key)
+        schema = {'type': 'object', 'properties': properties}
+        if required:
+            schema['required'] = required
+        return schema
+
+
+# Attribute names that cannot hold fields on NestedField subclasses
+_RESERVED = frozenset(dir(NestedField)) | frozenset(['name', 'value', 'required'])
+_TYPES = ('object', 'array', 'string', 'integer', 'number', 'boolean')
+_DATE_FORMATS = {'date-time': 'auto', 'date': '%Y-%m-%d'}
+
+
+class _Compiler(object):
+    def __init__(self, root):
+        self.root = root
+        self.classes = {}
+        self.building = set()
+
+    def resolve(self, ref):
+        """
+        Returns the node of the schema referenced by a JSON pointer like ``#/$defs/User``.
+        """
+        if not ref.startswith('#'):
+            raise SchemaException("Only references inside the schema are supported, found '%s'" % ref)
+        node = self.root
+        for token in ref[1:].split('/')[1:]:
+            token = token.replace('~1', '/').replace('~0', '~')
+            try:
+                node = node[int(token)] if isinstance(node, list) else node[token]
+            except (KeyError, IndexError, ValueError, TypeError):
+                raise SchemaException("Cannot resolve reference '%s'" % ref)
+        return node
+
+    def kind(self, node, pointer):
+        """
+        :return: ``(kind, node)`` where kind is ``'ref'``, ``'union'`` or a JSON type other than null and
+            node is the schema holding the rest of keywords, once nullable alternatives are removed.
+        """
+        if not isinstance(node, dict):
+            raise SchemaException('Schema at %s must be an object' % pointer)
+        if '$ref' in node:
+            return 'ref', node
+
+        alternatives = _alternatives(node)
+        if alternatives is not None:
+            if len(alternatives) == 1:
+                return self.kind(alternatives[0], pointer)
+            return 'union', node
+
+        types = node.get('type')
+        if isinstance(types, list):
+            types = [t for t in types if t != 'null']
+            if sorted(types) == ['integer', 'number']:
+                types = ['number']
+            types = types[0] if len(types) == 1 else None
+        elif types is None:
+            types = 'object' if 'properties' in node else 'array' if 'items' in node else None
+            values = [node['const']] if 'const' in node else node.get('enum') or ()
+            valueTypes = set(_value_type(value) for value in values if value is not None)
+            if types is None and len(valueTypes) == 1:
+                types = valueTypes.pop()
+
+        if types not in _TYPES:
+            raise SchemaException('Schema at %s has no type json2py can map: %s' % (pointer, node.get('type')))
+        return types, node
+
+    def field(self, node, name, key, required, pointer):
+        """
+        Returns the prototype field for ``node``.
+
+        :param name: Name for the class built, if any.
+        :param key: ``name`` parameter of the field.
+        :param pointer: JSON pointer to ``node``, identifying the class built for it.
+        """
+        kind, node = self.kind(node, pointer)
+        if kind == 'ref':
+            ref = node['$ref']
+            target = self.resolve(ref)
+            refName = name if ref == '#' else _class_name(ref.rsplit('/', 1)[-1])
+            return self.field(target, refName, key, required, ref)
+
+        if kind in ('object', 'array', 'union'):
+            cls = self.classes.get(pointer)
+            if cls is None:
+                cls = self.model(kind, node, name, pointer)
+            if cls in self.building:
+                # Still being declared, so it is referenced until it can be instantiated
+                return RefField(cls, name = key, required = required)
+            return cls(None, key, required)
+
+        if kind == 'string':
+            formatting = node.get(FORMATTING) or _DATE_FORMATS.get(node.get('format'))
+            if formatting:
+                return DateField(name = key, required = required, formatting = formatting)
+            return TextField(name = key, required = required)
+        elif kind == 'integer':
+            if node.get('format') == 'unix-time':
+                return DateField(name = key, required = required, formatting = node.get(FORMATTING) or 'timestamp')
+            return IntegerField(name = key, required = required)
+        elif kind == 'number':
+            return FloatField(name = key, required = required)
+        return BooleanField(name = key, required = required)
+
+    def model(self, kind, node, name, pointer):
+        """
+        Builds the class for an object, array or union node. The class is registered before its fields are
+        built, so nodes referencing it, directly or not, get the class being built.
+        """
+        base = {'object': NestedField, 'array': ListField, 'union': UnionField}[kind]
+        cls = self.classes[pointer] = type(str(name), (base, ), {})
+        self.building.add(cls)
+        try:
+            if kind == 'object':
+                self.declare_fields(cls, node, name, pointer)
+            elif kind == 'array':
+                items = node.get('items')
+                if not isinstance(items, dict) or not items:
+                    raise SchemaException('Array at %s must declare the schema of its items' % pointer)
+                cls.__model__ = self.element_class(self.field(items, name + 'Item', None, True, pointer + '/items'), name + 'Item')
+            else:
+                self.declare_union(cls, node, name, pointer)
+        finally:
+            self.building.discard(cls)
+        return cls
+
+    def declare_fields(self, cls, node, name, pointer):
+        required = set(node.get('required', ()))
+        used = set()
+        for key, subschema in node.get('properties', {}).items():
+            attr = _NOT_IDENTIFIER.sub('_', key)
+            if not attr or attr[0].isdigit() or attr[0] == '_' or keyword.iskeyword(attr) or attr in _RESERVED:
+                attr = 'field_' + attr
+            while attr in used:
+                attr += '_'
+            used.add(attr)
+
+            field = self.field(subschema, name + _class_name(attr), None if attr == key else key, key in required,
+                               pointer + '/properties/' + _escape(key))
+            setattr(cls, attr, field)
+
+    def declare_union(self, cls, node, name, pointer):
+        models = []
+        for i, alternative in enumerate(_alternatives(node)):
+            model = self.element_class(self.field(alternative, '%sOption%d' % (name, i + 1), None, True,
+                                                  '%s/anyOf/%d' % (pointer, i)), name)
+            if not issubclass(model, NestedField):
+                raise SchemaException('Alternatives at %s must be objects' % pointer)
+            models.append((alternative, model))
+
+        discriminator = node.get('discriminator')
+        if isinstance(discriminator, dict) and discriminator.get('mapping'):
+            cls.__discriminator__ = discriminator['propertyName']
+            cls.__models__ = dict((value, self.element_class(self.field({'$ref': ref}, name, None, True, ref), name))
+                                  for value, ref in discriminator['mapping'].items())
+            return
+
+        # Discriminated when every alternative fixes the value of the same property
+        constants = [self.constants(alternative) for alternative, model in models]
+        common = set(constants[0]).intersection(*constants[1:]) if constants else set()
+        discriminator = sorted(common)[0] if common else None
+        if discriminator is not None:
+            cls.__discriminator__ = discriminator
+            cls.__models__ = dict((c[discriminator], model) for c, (alternative, model) in zip(constants, models))
+        else:
+            cls.__discriminator__ = None
+            cls.__models__ = dict((model.__name__, model) for alternative, model in models)
+            cls.__fallback__ = [model for alternative, model in models]
+
+    def constants(self, node):
+        """
+        Returns a dict mapping properties of an object node to the only value they accept.
+        """
+        while '$ref' in node:
+            node = self.resolve(node['$ref'])
+        result = {}
+        for key, subschema in node.get('properties', {}).items():
+            if not isinstance(subschema, dict):
+                continue
+            if 'const' in subschema:
+                result[key] = subschema['const']
+            elif len(subschema.get('enum', ())) == 1:
+                result[key] = subschema['enum'][0]
+        return result
+
+    def element_class(self, field, name):
+        """
+        Returns the class building objects like the prototype ``field``.
+        """
+        if isinstance(field, RefField):
+            return field.model
+        if isinstance(field, DateField) and field.formatting != ISO_FORMAT:
+            return type(str(name), (DateField, ), {'__formatting__': field.formatting})
+        return type(field)
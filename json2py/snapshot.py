@@ -0,0 +1,139 @@
+import mmap
+import struct
+import sys
+from array import array
+
+from .encoder import BaseEncoder
+
+__author__ = 'Victor'
+
+MAGIC = b'J2PYSNAP'
+VERSION = 1
+_HEADER = struct.Struct('<8sIIQ')
+
+
+def write_snapshot(obj, path):
+    """
+    Writes the elements of a :class:`.ListField` into a snapshot file, which can be mapped
+    into memory with :func:`open_snapshot` to read elements lazily.
+
+    The file holds a header, a table of ``len(obj) + 1`` little endian 64 bits offsets and every
+    element encoded as compact JSON, one after the other.
+
+    :param obj: :class:`.ListField` to store.
+    :param path: Path of the file to write.
+    :return: Number of elements written.
+    """
+    encode = BaseEncoder().encode
+    rows = [encode(element).encode('utf-8') for element in obj]
+
+    offsets = array('Q', [0])
+    position = 0
+    for row in rows:
+        position += len(row)
+        offsets.append(position)
+    if sys.byteorder != 'little':
+        offsets.byteswap()
+
+    with open(path, 'wb') as f:
+        f.write(_HEADER.pack(MAGIC, VERSION, 0, len(rows)))
+        f.write(offsets.tobytes())
+        for row in rows:
+            f.write(row)
+    return len(rows)
+
+
+def open_snapshot(cls, path):
+    """
+    Maps a snapshot file written by :func:`write_snapshot` into memory.
+
+    Pages are mapped read-only, so processes opening the same file share them through the OS page cache.
+
+    :param cls: :class:`.ListField` subclass whose :attr:`__model__` builds the elements.
+    :param path: Path of the snapshot file.
+    :return: :class:`.SnapshotView` over the file.
+    """
+    with open(path, 'rb') as f:
+        buf = mmap.mmap(f.fileno(), 0, access = mmap.ACCESS_READ)
+    return SnapshotView(cls, buf, owner = buf)
+
+
+class SnapshotView(object):
+    """
+    Read-only sequence over a snapshot, building elements only when they are accessed.
+
+    :arg cls: :class:`.ListField` subclass whose :attr:`__model__` builds the elements.
+    :arg buf: Object supporting the buffer protocol holding the snapshot, e.g. an :class:`mmap.mmap`
+        or the ``buf`` of a :class:`multiprocessing.shared_memory.SharedMemory`.
+    :arg owner: Object closed along with this view, if any.
+    :raise ValueError: If ``buf`` does not hold a snapshot.
+    """
+    def __init__(self, cls, buf, owner = None):
+        self.cls = cls
+        self._owner = owner
+        self._buffer = memoryview(buf)
+
+        if len(self._buffer) < _HEADER.size:
+            raise ValueError('Buffer is too small to hold a snapshot')
+        magic, version, reserved, count = _HEADER.unpack_from(self._buffer, 0)
+        if magic != MAGIC or version != VERSION:
+            raise ValueError('Buffer does not hold a version %d snapshot' % VERSION)
+
+        self._count = count
+        self._data = _HEADER.size + 8 * (count + 1)
+        table = self._buffer[_HEADER.size:self._data]
+        if sys.byteorder == 'little':
+            self._offsets = table.cast('Q')
+        else:
+            self._offsets = array('Q', table.tobytes())
+            self._offsets.byteswap()
+
+    def row(self, i):
+        """
+        Returns the JSON of the i-th element, as bytes, without building it.
+        """
+        if i < 0:
+            i += self._count
+        if not 0 <= i < self._count:
+            raise IndexError('snapshot index out of range')
+        return self._buffer[self._data + self._offsets[i]:self._data + self._offsets[i + 1]].tobytes()
+
+    def load(self, start = 0, stop = None):
+        """
+        Builds the elements from ``start`` up to ``stop`` into a new object of :attr:`cls`.
+        """
+        start, stop, step = slice(start, stop).indices(self._count)
+        rows = [self.row(i) for i in range(start, max(start, stop))]
+        return self.cls._loads((b'[' + b','.join(rows) + b']').decode('utf-8'))
+
+    def close(self):
+        """
+        Releases the underlying buffer, elements already built are still usable.
+        """
+        if isinstance(self._offsets, memoryview):
+            self._offsets.release()
+        self._buffer.release()
+        if self._owner is not None:
+            self._owner.close()
+            self._owner = None
+
+    def __len__(self):
+        return self._count
+
+    def __getitem__(self, key):
+        if isinstance(key, slice):
+            if key.step not in (None, 1):
+                raise ValueError('snapshot slices do not support steps')
+            return self.load(key.start, key.stop)
+        return self.cls._element_class()._loads(self.row(key).decode('utf-8'))
+
+    def __iter__(self):
+        model = self.cls._element_class()
+        for i in range(self._count):
+            yield model._loads(self.row(i).decode('utf-8'))
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
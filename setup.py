@@ -23,7 +23,6 @@ setup(
         'Programming Language :: Python :: 3.5'
     ],
     install_requires = [
-        'python-dateutil==2.4.2',
-        'future==0.15.2'
+        'python-dateutil==2.4.2'
     ]
 )
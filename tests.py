@@ -1,5 +1,13 @@
 import unittest
 import json
+import copy
+import pickle
+import threading
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
 from json2py.models import TextField
 from json2py.models import IntegerField
 from json2py.models import FloatField
@@ -9,8 +17,21 @@ from json2py.models import BooleanField
 from json2py.models import ParseException
 from json2py.models import InvalidAttribute
 from json2py.models import DateField
-
-from datetime import datetime
+from json2py.models import DecimalField
+from json2py.models import BigIntField
+from json2py.models import PatchException
+from json2py.models import UnionField
+from json2py.models import RefField
+from json2py.models import SchemaException
+from json2py.schema import compile_schema
+from json2py.encoder import BaseEncoder
+from json2py.decoder import ModelDecoder
+from json2py.decoder import BaseDecoder
+from json2py.cache import DecodeCache
+from json2py.snapshot import SnapshotView
+
+from datetime import datetime, timedelta, timezone
+from decimal import Decimal
 __author__ = 'Victor'
 
 
@@ -191,12 +212,64 @@ class NestedTest(unittest.TestCase):
         self.assertEqual(NestedField({}).json_encode(), '{}')
         self.assertEqual(json.loads(self.testObj.json_encode()), json.loads('{"id": 1234, "clave": 1, "value": "aValue"}'))
 
+    def test_access(self):
+        obj = NestedObjTest({'id': 1234, 'clave': 1, 'value': 'aValue'})
+        self.assertEqual(obj['key'].value, 1)
+        self.assertEqual(sorted(obj.value), ['id', 'key', 'valor'])
+        self.assertIsNone(obj.name)
+
+        obj.key = IntegerField(2, name = 'clave')
+        self.assertEqual(obj.value['key'].value, 2)
+        obj['valor'] = TextField('other', name = 'value')
+        self.assertEqual(obj.valor.value, 'other')
+        self.assertEqual(json.loads(obj.json_encode()), {'id': 1234, 'clave': 2, 'value': 'other'})
+        self.assertIsNone(NestedObjTest.key.value)
+
+        self.assertIsNone(NestedObjTest(None).id.value)
+        self.assertIsNot(NestedObjTest(None).id, NestedObjTest.id)
+
+        class OptionalOwner(NestedField):
+            id = IntegerField()
+            owner = OwnerObjTest(name = 'user', required = False)
+
+        # Absent optional documents read as empty ones, down to their fields
+        obj = OptionalOwner({'id': 1})
+        self.assertIsNone(obj.owner.login.value)
+        self.assertIsNone(obj.owner.since.value)
+        self.assertRaises(AttributeError, getattr, obj.owner, 'missing')
+        self.assertEqual(json.loads(obj.json_encode()), {'id': 1, 'user': {}})
+        self.assertIsInstance(NestedObjTest.id, IntegerField)
+
+        class Holder(object):
+            proto = TextField('x')
+        self.assertEqual(Holder().proto.value, 'x')
+
+    def test_methods(self):
+        class WithMethods(NestedObjTest):
+            def double(self):
+                return self.id.value * 2
+
+        self.assertEqual(WithMethods({'id': 2, 'clave': 1, 'value': ''}).double(), 4)
+
     def test_forbidden(self):
         ## Tricky test
         self.assertRaises(InvalidAttribute, ForbiddenNameTest.__new__, ForbiddenNameTest)
         self.assertRaises(InvalidAttribute, ForbiddenValueTest.__new__, ForbiddenValueTest)
         self.assertRaises(InvalidAttribute, ForbiddenRequiredTest.__new__, ForbiddenRequiredTest)
 
+        class ForbiddenMethods(NestedField):
+            copy = TextField()
+            diff = IntegerField()
+            title = TextField()
+        self.assertRaises(InvalidAttribute, ForbiddenMethods, {'copy': 'c', 'diff': 1, 'title': 't'})
+
+        class Renamed(NestedField):
+            copy_text = TextField(name = 'copy')
+
+            def merge(self, other):
+                return super(Renamed, self).merge(other)
+        self.assertEqual(Renamed({'copy': 'c'}).json_encode(), '{"copy":"c"}')
+
 
 class ListTest(unittest.TestCase):
     def __init__(self, *args, **kwargs):
@@ -246,6 +319,59 @@ class ListTest(unittest.TestCase):
         self.assertEqual(self.testObj[-1].key.value, 2)    # clave field
         self.assertEqual(self.testObj[-1].valor.value, 'anotherValue')
 
+    def test_slice_class(self):
+        part = self.testObj[1:]
+        self.assertIsInstance(part, ListObjTest)
+        self.assertIs(part[0], self.testObj[1])
+        part.append(self.testObj[0])
+        self.assertEqual(len(self.testObj), 2)
+        self.assertEqual(json.loads(part.json_encode())[1]['id'], 1234)
+
+    def test_mutation(self):
+        obj = self.testObj.copy(deep = False)
+        obj.insert(0, obj[1])
+        self.assertEqual([e.id.value for e in obj], [4321, 1234, 4321])
+        self.assertEqual(obj.pop().id.value, 4321)
+        self.assertEqual(obj.pop(0).id.value, 4321)
+
+        obj.extend_raw([{'id': 1, 'clave': 3, 'value': 'c'}, {'id': 2, 'clave': 4, 'value': None}])
+        self.assertEqual([e.id.value for e in obj], [1234, 1, 2])
+        self.assertRaises(ParseException, obj.extend_raw, [{'id': 3, 'clave': 5, 'value': 'd'}, 'bad'])
+        self.assertEqual(len(obj), 3)
+
+    def test_sort(self):
+        obj = self.testObj.copy(deep = False)
+        obj.sort(key = lambda e: e.key.value, reverse = True)
+        self.assertEqual([e.key.value for e in obj], [2, 1])
+        obj.sort(cmp = lambda a, b: a - b, key = lambda e: e.key.value)
+        self.assertEqual([e.key.value for e in obj], [1, 2])
+        obj.sort(cmp = lambda a, b: b.id.value - a.id.value)
+        self.assertEqual([e.key.value for e in obj], [2, 1])
+
+    def test_sort_by(self):
+        obj = ListObjTest([
+            {'id': 3, 'clave': 1, 'value': 'b'},
+            {'id': 1, 'clave': 2, 'value': None},
+            {'id': 2, 'clave': 1, 'value': 'a'},
+        ])
+        obj.sort_by('id')
+        self.assertEqual([e.id.value for e in obj], [1, 2, 3])
+        obj.sort_by('valor')
+        self.assertEqual([e.id.value for e in obj], [2, 3, 1])
+        obj.sort_by('valor', reverse = True)
+        self.assertEqual([e.id.value for e in obj], [3, 2, 1])
+        obj.sort_by('key', 'id')
+        self.assertEqual([e.id.value for e in obj], [2, 3, 1])
+        self.assertRaises(TypeError, obj.sort_by)
+        self.assertEqual(len(obj), 3)
+
+        repos = RepoListObjTest([
+            {'id': 1, 'name': 'a', 'user': {'login': 'zed', 'since': 0}},
+            {'id': 2, 'name': 'b', 'user': {'login': 'abe', 'since': 0}},
+        ])
+        repos.sort_by('owner.login')
+        self.assertEqual([e.id.value for e in repos], [2, 1])
+
     def test_encode(self):
         self.assertEqual(ListObjTest([]).json_encode(), '[]')
         self.assertEqual(json.loads(self.testObj.json_encode()), json.loads('[{"id": 1234, "clave": 1, "value": "aValue"},{"id": 4321, "clave": 2, "value": "anotherValue"}]'))
@@ -288,5 +414,1424 @@ class DateTest(unittest.TestCase):
             '"2000-01-02 03:04:05"'
         )
 
+class MillisDateTest(DateField):
+    __formatting__ = 'timestamp_ms'
+
+
+class MillisListTest(ListField):
+    __model__ = MillisDateTest
+
+
+class MadridDateTest(DateField):
+    __formatting__ = 'timestamp'
+    __tz__ = timezone(timedelta(hours = 2))
+
+
+class MadridListTest(ListField):
+    __model__ = MadridDateTest
+
+
+class TimezoneTest(unittest.TestCase):
+    def test_timestamps(self):
+        utc = timezone.utc
+        self.assertEqual(DateField(1458854751123, formatting = 'timestamp_ms').value, datetime(2016, 3, 24, 21, 25, 51, 123000))
+        self.assertEqual(DateField(1458854751123456, formatting = 'timestamp_us').value, datetime(2016, 3, 24, 21, 25, 51, 123456))
+        self.assertEqual(DateField(-1, formatting = 'timestamp').value, datetime(1969, 12, 31, 23, 59, 59))
+        self.assertEqual(DateField(1458854751123, formatting = 'timestamp_ms').json_encode(), '1458854751123')
+        self.assertEqual(DateField(-1, formatting = 'timestamp_us').json_encode(), '-1')
+        self.assertEqual(DateField(1458854751123456, formatting = 'timestamp_us').json_encode(), '1458854751123456')
+        self.assertEqual(DateField('1458854751123.5', formatting = 'timestamp_ms', coerce = True).value,
+                         datetime(2016, 3, 24, 21, 25, 51, 123500))
+        self.assertRaises(ParseException, DateField, 1458854751.5, formatting = 'timestamp_ms')
+
+        date = DateField(1458854751, formatting = 'timestamp', tz = utc)
+        self.assertEqual(date.value, datetime(2016, 3, 24, 21, 25, 51, tzinfo = utc))
+        self.assertEqual(date.json_encode(), '1458854751')
+        madrid = MadridDateTest(1458854751)
+        self.assertEqual(madrid.value.hour, 23)
+        self.assertEqual(madrid.value, date.value)
+        self.assertEqual(madrid.json_encode(), '1458854751')
+        self.assertEqual(madrid._spawn(0).value.utcoffset(), timedelta(hours = 2))
+
+    def test_strings(self):
+        utc = timezone.utc
+        date = DateField('2000-01-02T03:04:05Z', tz = utc)
+        self.assertEqual(date.value, datetime(2000, 1, 2, 3, 4, 5, tzinfo = utc))
+        self.assertEqual(date.json_encode(), '"2000-01-02T03:04:05Z"')
+
+        date = DateField('2000-01-02 03:04:05+02:00', formatting = 'auto', tz = utc)
+        self.assertEqual(date.value, datetime(2000, 1, 2, 1, 4, 5, tzinfo = utc))
+        self.assertEqual(date.json_encode(), '"2000-01-02T01:04:05Z"')
+
+        date = DateField('2000-01-02 03:04:05+0200', formatting = '%Y-%m-%d %H:%M:%S%z')
+        self.assertEqual(date.json_encode(), '"2000-01-02 03:04:05+0200"')
+        date = DateField('2000-01-02 03:04:05+0200', formatting = '%Y-%m-%d %H:%M:%S%z', tz = utc)
+        self.assertEqual(date.value.utcoffset(), timedelta(0))
+        self.assertEqual(date.value.hour, 1)
+        self.assertEqual(date.json_encode(), '"2000-01-02 01:04:05+0000"')
+        self.assertEqual(DateField('2000-01-02 03:04:05+02:00', formatting = 'auto', tz = utc).value.utcoffset(), timedelta(0))
+        date = DateField('2000-01-02 03:04:05', formatting = '%Y-%m-%d %H:%M:%S', tz = timezone(timedelta(hours = -5)))
+        self.assertEqual(date.value.hour, 22)
+        self.assertEqual(date.json_encode(), '"2000-01-02 03:04:05"')
+
+    def test_bulk(self):
+        values = [1458854751123 + i * 1000 for i in range(200)] + [-1, 0]
+        dates = MillisListTest(values)
+        self.assertEqual([d.value for d in dates], [MillisDateTest(v).value for v in values])
+        self.assertIsInstance(dates[0], MillisDateTest)
+        self.assertEqual(json.loads(dates.json_encode()), values)
+        self.assertEqual([d.value for d in MillisListTest([1, None])], [datetime(1970, 1, 1, 0, 0, 0, 1000), None])
+        self.assertRaises(ParseException, MillisListTest, [1.5])
+
+        dates = MadridListTest([0] * 100)
+        self.assertEqual(dates[99].value, datetime(1970, 1, 1, tzinfo = timezone.utc))
+        self.assertEqual(dates[99].value.utcoffset(), timedelta(hours = 2))
+        self.assertRaises(OverflowError, MillisListTest, [2 ** 62] * 100)
+
+    def test_schema(self):
+        schema = MillisListTest.json_schema()
+        self.assertEqual(schema['items']['x-json2py-formatting'], 'timestamp_ms')
+        compiled = compile_schema(schema)
+        self.assertEqual(compiled([1000])[0].value, datetime(1970, 1, 1, 0, 0, 1))
+
+
+class OwnerObjTest(NestedField):
+    login = TextField()
+    since = DateField(formatting = 'timestamp')
+
+
+class RepoObjTest(NestedField):
+    id = IntegerField()
+    title = TextField(name = 'name')
+    description = TextField(required = False)
+    owner = OwnerObjTest(name = 'user')
+    tags = ListObjTest(required = False)
+
+
+class CopyTest(unittest.TestCase):
+    def setUp(self):
+        self.data = {
+            'id': 1, 'name': 'json2py', 'description': 'A description',
+            'user': {'login': 'wiston999', 'since': 1458854751},
+            'tags': [{'id': 1, 'clave': 1, 'value': 'aValue'}]
+        }
+        self.testObj = RepoObjTest(self.data)
+
+    def test_nested_options(self):
+        self.assertEqual(self.testObj.owner.since.value, datetime(2016, 3, 24, 21, 25, 51))
+
+    def test_deep_copy(self):
+        clone = self.testObj.copy()
+        self.assertIsNot(clone, self.testObj)
+        self.assertIsNot(clone.owner, self.testObj.owner)
+        self.assertIsNot(clone.tags[0], self.testObj.tags[0])
+        clone.owner.login.value = 'other'
+        self.assertEqual(self.testObj.owner.login.value, 'wiston999')
+        self.assertEqual(json.loads(clone.json_encode())['user']['login'], 'other')
+
+        clone = copy.deepcopy(self.testObj)
+        self.assertEqual(clone.tags[0].valor.value, 'aValue')
+        self.assertIsNot(clone.tags, self.testObj.tags)
+
+    def test_shallow_copy(self):
+        clone = self.testObj.copy(deep = False)
+        self.assertIs(clone.owner, self.testObj.owner)
+        clone.id = IntegerField(2)
+        self.assertEqual(self.testObj.id.value, 1)
+
+        clone = copy.copy(ListObjTest(self.data['tags']))
+        self.assertEqual(len(clone), 1)
+
+    def test_merge(self):
+        clone = self.testObj.copy(deep = False).merge({
+            'name': 'renamed', 'description': None, 'user': {'login': 'other'}, 'unknown': 10
+        })
+        self.assertEqual(clone.title.value, 'renamed')
+        self.assertEqual(clone.description.value, None)
+        self.assertEqual(clone.owner.login.value, 'other')
+        self.assertEqual(clone.owner.since.value, datetime(2016, 3, 24, 21, 25, 51))
+        self.assertIs(clone.tags, self.testObj.tags)
+
+        self.assertEqual(self.testObj.title.value, 'json2py')
+        self.assertEqual(self.testObj.description.value, 'A description')
+        self.assertEqual(self.testObj.owner.login.value, 'wiston999')
+
+        clone.merge({'tags': []})
+        self.assertEqual(len(clone.tags), 0)
+        self.assertEqual(len(self.testObj.tags), 1)
+
+        self.assertRaises(ParseException, clone.merge, {'id': 'NaN'})
+        self.assertRaises(ParseException, clone.merge, [])
+
+    def test_merge_model(self):
+        other = RepoObjTest(dict(self.data, name = 'renamed', user = {'login': 'other', 'since': 0}))
+        merged = self.testObj.copy().merge(other)
+        self.assertEqual(merged.title.value, 'renamed')
+        self.assertEqual(merged.owner.login.value, 'other')
+        self.assertIsNot(merged.owner.login, other.owner.login)
+
+
+class RepoListObjTest(ListField):
+    __model__ = RepoObjTest
+
+
+class PatchTest(unittest.TestCase):
+    def setUp(self):
+        self.data = [
+            {'id': 1, 'name': 'json2py', 'user': {'login': 'wiston999', 'since': 0}, 'tags': []},
+            {'id': 2, 'name': 'other/repo', 'user': {'login': 'wiston999', 'since': 0}},
+            {'id': 3, 'name': 'third', 'user': {'login': 'someone', 'since': 10}},
+        ]
+        self.testObj = RepoListObjTest(self.data)
+
+    def assertPatches(self, source, target, key = None):
+        patch = source.diff(target, key = key)
+        json.dumps(patch)
+        result = source.copy().apply_patch(patch)
+        self.assertEqual(json.loads(result.json_encode()), json.loads(target.json_encode()))
+        return patch
+
+    def test_identical(self):
+        self.assertEqual(self.testObj.diff(self.testObj.copy()), [])
+        self.assertEqual(self.testObj.diff(self.testObj.copy(deep = False)), [])
+
+    def test_diff_nested(self):
+        target = self.testObj[0].copy(deep = False).merge({'name': 'renamed', 'user': {'login': 'other'}})
+        patch = self.assertPatches(self.testObj[0], target)
+        self.assertEqual(sorted(patch, key = lambda op: op['path']), [
+            {'op': 'replace', 'path': '/name', 'value': 'renamed'},
+            {'op': 'replace', 'path': '/user/login', 'value': 'other'},
+        ])
+
+        target = self.testObj[1].copy().merge({'tags': [{'id': 1, 'clave': 1, 'value': 'aValue'}]})
+        self.assertEqual(self.assertPatches(self.testObj[1], target), [
+            {'op': 'add', 'path': '/tags/0', 'value': {'id': 1, 'clave': 1, 'value': 'aValue'}}
+        ])
+
+    def test_diff_list(self):
+        target = RepoListObjTest([self.data[2], self.data[0], dict(self.data[1], name = 'renamed/repo')])
+        self.assertPatches(self.testObj, target)
+        self.assertPatches(self.testObj, RepoListObjTest(self.data[:1]))
+        self.assertPatches(RepoListObjTest(self.data[:1]), self.testObj)
+
+        patch = self.assertPatches(self.testObj, target, key = 'id')
+        self.assertEqual(patch, [
+            {'op': 'move', 'from': '/2', 'path': '/0'},
+            {'op': 'replace', 'path': '/2/name', 'value': 'renamed/repo'},
+        ])
+        self.assertEqual(self.testObj.diff(target, key = {RepoListObjTest: 'id'}), patch)
+
+        target = RepoListObjTest([self.data[1], dict(self.data[0], id = 4)])
+        patch = self.assertPatches(self.testObj, target, key = 'id')
+        self.assertEqual([op['op'] for op in patch], ['remove', 'remove', 'add'])
+
+        self.assertRaises(PatchException, self.testObj.diff, RepoListObjTest(self.data * 2), 'id')
+        self.assertRaises(PatchException, self.testObj.diff, self.testObj[0])
+
+    def test_apply(self):
+        obj = self.testObj.copy()
+        obj.apply_patch([
+            {'op': 'test', 'path': '/1/name', 'value': 'other/repo'},
+            {'op': 'replace', 'path': '/1/name', 'value': 'renamed'},
+            {'op': 'copy', 'from': '/0', 'path': '/-'},
+            {'op': 'move', 'from': '/2', 'path': '/0'},
+            {'op': 'add', 'path': '/1/tags/0', 'value': {'id': 1, 'clave': 1, 'value': 'aValue'}},
+            {'op': 'copy', 'from': '/1/tags', 'path': '/2/tags'},
+            {'op': 'remove', 'path': '/3'},
+        ])
+        self.assertEqual([e.id.value for e in obj], [3, 1, 2])
+        self.assertEqual(obj[1].tags[0].valor.value, 'aValue')
+        self.assertEqual(obj[2].title.value, 'renamed')
+        self.assertEqual(obj[2].tags[0].valor.value, 'aValue')
+        self.assertIsNot(obj[2].tags, obj[1].tags)
+        self.assertEqual(len(self.testObj[0].tags), 0)
+
+        obj.apply_patch([{'op': 'replace', 'path': '', 'value': []}])
+        self.assertEqual(len(obj), 0)
+
+    def test_apply_errors(self):
+        obj = self.testObj.copy()
+        self.assertRaises(PatchException, obj.apply_patch, [{'op': 'test', 'path': '/0/id', 'value': 2}])
+        self.assertRaises(PatchException, obj.apply_patch, [{'op': 'remove', 'path': '/0/id'}])
+        self.assertRaises(PatchException, obj.apply_patch, [{'op': 'replace', 'path': '/3', 'value': {}}])
+        self.assertRaises(PatchException, obj.apply_patch, [{'op': 'add', 'path': '/0/unknown', 'value': 1}])
+        self.assertRaises(PatchException, obj.apply_patch, [{'op': 'remove', 'path': 'bad'}])
+        self.assertRaises(PatchException, obj.apply_patch, [{'op': 'move', 'from': '/0', 'path': '/0/tags/0'}])
+        self.assertRaises(PatchException, obj.apply_patch, [{'op': 'unknown', 'path': '/0'}])
+        self.assertRaises(ParseException, obj.apply_patch, [{'op': 'replace', 'path': '/0/id', 'value': 'NaN'}])
+
+
+class ParallelListObjTest(ListField):
+    __model__ = RepoObjTest
+    __workers__ = 4
+    __chunk_size__ = 3
+
+
+class ParallelTest(unittest.TestCase):
+    def setUp(self):
+        self.data = [
+            {'id': i, 'name': 'repo%d' % i, 'user': {'login': 'user%d' % i, 'since': i},
+             'tags': [{'id': i, 'clave': i, 'value': 'v'}] * 5}
+            for i in range(50)
+        ]
+
+    def test_list(self):
+        obj = ParallelListObjTest(self.data)
+        self.assertEqual([e.id.value for e in obj], list(range(50)))
+        self.assertEqual(json.loads(obj.json_encode()), json.loads(RepoListObjTest(self.data).json_encode()))
+
+        self.assertRaises(LookupError, ParallelListObjTest, self.data + [{'id': 1}])
+
+    def test_batch(self):
+        objs = RepoObjTest.decode_batch(self.data, workers = 3, chunk_size = 4)
+        self.assertEqual([o.owner.login.value for o in objs], ['user%d' % i for i in range(50)])
+
+        objs = RepoObjTest.decode_batch([json.dumps(d) for d in self.data], chunk_size = 4, raw = True)
+        self.assertEqual([o.id.value for o in objs], list(range(50)))
+        self.assertEqual(len(RepoObjTest.decode_batch(self.data, workers = 1)), 50)
+
+    def test_threads(self):
+        class Fresh(NestedField):
+            id = IntegerField()
+            owner = OwnerObjTest(name = 'user')
+
+        class FreshList(ListField):
+            __model__ = Fresh
+            __cache__ = DecodeCache(max_entries = 8)
+
+        payloads = [json.dumps([self.data[i % 10]]) for i in range(20)]
+        errors = []
+
+        def work():
+            try:
+                for payload in payloads:
+                    self.assertEqual(FreshList.from_json(payload)[0].id.value, json.loads(payload)[0]['id'])
+            except Exception as e:
+                errors.append(e)
+
+        threads = [threading.Thread(target = work) for i in range(8)]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+        self.assertEqual(errors, [])
+        self.assertEqual(FreshList.__cache__.hits + FreshList.__cache__.misses, 160)
+
+
+class PushEventTest(NestedField):
+    event_type = TextField(name = 'type')
+    commits = IntegerField()
+
+
+class IssueEventTest(NestedField):
+    event_type = TextField(name = 'type')
+    issue = IntegerField()
+    title = TextField(name = 'name', required = False)
+
+
+class EventUnionTest(UnionField):
+    __models__ = {'push': PushEventTest, 'issue': IssueEventTest}
+
+
+class FallbackEventUnionTest(EventUnionTest):
+    __discriminator__ = 'kind'
+    __fallback__ = True
+
+
+class EventListTest(ListField):
+    __model__ = EventUnionTest
+
+
+class UnionTest(unittest.TestCase):
+    def test_dispatch(self):
+        event = EventUnionTest({'type': 'push', 'commits': 3})
+        self.assertIsInstance(event, PushEventTest)
+        self.assertEqual(event.commits.value, 3)
+
+        self.assertIsInstance(EventUnionTest(), EventUnionTest)
+        self.assertEqual(EventUnionTest().json_encode(), 'null')
+
+        self.assertRaises(ParseException, EventUnionTest, {'type': 'unknown', 'commits': 3})
+        self.assertRaises(ParseException, EventUnionTest, {'type': [], 'commits': 3})
+        self.assertRaises(ParseException, EventUnionTest, 10)
+        self.assertRaises(LookupError, EventUnionTest, {'type': 'push'})
+
+    def test_fallback(self):
+        self.assertIsInstance(FallbackEventUnionTest({'type': 'issue', 'issue': 1}), IssueEventTest)
+        self.assertIsInstance(FallbackEventUnionTest({'type': 'push', 'commits': 1}), PushEventTest)
+        self.assertRaises(ParseException, FallbackEventUnionTest, {'type': 'push'})
+
+        class ExplicitFallback(FallbackEventUnionTest):
+            __fallback__ = [IssueEventTest]
+
+        self.assertRaises(ParseException, ExplicitFallback, {'type': 'push', 'commits': 1})
+
+    def test_list(self):
+        data = [{'type': 'push', 'commits': 3}, {'type': 'issue', 'issue': 10, 'name': 'Bug'}]
+        events = EventListTest(data)
+        self.assertEqual([type(e) for e in events], [PushEventTest, IssueEventTest])
+        self.assertEqual(events[1].title.value, 'Bug')
+        self.assertEqual(json.loads(events.json_encode()), data)
+
+    def test_field(self):
+        class Envelope(NestedField):
+            event = EventUnionTest(required = False)
+
+        self.assertIsInstance(Envelope({'event': {'type': 'push', 'commits': 1}}).event, PushEventTest)
+        self.assertIsNone(Envelope({}).event.value)
+        self.assertEqual(json.loads(Envelope({}).json_encode()), {'event': None})
+
+    def test_merge(self):
+        class Envelope(NestedField):
+            event = EventUnionTest(required = False)
+
+        envelope = Envelope({'event': {'type': 'push', 'commits': 1}})
+        merged = envelope.copy(deep = False).merge({'event': {'type': 'issue', 'issue': 4}})
+        self.assertIsInstance(merged.event, IssueEventTest)
+        self.assertEqual(json.loads(merged.event.json_encode()), {'type': 'issue', 'issue': 4, 'name': None})
+        self.assertIsInstance(envelope.event, PushEventTest)
+
+        merged = envelope.copy().merge({'event': {'commits': 5}})
+        self.assertIsInstance(merged.event, PushEventTest)
+        self.assertEqual(merged.event.commits.value, 5)
+        self.assertRaises(LookupError, envelope.copy().merge, {'event': {'type': 'issue'}})
+
+        other = Envelope({'event': {'type': 'issue', 'issue': 4}})
+        self.assertIsInstance(envelope.copy().merge(other).event, IssueEventTest)
+
+
+class IndexedRepoListObjTest(RepoListObjTest):
+    __indexes__ = {'id': 'hash', 'owner.login': 'hash', 'owner.since': 'sorted'}
+
+
+def epoch(seconds):
+    return datetime(1970, 1, 1) + timedelta(seconds = seconds)
+
+
+class IndexTest(unittest.TestCase):
+    def setUp(self):
+        self.data = [
+            {'id': i, 'name': 'repo%d' % i, 'user': {'login': 'user%d' % (i % 3), 'since': i * 10}}
+            for i in range(10)
+        ]
+        self.testObj = IndexedRepoListObjTest(self.data)
+
+    def ids(self, elements):
+        return sorted(e.id.value for e in elements)
+
+    def assertConsistent(self, obj):
+        for criteria in [{'id': 3}, {'owner__login': 'user1'}, {'owner__since__gte': epoch(40)},
+                         {'owner__since__lt': epoch(30), 'owner__login': 'user0'}, {'id__in': [1, 2, 99]}]:
+            expected = RepoListObjTest(json.loads(obj.json_encode())).filter(**criteria)
+            self.assertEqual(self.ids(obj.filter(**criteria)), self.ids(expected), criteria)
+
+    def test_query(self):
+        self.assertEqual(self.testObj.find(id = 4).title.value, 'repo4')
+        self.assertIsNone(self.testObj.find(id = 40))
+        self.assertEqual(self.ids(self.testObj.filter(owner__login = 'user1')), [1, 4, 7])
+        self.assertEqual(self.ids(self.testObj.filter(owner__since__gt = epoch(60))), [7, 8, 9])
+        self.assertEqual(self.ids(self.testObj.filter(owner__since__lte = epoch(20), id__in = [0, 2, 5])), [0, 2])
+        self.assertEqual(self.ids(self.testObj.filter(title = 'repo5')), [5])
+        self.assertIsInstance(self.testObj.filter(id = 1), IndexedRepoListObjTest)
+        self.assertEqual(len(self.testObj.filter()), 10)
+
+    def test_scan(self):
+        obj = RepoListObjTest(self.data)
+        self.assertEqual(obj.find(owner__login = 'user2').id.value, 2)
+        self.assertEqual(self.ids(obj.filter(owner__since__gt = epoch(60))), [7, 8, 9])
+
+    def test_consistency(self):
+        obj = self.testObj
+        self.assertConsistent(obj)
+        extra = RepoObjTest({'id': 99, 'name': 'extra', 'user': {'login': 'user1', 'since': 35}})
+        obj.append(extra)
+        obj.insert(0, extra.copy())
+        obj.extend_raw([{'id': 1, 'name': 'dup', 'user': {'login': 'user9', 'since': 5}}])
+        self.assertConsistent(obj)
+
+        obj.pop()
+        obj.pop(0)
+        obj.remove(obj[3])
+        del obj[0]
+        del obj[:2]
+        self.assertConsistent(obj)
+
+        obj[0] = extra.copy()
+        obj[1:3] = [extra.copy(), extra.copy(), extra.copy()]
+        obj.sort_by('owner.since')
+        self.assertConsistent(obj)
+        self.assertEqual(len(obj.filter(id = 99)), 5)
+
+        obj[0].owner.login.value = 'changed'
+        obj.reindex()
+        self.assertConsistent(obj)
+        self.assertEqual(len(obj.filter(owner__login = 'changed')), 1)
+
+        part = obj[:2]
+        self.assertConsistent(part)
+        obj.merge(self.data)
+        self.assertConsistent(obj)
+
+    def test_patch(self):
+        obj = self.testObj
+        self.assertConsistent(obj)
+        obj.apply_patch([
+            {'op': 'replace', 'path': '/0/user/login', 'value': 'changed'},
+            {'op': 'add', 'path': '/-', 'value': {'id': 99, 'name': 'extra', 'user': {'login': 'user1', 'since': 35}}},
+            {'op': 'replace', 'path': '/1', 'value': {'id': 98, 'name': 'other', 'user': {'login': 'user2', 'since': 1}}},
+            {'op': 'remove', 'path': '/2'},
+            {'op': 'move', 'from': '/3', 'path': '/0'},
+        ])
+        self.assertConsistent(obj)
+        self.assertEqual(self.ids(obj.filter(owner__login = 'changed')), [0])
+        self.assertEqual(obj.find(id = 98).title.value, 'other')
+        self.assertIsNone(obj.find(id = 2))
+
+    def test_pickle(self):
+        obj = self.testObj
+        self.assertEqual(obj.find(id = 4).title.value, 'repo4')
+        clone = pickle.loads(pickle.dumps(obj))
+        self.assertEqual(clone.json_encode(), obj.json_encode())
+        self.assertEqual(clone.find(id = 4).title.value, 'repo4')
+        self.assertEqual(self.ids(copy.deepcopy(obj).filter(owner__login = 'user1')), [1, 4, 7])
+
+
+class SnapshotTest(unittest.TestCase):
+    def setUp(self):
+        self.dir = tempfile.mkdtemp()
+        self.path = os.path.join(self.dir, 'repos.snap')
+        self.data = [
+            {'id': i, 'name': u'repo\u00f1%d' % i, 'description': None, 'user': {'login': 'user', 'since': i}, 'tags': []}
+            for i in range(20)
+        ]
+        self.testObj = RepoListObjTest(self.data)
+
+    def tearDown(self):
+        shutil.rmtree(self.dir)
+
+    def test_roundtrip(self):
+        self.assertEqual(self.testObj.snapshot(self.path), 20)
+        with RepoListObjTest.open_snapshot(self.path) as view:
+            self.assertEqual(len(view), 20)
+            self.assertIsInstance(view[3], RepoObjTest)
+            self.assertEqual(view[3].title.value, u'repo\u00f13')
+            self.assertEqual(view[-1].id.value, 19)
+            self.assertEqual(json.loads(view.row(0).decode('utf-8')), self.data[0])
+            self.assertEqual([e.id.value for e in view], list(range(20)))
+
+            part = view[5:8]
+            self.assertIsInstance(part, RepoListObjTest)
+            self.assertEqual([e.id.value for e in part], [5, 6, 7])
+            self.assertEqual(json.loads(view.load().json_encode()), self.data)
+            self.assertRaises(IndexError, view.__getitem__, 20)
+        self.assertEqual(part[0].owner.login.value, 'user')
+
+    def test_buffer(self):
+        RepoListObjTest([]).snapshot(self.path)
+        with RepoListObjTest.open_snapshot(self.path) as view:
+            self.assertEqual(len(view), 0)
+            self.assertEqual(list(view), [])
+
+        self.testObj.snapshot(self.path)
+        with open(self.path, 'rb') as f:
+            view = SnapshotView(RepoListObjTest, bytearray(f.read()))
+        self.assertEqual(view[1].id.value, 1)
+        self.assertRaises(ValueError, SnapshotView, RepoListObjTest, b'not a snapshot at all, no way')
+
+    def test_exact(self):
+        text = '[{"id": 12345678901234567890123, "total": 12345678901234567.890123456789, "rate": 0.5}]'
+        InvoiceListObjTest.from_json(text).snapshot(self.path)
+        total = Decimal('12345678901234567.890123456789')
+        with InvoiceListObjTest.open_snapshot(self.path) as view:
+            self.assertIn(b'"total":12345678901234567.890123456789', view.row(0))
+            self.assertEqual(view[0].total.value, total)
+            self.assertEqual([e.total.value for e in view], [total])
+            self.assertEqual(view[:].json_encode(), InvoiceListObjTest.from_json(text).json_encode())
+
+
+class IncrementalTest(unittest.TestCase):
+    def setUp(self):
+        self.data = [
+            {'id': i, 'name': u'r\u00e9po "%d" [{\\' % i, 'user': {'login': 'user', 'since': i}, 'tags': []}
+            for i in range(5)
+        ]
+        self.raw = json.dumps(self.data, ensure_ascii = False).encode('utf-8')
+
+    def test_chunks(self):
+        for size in [1, 2, 3, 7, 64, len(self.raw)]:
+            decoder = RepoListObjTest.incremental()
+            result = []
+            for i in range(0, len(self.raw), size):
+                result.extend(decoder.feed(self.raw[i:i + size]))
+                self.assertEqual(decoder.consumed + len(decoder.pending), min(i + size, len(self.raw)))
+            result.extend(decoder.close())
+            self.assertTrue(decoder.done)
+            self.assertEqual(decoder.consumed, len(self.raw))
+            self.assertEqual([e.title.value for e in result], [d['name'] for d in self.data])
+
+    def test_emit_early(self):
+        decoder = RepoListObjTest.incremental()
+        first = json.dumps(self.data[0])
+        self.assertEqual(decoder.feed(' [ ' + first[:-1]), [])
+        self.assertEqual(len(decoder.feed('}')), 1)
+        self.assertEqual(decoder.consumed, 3 + len(first))
+        self.assertEqual(len(decoder.feed(', ' + first + ']\n{"next": 1}')), 1)
+        self.assertTrue(decoder.done)
+        self.assertEqual(decoder.pending, b'\n{"next": 1}')
+
+    def test_scalars(self):
+        decoder = ListObjTest.incremental()
+        self.assertEqual(decoder.feed('[]'), [])
+        self.assertTrue(decoder.done)
+
+        class Numbers(ListField):
+            __model__ = IntegerField
+
+        decoder = Numbers.incremental()
+        self.assertEqual([n.value for n in decoder.feed('[1, 23')], [1])
+        self.assertEqual([n.value for n in decoder.feed('4 ,5]')], [234, 5])
+
+    def test_exact(self):
+        decoder = InvoiceListObjTest.incremental()
+        text = '[{"id": 1, "total": 12345678901234567.890123456789, "rate": 0.5}, {"id": 2, "total": 0.10, "rate": 1}]'
+        result = decoder.feed(text[:40]) + decoder.feed(text[40:]) + decoder.close()
+        self.assertEqual([e.id.value for e in result], [1, 2])
+        self.assertEqual([str(e.total.value) for e in result], ['12345678901234567.890123456789', '0.10'])
+        self.assertRaises(ParseException, InvoiceListObjTest.incremental().feed, '[{"id": 1, "total": }]')
+
+    def test_documents(self):
+        decoder = RepoObjTest.incremental()
+        lines = '\n'.join(json.dumps(d) for d in self.data)
+        result = decoder.feed(lines[:50]) + decoder.feed(lines[50:]) + decoder.close()
+        self.assertEqual([e.id.value for e in result], list(range(5)))
+
+        decoder = IntegerField.incremental()
+        self.assertEqual([n.value for n in decoder.feed('1 2 3')], [1, 2])
+        self.assertEqual([n.value for n in decoder.close()], [3])
+
+    def test_errors(self):
+        self.assertRaises(ParseException, RepoListObjTest.incremental().feed, '{}')
+        self.assertRaises(ParseException, RepoListObjTest.incremental().feed, '[1 2]')
+        self.assertRaises(ParseException, RepoListObjTest.incremental().feed, '[%s,]' % json.dumps(self.data[0]))
+        self.assertRaises(ParseException, RepoListObjTest.incremental().feed, '[{"id": 1]')
+        self.assertRaises(LookupError, RepoListObjTest.incremental().feed, '[{"id": 1}]')
+
+        decoder = RepoListObjTest.incremental()
+        decoder.feed('[{"id": 1')
+        self.assertRaises(ParseException, decoder.close)
+
+        decoder = RepoListObjTest.incremental()
+        decoder.feed('[')
+        self.assertRaises(ParseException, decoder.close)
+
+
+class CoercedObjTest(NestedField):
+    __coerce__ = True
+    id = IntegerField()
+    ratio = FloatField(required = False)
+    active = BooleanField(required = False)
+    label = TextField(required = False)
+    strict = IntegerField(required = False, coerce = False)
+    since = DateField(required = False, formatting = 'timestamp')
+    owner = OwnerObjTest(required = False)
+
+
+class CoerceTest(unittest.TestCase):
+    def test_fields(self):
+        self.assertEqual(IntegerField("42", coerce = True).value, 42)
+        self.assertEqual(IntegerField(42.0, coerce = True).value, 42)
+        self.assertEqual(IntegerField("42.0", coerce = True).value, 42)
+        self.assertEqual(IntegerField("12345678901234567891.0", coerce = True).value, 12345678901234567891)
+        self.assertEqual(FloatField("1.5", coerce = True).value, 1.5)
+        self.assertEqual(BooleanField("yes", coerce = True).value, True)
+        self.assertEqual(BooleanField(0, coerce = True).value, False)
+        self.assertEqual(TextField(12, coerce = True).value, '12')
+        self.assertEqual(TextField(False, coerce = True).value, 'false')
+        self.assertEqual(IntegerField(None, coerce = True).value, None)
+
+        self.assertRaises(ParseException, IntegerField, "42")
+        self.assertRaises(ParseException, IntegerField, "4.2", coerce = True)
+        self.assertRaises(ParseException, IntegerField, 4.2, coerce = True)
+        self.assertRaises(ParseException, IntegerField, "inf", coerce = True)
+        self.assertRaises(ParseException, IntegerField, float('inf'), coerce = True)
+        self.assertRaises(ParseException, IntegerField, "1e1000000", coerce = True)
+        self.assertRaises(ParseException, IntegerField, "1e10000000", coerce = True)
+        self.assertRaises(ParseException, IntegerField, "1" * 5000, coerce = True)
+        self.assertRaises(ParseException, IntegerField, [], coerce = True)
+        self.assertRaises(ParseException, BooleanField, "maybe", coerce = True)
+        self.assertRaises(ParseException, TextField, {}, coerce = True)
+
+    def test_custom(self):
+        field = IntegerField("0x1f", coerce = lambda v: int(v, 16))
+        self.assertEqual(field.value, 31)
+        self.assertRaises(ParseException, IntegerField, "zz", coerce = lambda v: int(v, 16))
+
+    def test_date(self):
+        self.assertEqual(DateField(1458854751.5, formatting = 'timestamp', coerce = True).value,
+                         datetime(2016, 3, 24, 21, 25, 51, 500000))
+        self.assertEqual(DateField("1458854751", formatting = 'timestamp', coerce = True).value,
+                         datetime(2016, 3, 24, 21, 25, 51))
+        self.assertEqual(DateField(1458854751, coerce = True).value, datetime(2016, 3, 24, 21, 25, 51))
+        self.assertEqual(DateField(1458854751, coerce = True).json_encode(), '"2016-03-24T21:25:51Z"')
+        self.assertRaises(ParseException, DateField, "now", formatting = 'timestamp', coerce = True)
+        self.assertRaises(ParseException, DateField, 1e20, formatting = 'timestamp', coerce = True)
+        self.assertRaises(ParseException, DateField, "inf", formatting = 'timestamp', coerce = True)
+        self.assertRaises(ParseException, DateField, "nan", formatting = 'timestamp', coerce = True)
+        self.assertRaises(ParseException, DateField, 1458854751.5, formatting = 'timestamp')
+
+    def test_model(self):
+        obj = CoercedObjTest({
+            'id': '7', 'ratio': '0.5', 'active': 'true', 'label': 3, 'since': '1458854751',
+            'owner': {'login': 'octocat', 'since': 1458854751},
+        })
+        self.assertEqual(obj.id.value, 7)
+        self.assertEqual(obj.ratio.value, 0.5)
+        self.assertEqual(obj.active.value, True)
+        self.assertEqual(obj.label.value, '3')
+        self.assertEqual(obj.since.value, datetime(2016, 3, 24, 21, 25, 51))
+        self.assertEqual(json.loads(obj.json_encode())['id'], 7)
+
+        # Explicit field setting wins and nested documents keep their own policy
+        self.assertRaises(ParseException, CoercedObjTest, {'id': 1, 'strict': '2'})
+        self.assertRaises(ParseException, CoercedObjTest, {'id': 1, 'owner': {'login': 'a', 'since': '1'}})
+        self.assertIsNone(CoercedObjTest.id.coerce)
+
+        merged = obj.copy().merge({'id': '8'})
+        self.assertEqual(merged.id.value, 8)
+
+
+class EncodeOptionsTest(unittest.TestCase):
+    def setUp(self):
+        self.data = {
+            'id': 1, 'name': 'json2py', 'description': None,
+            'user': {'login': 'wiston999', 'since': 1458854751},
+            'tags': [{'id': 1, 'clave': 1, 'value': 'aValue'}]
+        }
+        self.testObj = RepoObjTest(self.data)
+
+    def test_compact(self):
+        self.assertEqual(IntegerField(1).json_encode(), '1')
+        self.assertNotIn(' ', self.testObj.json_encode())
+        self.assertIn(', ', self.testObj.json_encode(separators = (', ', ': ')))
+        self.assertIn('\n', self.testObj.json_encode(indent = 2))
+        self.assertEqual(json.loads(self.testObj.json_encode()), self.data)
+
+    def test_exclude_none(self):
+        encoded = json.loads(self.testObj.json_encode(exclude_none = True))
+        self.assertNotIn('description', encoded)
+        self.assertEqual(encoded['user'], self.data['user'])
+
+        # Required fields are kept, so output can be decoded back
+        obj = RepoObjTest({'id': None, 'name': 'a', 'user': {'login': 'b', 'since': None}})
+        encoded = json.loads(obj.json_encode(exclude_none = True))
+        self.assertEqual(encoded, {'id': None, 'name': 'a', 'user': {'login': 'b', 'since': None}, 'tags': []})
+        self.assertEqual(RepoObjTest(encoded).name, obj.name)
+
+    def test_exclude_defaults(self):
+        obj = RepoObjTest({'id': 1, 'name': 'a', 'user': {'login': 'b', 'since': 1}})
+        encoded = json.loads(obj.json_encode(exclude_defaults = True))
+        self.assertEqual(encoded, {'id': 1, 'name': 'a', 'user': {'login': 'b', 'since': 1}})
+        self.assertIn('tags', json.loads(self.testObj.json_encode(exclude_defaults = True)))
+
+    def test_include_exclude(self):
+        encoded = json.loads(self.testObj.json_encode(include = ['id', 'owner.login', 'tags.key']))
+        self.assertEqual(encoded, {'id': 1, 'user': {'login': 'wiston999'}, 'tags': [{'clave': 1}]})
+
+        encoded = json.loads(self.testObj.json_encode(exclude = ['owner.since', 'tags', 'description']))
+        self.assertEqual(encoded, {'id': 1, 'name': 'json2py', 'user': {'login': 'wiston999'}})
+
+        encoded = json.loads(self.testObj.json_encode(include = ['owner', 'title'], exclude = ['owner.since']))
+        self.assertEqual(encoded, {'name': 'json2py', 'user': {'login': 'wiston999'}})
+
+        encoded = json.loads(ListObjTest(self.data['tags']).json_encode(include = 'valor'))
+        self.assertEqual(encoded, [{'value': 'aValue'}])
+
+    def test_plan_cache(self):
+        from json2py.encoder import _plans
+        self.testObj.json_encode(exclude = ['owner.since'])
+        count = len(_plans)
+        self.testObj.json_encode(exclude = ['owner.since'])
+        self.assertEqual(len(_plans), count)
+
+
+class CommentListTest(ListField):
+    __model__ = 'CommentTest'
+
+
+class CommentTest(NestedField):
+    text = TextField()
+    replies = CommentListTest(required = False)
+    parent = RefField('CommentTest', required = False)
+    author = RefField('OwnerObjTest', name = 'user', required = False)
+
+
+class DeepCommentTest(CommentTest):
+    __max_depth__ = None
+
+
+class ShallowCommentListTest(CommentListTest):
+    __max_depth__ = 50
+
+
+class ParentChainTest(NestedField):
+    __max_depth__ = None
+    text = TextField()
+    parent = RefField('ParentChainTest', required = False)
+
+
+class MissingRefTest(NestedField):
+    missing = RefField('NotDeclaredTest', required = False)
+
+
+def chain(depth):
+    data = {'text': 'leaf'}
+    for i in range(depth):
+        data = {'text': str(i), 'replies': [data]}
+    return data
+
+
+def chain_text(depth, leaf = '{"text": "leaf"}'):
+    """
+    JSON text of ``chain(depth)``, which json.dumps cannot write past the recursion limit.
+    """
+    parts = ['{"text": "%d", "replies": [' % i for i in reversed(range(depth))] + [leaf]
+    return ''.join(parts) + ']}' * depth
+
+
+class RecursiveTest(unittest.TestCase):
+    def test_self_reference(self):
+        obj = CommentTest({
+            'text': 'root', 'user': {'login': 'a', 'since': 1},
+            'replies': [{'text': 'child', 'replies': [{'text': 'grandchild'}]}],
+            'parent': {'text': 'parent'},
+        })
+        self.assertIsInstance(obj.replies, CommentListTest)
+        self.assertIsInstance(obj.replies[0], CommentTest)
+        self.assertEqual(obj.replies[0].replies[0].text.value, 'grandchild')
+        self.assertIsInstance(obj.parent, CommentTest)
+        self.assertEqual(obj.parent.text.value, 'parent')
+        self.assertIsInstance(obj.author, OwnerObjTest)
+        self.assertIsInstance(CommentTest.parent, RefField)
+
+        encoded = json.loads(obj.json_encode(exclude_defaults = True))
+        self.assertEqual(encoded['replies'][0]['replies'], [{'text': 'grandchild'}])
+        self.assertEqual(encoded['parent'], {'text': 'parent'})
+        self.assertEqual(CommentTest(encoded).replies[0].replies[0].text.value, 'grandchild')
+
+    def test_deep(self):
+        depth = 5000
+        obj = DeepCommentTest(chain(depth))
+        encoded = BaseEncoder().default(obj)
+        for i in reversed(range(depth)):
+            self.assertEqual(encoded['text'], str(i))
+            obj, encoded = obj.replies[0], encoded['replies'][0]
+        self.assertEqual(obj.text.value, 'leaf')
+        self.assertEqual(encoded['text'], 'leaf')
+
+    def test_deep_encode(self):
+        def expected(depth):
+            parts = ['{"replies":['] * depth + ['{"text":"leaf"}']
+            parts.extend('],"text":"%d"}' % i for i in range(depth))
+            return ''.join(parts)
+
+        self.assertEqual(CommentTest(chain(499)).json_encode(exclude_defaults = True), expected(499))
+        self.assertEqual(DeepCommentTest(chain(3000)).json_encode(exclude_defaults = True), expected(3000))
+        obj = CommentTest(chain(300))
+        self.assertEqual(obj.json_encode(indent = 1), json.dumps(BaseEncoder().default(obj), indent = 1))
+
+    def test_deep_copy(self):
+        obj = CommentTest(chain(300))
+        clone = obj.copy()
+        self.assertEqual(clone.json_encode(), obj.json_encode())
+
+        leaf = clone
+        for i in range(300):
+            self.assertIsNot(leaf.replies, obj.replies)
+            leaf = leaf.replies[0]
+        leaf.text.value = 'changed'
+        patch = obj.diff(clone)
+        self.assertEqual(patch, [{'op': 'replace', 'path': '/replies/0' * 300 + '/text', 'value': 'changed'}])
+        self.assertEqual(obj.apply_patch(patch).json_encode(), clone.json_encode())
+
+    def test_cycles(self):
+        first = DeepCommentTest({'text': 'first'})
+        first.replies.append(first)
+        second = DeepCommentTest({'text': 'second'})
+        second.replies.append(second)
+        for func in (first.json_encode, first.copy, lambda: first.diff(second)):
+            with self.assertRaises(ValueError) as context:
+                func()
+            self.assertEqual(str(context.exception), 'Circular reference detected')
+
+    def test_max_depth(self):
+        self.assertRaises(ParseException, CommentTest, chain(1000))
+        obj = CommentTest(chain(400))
+        self.assertEqual(json.loads(obj.json_encode())['text'], '399')
+
+        shallow = ShallowCommentListTest()
+        self.assertRaises(ParseException, ShallowCommentListTest, [chain(100)])
+        shallow.append(DeepCommentTest(chain(100)))
+        self.assertRaises(ValueError, shallow.json_encode)
+        self.assertRaises(ValueError, shallow.copy)
+        other = ShallowCommentListTest()
+        other.append(DeepCommentTest(chain(99)))
+        self.assertRaises(ValueError, shallow.diff, other)
+
+    def test_deep_text(self):
+        text = chain_text(600)
+        self.assertRaises(ParseException, CommentTest.from_json, text)
+        self.assertRaises(ParseException, json.loads, text, cls = ModelDecoder, model = CommentTest)
+
+        obj = DeepCommentTest.from_json(chain_text(3000))
+        self.assertEqual(obj.json_encode(exclude_defaults = True), DeepCommentTest(chain(3000)).json_encode(exclude_defaults = True))
+        obj = json.loads(text, cls = ModelDecoder, model = DeepCommentTest)
+        self.assertEqual(obj.json_encode(), DeepCommentTest(chain(600)).json_encode())
+
+        # Not parsed key by key, the whole text is handed to the json scanner first
+        text = '{"text": "0", "parent": ' * 2000 + '{"text": "root"}' + '}' * 2000
+        obj = ParentChainTest.from_json(text)
+        for i in range(2000):
+            obj = obj.parent
+        self.assertEqual(obj.text.value, 'root')
+
+        # Below the first levels, values are parsed as the json scanner does
+        leaf = '{"text": "leaf", "extra": [1, 2.5, {"a": [ ], "b": { }}, null, true, "s"], "user": {"login": "a", "since": 0}}'
+        pairs = []
+        decoder = ModelDecoder(model = DeepCommentTest, object_pairs_hook = lambda p: pairs.append(p) or dict(p))
+        obj = decoder.decode(' ' + chain_text(100, leaf) + ' ')
+        self.assertEqual(obj.json_encode(), DeepCommentTest(json.loads(chain_text(100, leaf))).json_encode())
+        self.assertIn([('login', 'a'), ('since', 0)], pairs)
+        for text in (chain_text(100, '{"text": "leaf" "a": 1}'), chain_text(100, '{"text": "leaf",}'),
+                     chain_text(100, '{"text": [1 2]}'), chain_text(100)[:-1]):
+            self.assertRaises(ValueError, decoder.decode, text)
+
+    def test_unresolved(self):
+        self.assertRaises(ValueError, MissingRefTest, {'missing': {}})
+        self.assertRaises(ValueError, MissingRefTest, {})
+
+
+class RepoPageTest(NestedField):
+    total = IntegerField()
+    repos = RepoListObjTest(name = 'items')
+    events = EventListTest(required = False)
+
+
+class UpperDecoderTest(BaseDecoder):
+    def dictToObj(self, d):
+        return dict((k.upper(), v) for k, v in d.items())
+
+
+class DecoderTest(unittest.TestCase):
+    def setUp(self):
+        self.data = {
+            'total': 2, 'page': {'next': None, 'links': [1, 2]},
+            'items': [
+                {'id': 1, 'name': 'json2py', 'user': {'login': 'wiston999', 'since': 0}, 'tags': [{'id': 1, 'clave': 2, 'value': 'json'}], 'forks': [{}]},
+                {'id': 2, 'name': 'other/repo', 'user': {'login': 'someone', 'since': 10}},
+            ],
+            'events': [{'type': 'push', 'commits': 3}, {'type': 'issue', 'issue': 4, 'name': 'bug'}],
+        }
+
+    def assertDecodes(self, cls, data, **kwargs):
+        text = json.dumps(data, **kwargs)
+        obj = json.loads(text, cls = ModelDecoder, model = cls)
+        self.assertIsInstance(obj, cls)
+        self.assertEqual(obj.json_encode(), cls(data).json_encode())
+        return obj
+
+    def test_loads(self):
+        page = self.assertDecodes(RepoPageTest, self.data)
+        self.assertIsInstance(page.repos[0], RepoObjTest)
+        self.assertEqual(page.repos[1].owner.login.value, 'someone')
+        self.assertEqual(page.repos[0].owner.since.value, datetime(1970, 1, 1))
+        self.assertIsNone(page.repos[1].description.value)
+        self.assertEqual(list(page.value), list(RepoPageTest(self.data).value))
+        self.assertIsInstance(page.events[1], IssueEventTest)
+
+        self.assertDecodes(RepoPageTest, self.data, indent = 2)
+        self.assertDecodes(RepoListObjTest, self.data['items'], separators = (',', ':'))
+        self.assertDecodes(RepoObjTest, self.data['items'][0])
+        self.assertDecodes(ListObjTest, [{'id': 1, 'clave': 2, 'value': 'a'}])
+        self.assertDecodes(CommentTest, chain(100))
+        self.assertEqual(json.loads('[1, 2]', cls = ModelDecoder), [1, 2])
+
+    def test_raw_decode(self):
+        decoder = ModelDecoder(model = RepoObjTest)
+        text = '\n'.join(json.dumps(item) for item in self.data['items']) + '\n'
+        repos, end = [], 0
+        while text[end:].strip():
+            repo, end = decoder.raw_decode(text, end + 1 if repos else 0)
+            repos.append(repo)
+        self.assertEqual([repo.id.value for repo in repos], [1, 2])
+        self.assertRaises(ValueError, decoder.decode, text)
+
+    def test_errors(self):
+        self.assertRaises(LookupError, json.loads, '{"total": 1}', cls = ModelDecoder, model = RepoPageTest)
+        self.assertRaises(ParseException, json.loads, '{"total": 1, "items": {}}', cls = ModelDecoder, model = RepoPageTest)
+        self.assertRaises(ParseException, json.loads, '[1]', cls = ModelDecoder, model = RepoListObjTest)
+        for text in ('{"total": 1, "items": [}', '{"total" 1}', '{"total": 1 "items": []}', '{total: 1}', '[{"id": 1'):
+            self.assertRaises(ValueError, json.loads, text, cls = ModelDecoder, model = RepoPageTest)
+
+    def test_max_depth(self):
+        self.assertRaises(ParseException, json.loads, json.dumps([chain(30)]), cls = ModelDecoder, model = ShallowCommentListTest)
+        self.assertDecodes(ShallowCommentListTest, [chain(20)])
+        # Deep enough to be finished without recursive parsing
+        self.assertDecodes(CommentListTest, [chain(200)])
+
+    def test_base_decoder(self):
+        self.assertEqual(json.loads('[{"a": {"b": 1}}]', cls = UpperDecoderTest), [{'A': {'B': 1}}])
+        self.assertRaises(NotImplementedError, json.loads, '{}', cls = BaseDecoder)
+
+
+class InvoiceObjTest(NestedField):
+    id = BigIntField()
+    total = DecimalField()
+    rate = FloatField()
+    discount = DecimalField(required = False)
+
+
+class InvoiceListObjTest(ListField):
+    __model__ = InvoiceObjTest
+
+
+class AmountListObjTest(ListField):
+    __model__ = DecimalField
+
+
+class LedgerObjTest(NestedField):
+    invoice = InvoiceObjTest()
+    amounts = AmountListObjTest(required = False)
+
+
+class PaymentObjTest(NestedField):
+    operation = TextField(name = 'type')
+    amount = DecimalField()
+
+
+class RefundObjTest(PaymentObjTest):
+    reason = TextField(required = False)
+
+
+class OperationUnionTest(UnionField):
+    __models__ = {'payment': PaymentObjTest, 'refund': RefundObjTest}
+
+
+class OperationEnvelopeTest(NestedField):
+    operation = OperationUnionTest(required = False)
+
+
+class DecimalTest(unittest.TestCase):
+    def setUp(self):
+        self.text = '{"id": 12345678901234567890123, "total": 12345678901234567.890123456789, "rate": 0.5, "extra": 1.5}'
+
+    def test_fields(self):
+        self.assertEqual(DecimalField(Decimal('1.10')).value, Decimal('1.10'))
+        self.assertEqual(str(DecimalField(0.1).value), '0.1')
+        self.assertEqual(DecimalField(10).value, Decimal(10))
+        self.assertIsNone(DecimalField().value)
+        self.assertRaises(ParseException, DecimalField, '1.5')
+        self.assertRaises(ParseException, DecimalField, True)
+        self.assertEqual(DecimalField('1.50', coerce = True).value, Decimal('1.50'))
+        self.assertRaises(ParseException, DecimalField, 'NaN', coerce = True)
+
+        self.assertEqual(BigIntField(2 ** 70).value, 2 ** 70)
+        self.assertEqual(BigIntField(Decimal('1E+20')).value, 10 ** 20)
+        self.assertEqual(BigIntField(2.0 ** 53).value, 2 ** 53)
+        self.assertRaises(ParseException, BigIntField, 1e20)
+        self.assertRaises(ParseException, BigIntField, Decimal('1.5'))
+        # Converting huge exponents into int takes ages, they are rejected as int() of long strings is
+        self.assertRaises(ParseException, BigIntField, Decimal('1e1000000'))
+        self.assertRaises(ParseException, BigIntField, '1e1000000', coerce = True)
+        self.assertRaises(ParseException, InvoiceObjTest.from_json, '{"id": 1e1000000, "total": 1, "rate": 1}')
+        self.assertEqual(BigIntField(Decimal('1e4000')).value, 10 ** 4000)
+        self.assertRaises(ParseException, BigIntField, '12')
+        self.assertEqual(BigIntField('1e3', coerce = True).value, 1000)
+        self.assertEqual(BigIntField('123456789012345678901', coerce = True).value, 123456789012345678901)
+
+    def test_decode(self):
+        obj = InvoiceObjTest.from_json(self.text)
+        self.assertEqual(obj.id.value, 12345678901234567890123)
+        self.assertEqual(obj.total.value, Decimal('12345678901234567.890123456789'))
+        self.assertIsInstance(obj.rate.value, float)
+        self.assertEqual(InvoiceObjTest.from_json('{"id": 1e20, "total": 1, "rate": 1}').id.value, 10 ** 20)
+
+        ledger = LedgerObjTest.from_json('{"invoice": %s, "amounts": [0.10, 1e-30, 5]}' % self.text)
+        self.assertEqual(ledger.invoice.total.value, obj.total.value)
+        self.assertEqual([a.value for a in ledger.amounts], [Decimal('0.10'), Decimal('1e-30'), Decimal(5)])
+        invoices = InvoiceListObjTest.from_json('[%s, %s]' % (self.text, self.text))
+        self.assertEqual(invoices[1].total.value, obj.total.value)
+
+        # Plain json.loads goes through float
+        self.assertNotEqual(InvoiceObjTest(json.loads(self.text)).total.value, obj.total.value)
+
+    def test_encode(self):
+        obj = InvoiceObjTest.from_json(self.text)
+        self.assertEqual(
+            obj.json_encode(),
+            '{"discount":null,"id":12345678901234567890123,"rate":0.5,"total":12345678901234567.890123456789}'
+        )
+        self.assertEqual(obj.json_encode(exclude_none = True, indent = None, separators = (', ', ': ')),
+                         '{"id": 12345678901234567890123, "rate": 0.5, "total": 12345678901234567.890123456789}')
+        self.assertEqual(InvoiceObjTest.from_json(obj.json_encode()).total.value, obj.total.value)
+        self.assertEqual(DecimalField(Decimal('1E+2')).json_encode(), '1E+2')
+        self.assertEqual(json.loads(DecimalField(Decimal('1E+2')).json_encode()), 100)
+        self.assertEqual(AmountListObjTest([Decimal('0.10'), None]).json_encode(), '[0.10,null]')
+        text = json.dumps({'invoice': obj, 'amounts': [Decimal('0.10'), Decimal('NaN')]}, cls = BaseEncoder)
+        self.assertIn('"total":12345678901234567.890123456789', text)
+        self.assertIn('"amounts":[0.10,NaN]', text)
+        for value in (Decimal('NaN'), Decimal('-Infinity'), float('inf')):
+            self.assertRaises(ParseException, DecimalField, value)
+        obj.rate.value = float('inf')
+        self.assertRaises(ValueError, obj.json_encode, allow_nan = False)
+        self.assertIn('"rate":Infinity', obj.json_encode())
+
+
+    def test_patch(self):
+        source = InvoiceObjTest({'id': 1, 'total': Decimal('0.10000000000000000001'), 'rate': 0.5})
+        target = source.copy()
+        target.total.value = Decimal('0.1')
+        self.assertEqual(source.diff(target), [{'op': 'replace', 'path': '/total', 'value': Decimal('0.1')}])
+        target.total.value = Decimal('12345678901234567890.5')
+        self.assertEqual(source.diff(target)[0]['value'], Decimal('12345678901234567890.5'))
+
+        patched = target.copy().apply_patch([
+            {'op': 'test', 'path': '/total', 'value': Decimal('12345678901234567890.5')},
+            {'op': 'copy', 'from': '/total', 'path': '/discount'},
+        ])
+        self.assertEqual(str(patched.discount.value), '12345678901234567890.5')
+        self.assertRaises(PatchException, target.copy().apply_patch,
+                          [{'op': 'test', 'path': '/total', 'value': 12345678901234567890.5}])
+
+        ledger = LedgerObjTest({'invoice': {'id': 1, 'total': 1, 'rate': 1}, 'amounts': [Decimal('12345678901234567890.5')]})
+        ledger.apply_patch([{'op': 'copy', 'from': '/amounts/0', 'path': '/amounts/-'},
+                            {'op': 'move', 'from': '/amounts/0', 'path': '/invoice/total'}])
+        self.assertEqual(str(ledger.amounts[0].value), '12345678901234567890.5')
+        self.assertEqual(str(ledger.invoice.total.value), '12345678901234567890.5')
+
+    def test_union_merge(self):
+        envelope = OperationEnvelopeTest({'operation': {'type': 'payment', 'amount': Decimal('12345678901234567890.5')}})
+        merged = envelope.copy().merge({'operation': {'type': 'refund', 'reason': 'late'}})
+        self.assertIsInstance(merged.operation, RefundObjTest)
+        self.assertEqual(str(merged.operation.amount.value), '12345678901234567890.5')
+        self.assertEqual(merged.json_encode(),
+                         '{"operation":{"amount":12345678901234567890.5,"type":"refund","reason":"late"}}')
+
+
+def sort_required(schema):
+    if isinstance(schema, dict):
+        return dict((k, sorted(v) if k == 'required' else sort_required(v)) for k, v in schema.items())
+    elif isinstance(schema, list):
+        return [sort_required(v) for v in schema]
+    return schema
+
+
+class SchemaTest(unittest.TestCase):
+    def setUp(self):
+        self.schema = {
+            'title': 'user account',
+            'type': 'object',
+            'properties': {
+                'id': {'type': 'integer'},
+                'first-name': {'type': 'string'},
+                'class': {'type': ['string', 'null']},
+                'items': {'type': 'array', 'items': {'type': 'number'}},
+                'created': {'type': 'string', 'format': 'date-time'},
+                'born': {'type': 'string', 'format': 'date'},
+                'active': {'type': 'boolean'},
+                'address': {'type': 'object', 'properties': {'city': {'type': 'string'}}, 'required': ['city']},
+                'friends': {'type': 'array', 'items': {'$ref': '#'}},
+            },
+            'required': ['id', 'first-name'],
+        }
+
+    def test_export(self):
+        schema = RepoObjTest.json_schema()
+        self.assertEqual(schema['type'], 'object')
+        self.assertEqual(sorted(schema['required']), ['id', 'name', 'user'])
+        self.assertEqual(schema['properties']['name'], {'type': ['string', 'null']})
+        self.assertEqual(schema['properties']['user'], {'anyOf': [{'$ref': '#/$defs/OwnerObjTest'}, {'type': 'null'}]})
+        self.assertEqual(schema['properties']['tags']['items']['anyOf'][0], {'$ref': '#/$defs/NestedObjTest'})
+        self.assertEqual(schema['$defs']['OwnerObjTest']['properties']['since'],
+                         {'type': ['integer', 'null'], 'format': 'unix-time'})
+        self.assertEqual(DateField().json_schema()['format'], 'date-time')
+
+        schema = CommentTest.json_schema()
+        self.assertEqual(schema['properties']['parent'], {'anyOf': [{'$ref': '#'}, {'type': 'null'}]})
+
+        schema = EventListTest.json_schema()
+        self.assertEqual(schema['items']['discriminator']['mapping']['push'], '#/$defs/PushEventTest')
+
+    def test_compile(self):
+        User = compile_schema(self.schema)
+        self.assertEqual(User.__name__, 'UserAccount')
+        self.assertTrue(issubclass(User, NestedField))
+
+        user = User({
+            'id': 1, 'first-name': 'Ada', 'class': None, 'items': [1, 2.5], 'active': True,
+            'created': '2016-03-24T21:25:51Z', 'born': '1815-12-10', 'address': {'city': 'London'},
+            'friends': [{'id': 2, 'first-name': 'Charles'}],
+        })
+        self.assertEqual(user.first_name.value, 'Ada')
+        self.assertEqual(user.field_class.value, None)
+        self.assertEqual(user.field_items[1].value, 2.5)
+        self.assertEqual(user.created.value.replace(tzinfo = None), datetime(2016, 3, 24, 21, 25, 51))
+        self.assertEqual(user.born.value, datetime(1815, 12, 10))
+        self.assertEqual(user.address.city.value, 'London')
+        self.assertIsInstance(user.friends[0], User)
+        self.assertEqual(user.friends[0].first_name.value, 'Charles')
+        self.assertEqual(json.loads(user.json_encode())['first-name'], 'Ada')
+
+        self.assertRaises(LookupError, User, {'id': 1})
+        self.assertRaises(ParseException, User, {'id': '1', 'first-name': 'Ada'})
+        self.assertRaises(ParseException, User, {'id': 1, 'first-name': 'Ada', 'items': ['a']})
+        self.assertRaises(LookupError, User, {'id': 1, 'first-name': 'Ada', 'address': {}})
+
+    def test_roundtrip(self):
+        for cls in (CommentTest, RepoListObjTest, EventListTest, CoercedObjTest):
+            schema = cls.json_schema()
+            compiled = compile_schema(schema)
+            self.assertEqual(compiled.__name__, cls.__name__)
+            # Fields are declared in another order, so only required lists may differ
+            self.assertEqual(json.dumps(sort_required(compiled.json_schema()), sort_keys = True),
+                             json.dumps(sort_required(schema), sort_keys = True))
+
+        Events = compile_schema(EventListTest.json_schema())
+        events = Events([{'type': 'push', 'commits': 1}, {'type': 'issue', 'issue': 2}])
+        self.assertEqual([type(e).__name__ for e in events], ['PushEventTest', 'IssueEventTest'])
+
+    def test_union(self):
+        Shape = compile_schema({'oneOf': [
+            {'type': 'object', 'properties': {'kind': {'const': 'circle'}, 'r': {'type': 'number'}}, 'required': ['r']},
+            {'type': 'object', 'properties': {'kind': {'enum': ['square']}, 'side': {'type': 'number'}}, 'required': ['side']},
+        ]}, name = 'Shape')
+        self.assertTrue(issubclass(Shape, UnionField))
+        self.assertEqual(Shape.__discriminator__, 'kind')
+        self.assertEqual(Shape({'kind': 'square', 'side': 2}).side.value, 2)
+        self.assertRaises(ParseException, Shape, {'kind': 'triangle'})
+
+        Loose = compile_schema({'anyOf': [
+            {'type': 'object', 'properties': {'a': {'type': 'integer'}}, 'required': ['a']},
+            {'type': 'object', 'properties': {'b': {'type': 'integer'}}, 'required': ['b']},
+        ]})
+        self.assertEqual(Loose({'b': 1}).b.value, 1)
+        self.assertRaises(ParseException, Loose, {'c': 1})
+
+    def test_unsupported(self):
+        self.assertRaises(SchemaException, compile_schema, {'type': 'object', 'properties': {'a': {}}})
+        self.assertRaises(SchemaException, compile_schema, {'type': ['string', 'integer']})
+        self.assertRaises(SchemaException, compile_schema, {'type': 'array'})
+        self.assertRaises(SchemaException, compile_schema, {'$ref': 'http://example.com/schema.json'})
+        self.assertRaises(SchemaException, compile_schema, {'anyOf': [{'type': 'string'}, {'type': 'integer'}]})
+
+
+class CachedListObjTest(ListField):
+    __model__ = NestedObjTest
+    __cache__ = DecodeCache(max_entries = 2)
+
+
+class CacheTest(unittest.TestCase):
+    def setUp(self):
+        self.data = '[{"id": 1234, "clave": 1, "value": "aValue"}]'
+        CachedListObjTest.__cache__.clear()
+
+    def test_from_json(self):
+        self.assertEqual(ListObjTest.from_json(self.data)[0].id.value, 1234)
+        self.assertIsNot(ListObjTest.from_json(self.data), ListObjTest.from_json(self.data))
+
+        CachedListObjTest.__cache__.copy = False
+        try:
+            first = CachedListObjTest.from_json(self.data)
+            self.assertIs(CachedListObjTest.from_json(self.data), first)
+            self.assertIs(CachedListObjTest.from_json(self.data.encode('utf-8')), first)
+            self.assertEqual(first[0].valor.value, 'aValue')
+        finally:
+            CachedListObjTest.__cache__.copy = True
+
+    def test_copy(self):
+        self.assertTrue(DecodeCache().copy)
+        first = CachedListObjTest.from_json(self.data)
+        first[0].id = IntegerField(1)
+        first.append(first[0])
+        second = CachedListObjTest.from_json(self.data)
+        self.assertIsNot(first, second)
+        self.assertEqual(len(second), 1)
+        self.assertEqual(second[0].id.value, 1234)
+        self.assertEqual(CachedListObjTest.__cache__.stats()['hits'], 1)
+
+    def test_stats(self):
+        cache = DecodeCache()
+        key = cache.make_key(ListObjTest, self.data)
+        self.assertIsNone(cache.get(key))
+        cache.put(key, 'obj', 10)
+        self.assertEqual(cache.get(key), 'obj')
+        self.assertEqual(cache.stats(), {'hits': 1, 'misses': 1, 'evictions': 0, 'entries': 1, 'size': 10})
+        self.assertNotEqual(key, cache.make_key(CachedListObjTest, self.data))
+
+    def test_lru(self):
+        cache = DecodeCache(max_entries = 2)
+        cache.put('a', 1)
+        cache.put('b', 2)
+        cache.get('a')
+        cache.put('c', 3)
+        self.assertIn('a', cache)
+        self.assertNotIn('b', cache)
+        self.assertEqual(cache.evictions, 1)
+
+    def test_max_bytes(self):
+        cache = DecodeCache(max_bytes = 10)
+        cache.put('a', 1, 6)
+        cache.put('b', 2, 6)
+        self.assertEqual(len(cache), 1)
+        self.assertEqual(cache.size, 6)
+        cache.put('c', 3, 11)
+        self.assertNotIn('c', cache)
+
+    def test_size_in_bytes(self):
+        class TextObjTest(NestedField):
+            text = TextField()
+        TextObjTest.__cache__ = DecodeCache()
+        data = u'{"text": "\u00f1and\u00fa"}'
+        TextObjTest.from_json(data)
+        self.assertEqual(TextObjTest.__cache__.size, len(data.encode('utf-8')))
+        self.assertGreater(TextObjTest.__cache__.size, len(data))
+
+    def test_ttl(self):
+        now = [0]
+        cache = DecodeCache(ttl = 5, timer = lambda: now[0])
+        cache.put('a', 1)
+        now[0] = 4
+        self.assertEqual(cache.get('a'), 1)
+        now[0] = 5
+        self.assertIsNone(cache.get('a'))
+        self.assertEqual(len(cache), 0)
+
+
+class CliTest(unittest.TestCase):
+    def setUp(self):
+        self.dir = tempfile.mkdtemp()
+        self.data = [
+            {'id': i, 'name': 'repo%d' % i, 'description': None, 'user': {'login': 'user%d' % i, 'since': 1458854751}}
+            for i in range(25)
+        ]
+        self.data[3]['id'] = 'three'
+        os.mkdir(os.path.join(self.dir, 'in'))
+        with open(os.path.join(self.dir, 'in', 'repos.json'), 'w') as f:
+            json.dump(self.data, f)
+        with open(os.path.join(self.dir, 'in', 'repos.ndjson'), 'w') as f:
+            f.write('\n'.join(json.dumps(d) for d in self.data) + '\n\n')
+
+    def tearDown(self):
+        shutil.rmtree(self.dir)
+
+    def run_cli(self, *args):
+        from json2py.cli import main
+        stderr = sys.stderr
+        sys.stderr = captured = tempfile.TemporaryFile('w+')
+        try:
+            status = main(list(args))
+        finally:
+            sys.stderr = stderr
+        captured.seek(0)
+        return status, captured.read()
+
+    def read_output(self):
+        with open(os.path.join(self.dir, 'out')) as f:
+            return f.read()
+
+    def test_convert(self):
+        output = os.path.join(self.dir, 'out')
+        status, report = self.run_cli('tests:RepoListObjTest', os.path.join(self.dir, 'in', 'repos.json'),
+                                      '-o', output, '-w', '1', '--chunk-size', '4', '--exclude', 'owner', '--exclude-none')
+        self.assertEqual(status, 1)
+        self.assertIn('repos.json[3]: ParseException', report)
+        self.assertIn('records: 25, errors: 1', report)
+        self.assertIn('throughput', report)
+
+        lines = [json.loads(line) for line in self.read_output().splitlines()]
+        self.assertEqual(len(lines), 24)
+        self.assertEqual(lines[0], {'id': 0, 'name': 'repo0', 'tags': []})
+
+    def test_parallel_directory(self):
+        output = os.path.join(self.dir, 'out')
+        status, report = self.run_cli('tests:RepoObjTest', os.path.join(self.dir, 'in'), '-o', output, '-w', '2',
+                                      '--chunk-size', '5', '--output-format', 'array', '--include', 'id', '-q')
+        self.assertEqual(status, 1)
+        self.assertIn('repos.ndjson:4: ParseException', report)
+        self.assertEqual(json.loads(self.read_output()), [{'id': i} for i in range(25) if i != 3] * 2)
+
+    def test_validate(self):
+        del self.data[3]
+        path = os.path.join(self.dir, 'valid.json')
+        with open(path, 'w') as f:
+            json.dump(self.data[0], f)
+        status, report = self.run_cli('tests.RepoObjTest', path, '--validate', '-q', '-w', '1')
+        self.assertEqual((status, report), (0, ''))
+
+        with open(path, 'w') as f:
+            f.write('{"id": ')
+        status, report = self.run_cli('tests:RepoObjTest', path, '--validate', '-q', '-w', '1', '--input-format', 'array')
+        self.assertEqual(status, 1)
+        self.assertIn('valid.json', report)
+
+    def test_module(self):
+        output = subprocess.check_output(
+            [sys.executable, '-m', 'json2py', 'tests:ListObjTest', '-', '-w', '1', '-q'],
+            cwd = os.path.dirname(os.path.abspath(__file__)),
+            input = b'[{"id": 1, "clave": 2, "value": "a"}]'
+        )
+        self.assertEqual(json.loads(output.decode('utf-8')), {'id': 1, 'clave': 2, 'value': 'a'})
+        self.assertRaises(subprocess.CalledProcessError, subprocess.check_call,
+                          [sys.executable, '-m', 'json2py', 'tests:Missing', '-'],
+                          cwd = os.path.dirname(os.path.abspath(__file__)), stderr = open(os.devnull, 'w'))
+
+    def test_exact(self):
+        output = os.path.join(self.dir, 'out')
+        record = '{"id": 12345678901234567890123, "total": 12345678901234567.890123456789, "rate": 0.5}'
+        with open(os.path.join(self.dir, 'invoices.json'), 'w') as f:
+            f.write(' [%s ,\n%s, {"id": 1}] ' % (record, record.replace('0.5', '1.5')))
+        with open(os.path.join(self.dir, 'invoice.json'), 'w') as f:
+            f.write(record)
+
+        status, report = self.run_cli('tests:InvoiceListObjTest', os.path.join(self.dir, 'invoices.json'),
+                                      os.path.join(self.dir, 'invoice.json'), '-o', output, '-w', '1', '--exclude-none')
+        self.assertEqual(status, 1)
+        self.assertIn('invoices.json[2]: LookupError', report)
+        expected = '{"id":12345678901234567890123,"rate":%s,"total":12345678901234567.890123456789}'
+        self.assertEqual(self.read_output().splitlines(), [expected % '0.5', expected % '1.5', expected % '0.5'])
+
+        with open(os.path.join(self.dir, 'invoices.json'), 'w') as f:
+            f.write('[%s %s]' % (record, record))
+        status, report = self.run_cli('tests:InvoiceObjTest', os.path.join(self.dir, 'invoices.json'), '--validate', '-w', '1')
+        self.assertEqual(status, 1)
+        self.assertIn("invoices.json: Expecting ',' delimiter", report)
+
+
+class ImportTimeTest(unittest.TestCase):
+    budget = float(os.environ.get('JSON2PY_IMPORT_BUDGET_MS', 60))
+
+    def run_python(self, *args):
+        return subprocess.check_output(
+            [sys.executable] + list(args),
+            cwd = os.path.dirname(os.path.abspath(__file__)),
+            stderr = subprocess.STDOUT
+        ).decode('utf-8')
+
+    def test_lazy_modules(self):
+        output = self.run_python('-c', 'import sys, json2py.models; print(sorted(sys.modules))')
+        for module in ['dateutil', 'past', 'future', 'multiprocessing', 'concurrent']:
+            self.assertNotIn("'%s'" % module, output)
+
+    @unittest.skipIf(sys.version_info < (3, 7), '-X importtime requires Python 3.7')
+    def test_import_time(self):
+        timings = []
+        for i in range(3):
+            output = self.run_python('-X', 'importtime', '-c', 'import json2py.models')
+            for line in output.splitlines():
+                fields = line.split('|')
+                if len(fields) == 3 and fields[2].strip() == 'json2py.models':
+                    timings.append(int(fields[1]) / 1000.0)
+        self.assertEqual(len(timings), 3)
+        self.assertLess(min(timings), self.budget)
+
 if __name__ == '__main__':
     unittest.main()
\ No newline at end of file